@@ -1,17 +1,26 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from datetime import datetime
 
-from database import get_db
+from database import get_async_db
 from models.compliance import ComplianceFramework, ComplianceRequirement, ComplianceStatus
-from schemas.compliance import ComplianceFrameworkResponse, ComplianceRequirementResponse, ComplianceDashboardData
+from models.control import Control
+from models.control_link import RequirementControlLink
+from schemas.compliance import (
+    ComplianceFrameworkResponse, ComplianceRequirementResponse, ComplianceDashboardData, RequirementControlsUpdate
+)
+from schemas.control import ControlResponse
+from services.conditional import conditional_get
+from services.control_links import refresh_requirement_compliance
+from services.change_history import as_of_param, rows_as_of
 
 router = APIRouter()
 
 
 @router.post("/frameworks/initialize")
-async def initialize_compliance_frameworks(db: Session = Depends(get_db)):
+async def initialize_compliance_frameworks(db: AsyncSession = Depends(get_async_db)):
     """Initialize standard compliance frameworks"""
     frameworks_data = [
         {
@@ -48,16 +57,17 @@ async def initialize_compliance_frameworks(db: Session = Depends(get_db)):
     
     created = []
     for framework_data in frameworks_data:
-        existing = db.query(ComplianceFramework).filter(
-            ComplianceFramework.framework_id == framework_data["framework_id"]
-        ).first()
+        existing = await db.scalar(
+            select(ComplianceFramework)
+            .where(ComplianceFramework.framework_id == framework_data["framework_id"])
+        )
         
         if not existing:
             framework = ComplianceFramework(**framework_data)
             db.add(framework)
             created.append(framework_data["name"])
     
-    db.commit()
+    await db.commit()
     
     return {
         "success": True,
@@ -65,59 +75,66 @@ async def initialize_compliance_frameworks(db: Session = Depends(get_db)):
     }
 
 
-@router.get("/frameworks/", response_model=List[ComplianceFrameworkResponse])
+@router.get("/frameworks/", response_model=List[ComplianceFrameworkResponse], dependencies=[Depends(conditional_get("compliance"))])
 async def get_compliance_frameworks(
     is_active: bool = True,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get all compliance frameworks"""
-    query = db.query(ComplianceFramework)
+    query = select(ComplianceFramework)
     if is_active is not None:
-        query = query.filter(ComplianceFramework.is_active == is_active)
+        query = query.where(ComplianceFramework.is_active == is_active)
     
-    frameworks = query.all()
+    frameworks = (await db.scalars(query)).all()
     return frameworks
 
 
-@router.get("/frameworks/{framework_id}", response_model=ComplianceFrameworkResponse)
-async def get_compliance_framework(framework_id: str, db: Session = Depends(get_db)):
+@router.get("/frameworks/{framework_id}", response_model=ComplianceFrameworkResponse, dependencies=[Depends(conditional_get("compliance"))])
+async def get_compliance_framework(framework_id: str, db: AsyncSession = Depends(get_async_db)):
     """Get specific compliance framework"""
-    framework = db.query(ComplianceFramework).filter(
-        ComplianceFramework.framework_id == framework_id
-    ).first()
+    framework = await db.scalar(
+        select(ComplianceFramework).where(ComplianceFramework.framework_id == framework_id)
+    )
     if not framework:
         raise HTTPException(status_code=404, detail="Framework not found")
     return framework
 
 
-@router.get("/frameworks/{framework_id}/requirements", response_model=List[ComplianceRequirementResponse])
-async def get_framework_requirements(framework_id: str, db: Session = Depends(get_db)):
-    """Get all requirements for a framework"""
-    framework = db.query(ComplianceFramework).filter(
-        ComplianceFramework.framework_id == framework_id
-    ).first()
+@router.get("/frameworks/{framework_id}/requirements", response_model=List[ComplianceRequirementResponse], dependencies=[Depends(conditional_get("compliance"))])
+async def get_framework_requirements(
+    framework_id: str,
+    as_of: Optional[datetime] = Depends(as_of_param),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get all requirements for a framework, now or as of a past time"""
+    framework = await db.scalar(
+        select(ComplianceFramework).where(ComplianceFramework.framework_id == framework_id)
+    )
     if not framework:
         raise HTTPException(status_code=404, detail="Framework not found")
     
-    requirements = db.query(ComplianceRequirement).filter(
-        ComplianceRequirement.framework_id == framework.id
-    ).all()
+    if as_of:
+        return await db.run_sync(rows_as_of, ComplianceRequirement, as_of, {"framework_id": framework.id})
+    
+    requirements = (await db.scalars(
+        select(ComplianceRequirement).where(ComplianceRequirement.framework_id == framework.id)
+    )).all()
     
     return requirements
 
 
 @router.put("/frameworks/{framework_id}/calculate")
-async def calculate_framework_compliance(framework_id: str, db: Session = Depends(get_db)):
+async def calculate_framework_compliance(framework_id: str, db: AsyncSession = Depends(get_async_db)):
     """Calculate compliance percentage for a framework"""
-    framework = db.query(ComplianceFramework).filter(
-        ComplianceFramework.framework_id == framework_id
-    ).first()
+    framework = await db.scalar(
+        select(ComplianceFramework).where(ComplianceFramework.framework_id == framework_id)
+    )
     if not framework:
         raise HTTPException(status_code=404, detail="Framework not found")
     
-    requirements = db.query(ComplianceRequirement).filter(
-        ComplianceRequirement.framework_id == framework.id
-    ).all()
+    requirements = (await db.scalars(
+        select(ComplianceRequirement).where(ComplianceRequirement.framework_id == framework.id)
+    )).all()
     
     total = len(requirements)
     compliant = sum(1 for r in requirements if r.status == ComplianceStatus.COMPLIANT)
@@ -147,7 +164,7 @@ async def calculate_framework_compliance(framework_id: str, db: Session = Depend
         framework.status = ComplianceStatus.NON_COMPLIANT
     
     framework.updated_at = datetime.utcnow()
-    db.commit()
+    await db.commit()
     
     return {
         "framework": framework_id,
@@ -168,12 +185,12 @@ async def create_requirement(
     description: str,
     category: str,
     owner: Optional[str] = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create a compliance requirement"""
-    framework = db.query(ComplianceFramework).filter(
-        ComplianceFramework.framework_id == framework_id
-    ).first()
+    framework = await db.scalar(
+        select(ComplianceFramework).where(ComplianceFramework.framework_id == framework_id)
+    )
     if not framework:
         raise HTTPException(status_code=404, detail="Framework not found")
     
@@ -189,8 +206,8 @@ async def create_requirement(
     )
     
     db.add(requirement)
-    db.commit()
-    db.refresh(requirement)
+    await db.commit()
+    await db.refresh(requirement)
     
     return {
         "success": True,
@@ -205,12 +222,12 @@ async def update_requirement_status(
     status: ComplianceStatus,
     compliance_percentage: float,
     implementation_notes: Optional[str] = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update compliance requirement status"""
-    requirement = db.query(ComplianceRequirement).filter(
-        ComplianceRequirement.requirement_id == requirement_id
-    ).first()
+    requirement = await db.scalar(
+        select(ComplianceRequirement).where(ComplianceRequirement.requirement_id == requirement_id)
+    )
     if not requirement:
         raise HTTPException(status_code=404, detail="Requirement not found")
     
@@ -220,7 +237,7 @@ async def update_requirement_status(
         requirement.implementation_notes = implementation_notes
     requirement.updated_at = datetime.utcnow()
     
-    db.commit()
+    await db.commit()
     
     return {
         "success": True,
@@ -230,21 +247,80 @@ async def update_requirement_status(
     }
 
 
+@router.get("/requirements/{requirement_id}/controls", dependencies=[Depends(conditional_get("compliance", "controls"))])
+async def get_requirement_controls(requirement_id: str, db: AsyncSession = Depends(get_async_db)):
+    """Get the controls mapped to a compliance requirement"""
+    requirement = await db.scalar(
+        select(ComplianceRequirement).where(ComplianceRequirement.requirement_id == requirement_id)
+    )
+    if not requirement:
+        raise HTTPException(status_code=404, detail="Requirement not found")
+    
+    controls = (await db.scalars(
+        select(Control)
+        .join(RequirementControlLink, RequirementControlLink.control_id == Control.id)
+        .where(RequirementControlLink.requirement_id == requirement.id)
+        .order_by(Control.id)
+    )).all()
+    
+    return {
+        "requirement_id": requirement_id,
+        "controls": [ControlResponse.model_validate(control) for control in controls]
+    }
+
+
+@router.put("/requirements/{requirement_id}/controls")
+async def set_requirement_controls(
+    requirement_id: str,
+    update: RequirementControlsUpdate,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Map controls to a compliance requirement and recompute its compliance from them"""
+    requirement = await db.scalar(
+        select(ComplianceRequirement).where(ComplianceRequirement.requirement_id == requirement_id)
+    )
+    if not requirement:
+        raise HTTPException(status_code=404, detail="Requirement not found")
+    
+    control_ids = list(dict.fromkeys(update.control_ids))
+    known = set((await db.scalars(select(Control.control_id).where(Control.control_id.in_(control_ids)))).all())
+    unknown = [control_id for control_id in control_ids if control_id not in known]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown control(s): {', '.join(unknown)}")
+    
+    requirement.mapped_controls = control_ids
+    requirement.updated_at = datetime.utcnow()
+    await db.flush()
+    await db.run_sync(refresh_requirement_compliance, [ComplianceRequirement.id == requirement.id])
+    await db.commit()
+    await db.refresh(requirement)
+    
+    return {
+        "success": True,
+        "requirement_id": requirement_id,
+        "mapped_controls": control_ids,
+        "status": requirement.status.value if requirement.status else None,
+        "compliance_percentage": requirement.compliance_percentage
+    }
+
+
 @router.get("/dashboard", response_model=List[ComplianceDashboardData])
-async def get_compliance_dashboard(db: Session = Depends(get_db)):
+async def get_compliance_dashboard(db: AsyncSession = Depends(get_async_db)):
     """Get compliance dashboard data for all frameworks"""
-    frameworks = db.query(ComplianceFramework).filter(
-        ComplianceFramework.is_active == True
-    ).all()
+    frameworks = (await db.scalars(
+        select(ComplianceFramework).where(ComplianceFramework.is_active == True)
+    )).all()
     
     dashboard_data = []
     for framework in frameworks:
         # Get critical gaps (non-compliant high priority requirements)
-        critical_gaps = db.query(ComplianceRequirement).filter(
-            ComplianceRequirement.framework_id == framework.id,
-            ComplianceRequirement.status == ComplianceStatus.NON_COMPLIANT,
-            ComplianceRequirement.priority >= 8
-        ).all()
+        critical_gaps = (await db.scalars(
+            select(ComplianceRequirement).where(
+                ComplianceRequirement.framework_id == framework.id,
+                ComplianceRequirement.status == ComplianceStatus.NON_COMPLIANT,
+                ComplianceRequirement.priority >= 8
+            )
+        )).all()
         
         dashboard_data.append(
             ComplianceDashboardData(
@@ -261,17 +337,17 @@ async def get_compliance_dashboard(db: Session = Depends(get_db)):
 
 
 @router.get("/analytics/gap-analysis/{framework_id}")
-async def get_gap_analysis(framework_id: str, db: Session = Depends(get_db)):
+async def get_gap_analysis(framework_id: str, db: AsyncSession = Depends(get_async_db)):
     """Get gap analysis for a framework"""
-    framework = db.query(ComplianceFramework).filter(
-        ComplianceFramework.framework_id == framework_id
-    ).first()
+    framework = await db.scalar(
+        select(ComplianceFramework).where(ComplianceFramework.framework_id == framework_id)
+    )
     if not framework:
         raise HTTPException(status_code=404, detail="Framework not found")
     
-    requirements = db.query(ComplianceRequirement).filter(
-        ComplianceRequirement.framework_id == framework.id
-    ).all()
+    requirements = (await db.scalars(
+        select(ComplianceRequirement).where(ComplianceRequirement.framework_id == framework.id)
+    )).all()
     
     gaps = []
     for req in requirements:
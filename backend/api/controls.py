@@ -1,56 +1,111 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List, Optional
-from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Query, status, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from typing import Any, Dict, List, Optional
+from datetime import datetime, timedelta
 
-from database import get_db
+from database import get_async_db
 from models.control import Control, ControlFramework, ControlMapping, ControlStatus
-from schemas.control import ControlCreate, ControlUpdate, ControlResponse, ControlFrameworkResponse
+from models.control_test import ControlTestRun
+from models.control_link import RiskControlLink, RequirementControlLink
+from models.risk import Risk
+from models.compliance import ComplianceRequirement
+from schemas.control import (
+    ControlCreate, ControlUpdate, ControlResponse, ControlFrameworkResponse, ControlTestRecord, ControlTestRunResponse
+)
+from schemas.batch import ControlBatchUpdate
+from schemas.risk import RiskResponse
+from schemas.compliance import ComplianceRequirementResponse
+from services.cache import cached
+from services.conditional import conditional_get
+from services.pagination import PageParams, page_params, paginate, set_page_headers
+from services.serialization import field_params, json_response, project
+from services.change_history import as_of_param, history_page
+from services.id_allocator import reserve_ids
+from services.control_links import PROPAGATED_FIELDS, propagate_control_changes
+from services.batch_updates import patch_controls
+from services.control_testing import due_controls, record_test_result
+from services.control_coverage import COVERAGE_DIMENSIONS, control_coverage
 
 router = APIRouter()
 
+CONTROL_SORTS = {
+    "id": Control.id,
+    "created_at": Control.created_at,
+    "updated_at": Control.updated_at,
+    "title": Control.title,
+    "next_test_date": Control.next_test_date,
+}
 
-def generate_control_id(db: Session, framework: str = "GEN") -> str:
+DUE_SORTS = {"next_test_date": Control.next_test_date}
+
+
+async def generate_control_id(framework: str = "GEN") -> str:
     """Generate unique control ID"""
-    count = db.query(Control).count()
-    return f"{framework}-{count + 1:04d}"
+    return (await reserve_ids(Control, framework, 4))[0]
 
 
 @router.post("/", response_model=ControlResponse, status_code=status.HTTP_201_CREATED)
-async def create_control(control: ControlCreate, db: Session = Depends(get_db)):
+async def create_control(control: ControlCreate, db: AsyncSession = Depends(get_async_db)):
     """Create a new control"""
     db_control = Control(
-        control_id=generate_control_id(db),
+        control_id=await generate_control_id(),
         **control.dict()
     )
     
     db.add(db_control)
-    db.commit()
-    db.refresh(db_control)
+    await db.commit()
+    await db.refresh(db_control)
     return db_control
 
 
-@router.get("/", response_model=List[ControlResponse])
+@router.get("/", response_model=List[ControlResponse], dependencies=[Depends(conditional_get("controls"))])
 async def get_controls(
-    skip: int = 0,
-    limit: int = 100,
+    response: Response,
+    page: PageParams = Depends(page_params(CONTROL_SORTS)),
+    fields: Dict[str, Any] = Depends(field_params(Control, ControlResponse)),
     status: Optional[ControlStatus] = None,
-    db: Session = Depends(get_db)
+    as_of: Optional[datetime] = Depends(as_of_param),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Get all controls with optional filters"""
-    query = db.query(Control)
+    """Get all controls with optional filters, now or as of a past time"""
+    if as_of:
+        controls, total = await db.run_sync(history_page, Control, as_of, {"status": status}, page)
+        set_page_headers(response, None, total)
+        return json_response(project(controls, fields), response)
+    
+    query = select(Control)
     
     if status:
-        query = query.filter(Control.status == status)
+        query = query.where(Control.status == status)
     
-    controls = query.offset(skip).limit(limit).all()
+    controls, next_cursor, total = await db.run_sync(paginate, query, Control.id, page, fields)
+    set_page_headers(response, next_cursor, total)
+    return json_response(controls, response)
+
+
+@router.get("/testing/due", response_model=List[ControlResponse])
+async def get_due_controls(
+    response: Response,
+    within_days: int = Query(0, ge=0, le=365, description="Also include tests due this many days ahead"),
+    page: PageParams = Depends(page_params(DUE_SORTS, default_sort="next_test_date")),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Controls whose test is due or overdue, earliest first.
+
+    Not ETag-cached: the queue changes with the clock, not only with writes.
+    """
+    query = due_controls(datetime.utcnow() + timedelta(days=within_days))
+    controls, next_cursor, total = await db.run_sync(paginate, query, Control.id, page)
+    set_page_headers(response, next_cursor, total)
     return controls
 
 
-@router.get("/{control_id}", response_model=ControlResponse)
-async def get_control(control_id: str, db: Session = Depends(get_db)):
+@router.get("/{control_id}", response_model=ControlResponse, dependencies=[Depends(conditional_get("controls"))])
+async def get_control(control_id: str, db: AsyncSession = Depends(get_async_db)):
     """Get a specific control by ID"""
-    control = db.query(Control).filter(Control.control_id == control_id).first()
+    control = await db.scalar(select(Control).where(Control.control_id == control_id))
     if not control:
         raise HTTPException(status_code=404, detail="Control not found")
     return control
@@ -60,10 +115,10 @@ async def get_control(control_id: str, db: Session = Depends(get_db)):
 async def update_control(
     control_id: str,
     control_update: ControlUpdate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update a control"""
-    db_control = db.query(Control).filter(Control.control_id == control_id).first()
+    db_control = await db.scalar(select(Control).where(Control.control_id == control_id))
     if not db_control:
         raise HTTPException(status_code=404, detail="Control not found")
     
@@ -72,20 +127,85 @@ async def update_control(
         setattr(db_control, field, value)
     
     db_control.updated_at = datetime.utcnow()
-    db.commit()
-    db.refresh(db_control)
+    
+    # Residual scores of linked risks and compliance of mapped requirements depend on it
+    if update_data.keys() & PROPAGATED_FIELDS:
+        await db.flush()
+        await db.run_sync(propagate_control_changes, [db_control.id])
+    
+    await db.commit()
+    await db.refresh(db_control)
     return db_control
 
 
-@router.get("/frameworks/", response_model=List[ControlFrameworkResponse])
-async def get_frameworks(db: Session = Depends(get_db)):
+@router.post("/{control_id}/tests", response_model=ControlTestRunResponse, status_code=status.HTTP_201_CREATED)
+async def record_control_test(
+    control_id: str,
+    test: ControlTestRecord,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Record a test result; the control's next test date moves one frequency past it"""
+    db_control = await db.scalar(select(Control).where(Control.control_id == control_id))
+    if not db_control:
+        raise HTTPException(status_code=404, detail="Control not found")
+    
+    previous_rating = db_control.effectiveness_rating
+    run = await db.run_sync(
+        record_test_result, db_control, test.result, test.tested_at, test.tested_by,
+        test.notes, test.effectiveness_rating
+    )
+    
+    if db_control.effectiveness_rating != previous_rating:
+        await db.flush()
+        await db.run_sync(propagate_control_changes, [db_control.id])
+    
+    await db.commit()
+    return run
+
+
+@router.get("/{control_id}/tests", response_model=List[ControlTestRunResponse], dependencies=[Depends(conditional_get("controls"))])
+async def get_control_tests(
+    control_id: str,
+    limit: int = Query(50, ge=1, le=500),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get a control's test runs, newest first"""
+    db_control = await db.scalar(select(Control).where(Control.control_id == control_id))
+    if not db_control:
+        raise HTTPException(status_code=404, detail="Control not found")
+    
+    runs = (await db.scalars(
+        select(ControlTestRun)
+        .where(ControlTestRun.control_id == db_control.id)
+        .order_by(ControlTestRun.id.desc())
+        .limit(limit)
+    )).all()
+    return runs
+
+
+@router.patch("/batch")
+async def batch_update_controls(batch: ControlBatchUpdate, db: AsyncSession = Depends(get_async_db)):
+    """Apply one patch to many controls, by ID list or filter, in a single transaction"""
+    filters = []
+    if batch.filter:
+        if batch.filter.status:
+            filters.append(Control.status == batch.filter.status)
+        if batch.filter.owner:
+            filters.append(Control.owner == batch.filter.owner)
+    result = await db.run_sync(patch_controls, batch.ids, filters, batch.patch.dict(exclude_unset=True))
+    await db.commit()
+    return result
+
+
+@router.get("/frameworks/", response_model=List[ControlFrameworkResponse], dependencies=[Depends(conditional_get("controls"))])
+async def get_frameworks(db: AsyncSession = Depends(get_async_db)):
     """Get all control frameworks"""
-    frameworks = db.query(ControlFramework).all()
+    frameworks = (await db.scalars(select(ControlFramework))).all()
     return frameworks
 
 
 @router.post("/frameworks/initialize")
-async def initialize_frameworks(db: Session = Depends(get_db)):
+async def initialize_frameworks(db: AsyncSession = Depends(get_async_db)):
     """Initialize standard control frameworks (SOC2, NIST, ISO)"""
     frameworks_data = [
         {
@@ -107,16 +227,16 @@ async def initialize_frameworks(db: Session = Depends(get_db)):
     
     created = []
     for framework_data in frameworks_data:
-        existing = db.query(ControlFramework).filter(
-            ControlFramework.name == framework_data["name"]
-        ).first()
+        existing = await db.scalar(
+            select(ControlFramework).where(ControlFramework.name == framework_data["name"])
+        )
         
         if not existing:
             framework = ControlFramework(**framework_data)
             db.add(framework)
             created.append(framework_data["name"])
     
-    db.commit()
+    await db.commit()
     
     return {
         "success": True,
@@ -124,16 +244,18 @@ async def initialize_frameworks(db: Session = Depends(get_db)):
     }
 
 
-@router.get("/mappings/{control_id}")
-async def get_control_mappings(control_id: str, db: Session = Depends(get_db)):
+@router.get("/mappings/{control_id}", dependencies=[Depends(conditional_get("controls"))])
+async def get_control_mappings(control_id: str, db: AsyncSession = Depends(get_async_db)):
     """Get framework mappings for a control"""
-    control = db.query(Control).filter(Control.control_id == control_id).first()
+    control = await db.scalar(select(Control).where(Control.control_id == control_id))
     if not control:
         raise HTTPException(status_code=404, detail="Control not found")
     
-    mappings = db.query(ControlMapping).filter(
-        ControlMapping.control_id == control.id
-    ).all()
+    mappings = (await db.scalars(
+        select(ControlMapping)
+        .where(ControlMapping.control_id == control.id)
+        .options(selectinload(ControlMapping.framework))
+    )).all()
     
     return {
         "control_id": control_id,
@@ -148,42 +270,54 @@ async def get_control_mappings(control_id: str, db: Session = Depends(get_db)):
     }
 
 
-@router.get("/analytics/coverage")
-async def get_control_coverage(db: Session = Depends(get_db)):
-    """Get control coverage analytics"""
-    total_controls = db.query(Control).count()
-    
-    coverage_by_status = {}
-    for status in ControlStatus:
-        count = db.query(Control).filter(Control.status == status).count()
-        coverage_by_status[status.value] = {
-            "count": count,
-            "percentage": (count / total_controls * 100) if total_controls > 0 else 0
-        }
-    
-    # Framework coverage
-    frameworks = db.query(ControlFramework).all()
-    framework_coverage = []
+@router.get("/{control_id}/risks", response_model=List[RiskResponse], dependencies=[Depends(conditional_get("risks", "controls"))])
+async def get_control_risks(control_id: str, db: AsyncSession = Depends(get_async_db)):
+    """Get the risks a control mitigates"""
+    control = await db.scalar(select(Control).where(Control.control_id == control_id))
+    if not control:
+        raise HTTPException(status_code=404, detail="Control not found")
     
-    for framework in frameworks:
-        total_mappings = db.query(ControlMapping).filter(
-            ControlMapping.framework_id == framework.id
-        ).count()
-        
-        implemented_mappings = db.query(ControlMapping).filter(
-            ControlMapping.framework_id == framework.id,
-            ControlMapping.compliance_status == ControlStatus.IMPLEMENTED
-        ).count()
-        
-        framework_coverage.append({
-            "framework": framework.name,
-            "total_controls": total_mappings,
-            "implemented": implemented_mappings,
-            "coverage_percentage": (implemented_mappings / total_mappings * 100) if total_mappings > 0 else 0
-        })
+    risks = (await db.scalars(
+        select(Risk)
+        .join(RiskControlLink, RiskControlLink.risk_id == Risk.id)
+        .where(RiskControlLink.control_id == control.id)
+        .order_by(Risk.id)
+    )).all()
+    return risks
+
+
+@router.get(
+    "/{control_id}/requirements",
+    response_model=List[ComplianceRequirementResponse],
+    dependencies=[Depends(conditional_get("compliance", "controls"))]
+)
+async def get_control_requirements(control_id: str, db: AsyncSession = Depends(get_async_db)):
+    """Get the compliance requirements a control is mapped to"""
+    control = await db.scalar(select(Control).where(Control.control_id == control_id))
+    if not control:
+        raise HTTPException(status_code=404, detail="Control not found")
     
-    return {
-        "total_controls": total_controls,
-        "by_status": coverage_by_status,
-        "by_framework": framework_coverage
-    }
\ No newline at end of file
+    requirements = (await db.scalars(
+        select(ComplianceRequirement)
+        .join(RequirementControlLink, RequirementControlLink.requirement_id == ComplianceRequirement.id)
+        .where(RequirementControlLink.control_id == control.id)
+        .order_by(ComplianceRequirement.id)
+    )).all()
+    return requirements
+
+
+@router.get("/analytics/coverage")
+@cached(tags=["controls"])
+async def get_control_coverage(
+    group_by: Optional[str] = Query(None, pattern="^(" + "|".join(COVERAGE_DIMENSIONS) + ")$"),
+    responsible_team: Optional[str] = None,
+    owner: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get control coverage analytics, optionally for one team or owner and broken down per team or owner"""
+    filters = []
+    if responsible_team:
+        filters.append(Control.responsible_team == responsible_team)
+    if owner:
+        filters.append(Control.owner == owner)
+    return await db.run_sync(control_coverage, group_by, filters)
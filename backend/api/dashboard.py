@@ -1,61 +1,33 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
 from datetime import datetime, timedelta
 
-from database import get_db
-from models.risk import Risk, RiskStatus
-from models.control import Control, ControlStatus
-from models.vendor import Vendor, VendorAssessment, VendorStatus
-from models.evidence import Evidence, EvidenceStatus
-from models.compliance import ComplianceFramework, ComplianceStatus
+from database import get_async_db
+from models.vendor import Vendor
+from services.dashboard_metrics import get_alert_counters, get_active_frameworks
+from services.dashboard_snapshot import read_snapshot, rebuild_snapshot
+from services.action_items import get_action_items_page, ActionItemType
+from services.metrics_rollup import get_trend_series, METRIC_COLUMNS
+from services.cache import cached, response_cache
+from services.change_tracking import ALL_TAGS
+from services.live_updates import dashboard_event_stream
 
 router = APIRouter()
 
 
 @router.get("/overview")
-async def get_dashboard_overview(db: Session = Depends(get_db)):
+@cached(tags=ALL_TAGS)
+async def get_dashboard_overview(db: AsyncSession = Depends(get_async_db)):
     """Get comprehensive dashboard overview"""
-    
-    # Risk metrics
-    total_risks = db.query(Risk).count()
-    open_risks = db.query(Risk).filter(Risk.status == RiskStatus.OPEN).count()
-    critical_risks = db.query(Risk).filter(
-        Risk.inherent_risk_score >= 15
-    ).count()
-    
-    # Control metrics
-    total_controls = db.query(Control).count()
-    implemented_controls = db.query(Control).filter(
-        Control.status == ControlStatus.IMPLEMENTED
-    ).count()
-    controls_needing_testing = db.query(Control).filter(
-        Control.next_test_date <= datetime.utcnow()
-    ).count()
-    
-    # Vendor metrics
-    total_vendors = db.query(Vendor).filter(Vendor.status == VendorStatus.ACTIVE).count()
-    high_risk_vendors = db.query(Vendor).filter(
-        Vendor.status == VendorStatus.ACTIVE,
-        Vendor.risk_score >= 75
-    ).count()
-    assessments_due = db.query(Vendor).filter(
-        Vendor.next_assessment_date <= datetime.utcnow() + timedelta(days=30)
-    ).count()
-    
-    # Evidence metrics
-    total_evidence = db.query(Evidence).count()
-    verified_evidence = db.query(Evidence).filter(
-        Evidence.status == EvidenceStatus.VERIFIED
-    ).count()
-    expiring_evidence = db.query(Evidence).filter(
-        Evidence.valid_until <= datetime.utcnow() + timedelta(days=30),
-        Evidence.valid_until >= datetime.utcnow()
-    ).count()
+    snapshot = await db.run_sync(read_snapshot)
+    alerts = await db.run_sync(get_alert_counters)
     
     # Compliance metrics
-    frameworks = db.query(ComplianceFramework).filter(
-        ComplianceFramework.is_active == True
-    ).all()
+    frameworks = await db.run_sync(get_active_frameworks)
     
     avg_compliance = 0.0
     if frameworks:
@@ -72,114 +44,103 @@ async def get_dashboard_overview(db: Session = Depends(get_db)):
     
     return {
         "summary": {
-            "total_risks": total_risks,
-            "open_risks": open_risks,
-            "critical_risks": critical_risks,
-            "total_controls": total_controls,
-            "implemented_controls": implemented_controls,
-            "total_vendors": total_vendors,
-            "high_risk_vendors": high_risk_vendors,
-            "total_evidence": total_evidence,
-            "verified_evidence": verified_evidence,
+            "total_risks": int(snapshot["total_risks"]),
+            "open_risks": int(snapshot["open_risks"]),
+            "critical_risks": int(snapshot["critical_risks"]),
+            "total_controls": int(snapshot["total_controls"]),
+            "implemented_controls": int(snapshot["implemented_controls"]),
+            "total_vendors": int(snapshot["active_vendors"]),
+            "high_risk_vendors": int(snapshot["high_risk_vendors"]),
+            "total_evidence": int(snapshot["total_evidence"]),
+            "verified_evidence": int(snapshot["verified_evidence"]),
             "average_compliance": round(avg_compliance, 2)
         },
         "alerts": {
-            "critical_risks": critical_risks,
-            "controls_needing_testing": controls_needing_testing,
-            "assessments_due_30_days": assessments_due,
-            "expiring_evidence": expiring_evidence
+            "critical_risks": int(snapshot["critical_risks"]),
+            "controls_needing_testing": alerts["controls_needing_testing"],
+            "assessments_due_30_days": alerts["assessments_due"],
+            "expiring_evidence": alerts["expiring_evidence"]
         },
         "compliance_by_framework": compliance_by_framework
     }
 
 
 @router.get("/metrics/trends")
-async def get_metrics_trends(days: int = 30, db: Session = Depends(get_db)):
-    """Get trend data for the past N days"""
-    start_date = datetime.utcnow() - timedelta(days=days)
-    
-    # Risk trends
-    new_risks = db.query(Risk).filter(Risk.created_at >= start_date).count()
-    closed_risks = db.query(Risk).filter(
-        Risk.status == RiskStatus.CLOSED,
-        Risk.updated_at >= start_date
-    ).count()
-    
-    # Control trends
-    new_controls = db.query(Control).filter(Control.created_at >= start_date).count()
-    
-    # Vendor trends
-    new_vendors = db.query(Vendor).filter(Vendor.created_at >= start_date).count()
-    completed_assessments = db.query(VendorAssessment).filter(
-        VendorAssessment.completion_date >= start_date
-    ).count()
-    
-    # Evidence trends
-    new_evidence = db.query(Evidence).filter(Evidence.created_at >= start_date).count()
+@cached(tags=ALL_TAGS)
+async def get_metrics_trends(
+    days: int = Query(30, ge=1, le=3660),
+    bucket: str = Query("day", pattern="^(day|week)$"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get trend totals and a per-day or per-week series for the past N days"""
+    end_day = datetime.utcnow().date()
+    start_day = end_day - timedelta(days=days - 1)
+    
+    # Served from the daily_metrics rollup; never scans the entity tables
+    series = await db.run_sync(get_trend_series, start_day, end_day, bucket)
+    totals = {metric: sum(point[metric] for point in series) for metric in METRIC_COLUMNS}
     
     return {
         "period_days": days,
-        "start_date": start_date.isoformat(),
+        "start_date": start_day.isoformat(),
+        "bucket": bucket,
         "trends": {
             "risks": {
-                "new": new_risks,
-                "closed": closed_risks,
-                "net_change": new_risks - closed_risks
+                "new": totals["new_risks"],
+                "closed": totals["closed_risks"],
+                "net_change": totals["new_risks"] - totals["closed_risks"]
             },
             "controls": {
-                "new": new_controls
+                "new": totals["new_controls"]
             },
             "vendors": {
-                "new": new_vendors,
-                "assessments_completed": completed_assessments
+                "new": totals["new_vendors"],
+                "assessments_completed": totals["assessments_completed"]
             },
             "evidence": {
-                "new": new_evidence
+                "new": totals["new_evidence"],
+                "verified": totals["verified_evidence"]
             }
-        }
+        },
+        "series": series
     }
 
 
 @router.get("/metrics/kpis")
-async def get_key_performance_indicators(db: Session = Depends(get_db)):
+@cached(tags=ALL_TAGS)
+async def get_key_performance_indicators(db: AsyncSession = Depends(get_async_db)):
     """Get key performance indicators for GRC program"""
     
+    snapshot = await db.run_sync(read_snapshot)
+    
     # Risk KPIs
-    all_risks = db.query(Risk).all()
-    avg_inherent_risk = sum(r.inherent_risk_score or 0 for r in all_risks) / max(len(all_risks), 1)
-    avg_residual_risk = sum(r.residual_risk_score or 0 for r in all_risks) / max(len(all_risks), 1)
+    total_risks = max(snapshot["total_risks"], 1)
+    avg_inherent_risk = snapshot["sum_inherent_risk"] / total_risks
+    avg_residual_risk = snapshot["sum_residual_risk"] / total_risks
     risk_reduction = ((avg_inherent_risk - avg_residual_risk) / max(avg_inherent_risk, 1)) * 100
     
     # Control KPIs
-    total_controls = db.query(Control).count()
-    implemented_controls = db.query(Control).filter(
-        Control.status == ControlStatus.IMPLEMENTED
-    ).count()
+    total_controls = int(snapshot["total_controls"])
+    implemented_controls = int(snapshot["implemented_controls"])
     control_implementation_rate = (implemented_controls / max(total_controls, 1)) * 100
     
-    orchestrated_controls = db.query(Control).filter(
-        Control.system_orchestration_level >= 80
-    ).count()
+    orchestrated_controls = int(snapshot["orchestrated_controls"])
     orchestration_rate = (orchestrated_controls / max(total_controls, 1)) * 100
     
     # Vendor KPIs
-    active_vendors = db.query(Vendor).filter(Vendor.status == VendorStatus.ACTIVE).count()
-    assessed_this_year = db.query(Vendor).filter(
-        Vendor.last_assessment_date >= datetime(datetime.utcnow().year, 1, 1)
-    ).count()
+    active_vendors = int(snapshot["active_vendors"])
+    assessed_this_year = await db.scalar(
+        select(func.count()).where(Vendor.last_assessment_date >= datetime(datetime.utcnow().year, 1, 1))
+    )
     vendor_assessment_rate = (assessed_this_year / max(active_vendors, 1)) * 100
     
     # Compliance KPIs
-    frameworks = db.query(ComplianceFramework).filter(
-        ComplianceFramework.is_active == True
-    ).all()
+    frameworks = await db.run_sync(get_active_frameworks)
     avg_compliance = sum(f.overall_compliance_percentage or 0 for f in frameworks) / max(len(frameworks), 1)
     
     # Evidence KPIs
-    total_evidence = db.query(Evidence).count()
-    verified_evidence = db.query(Evidence).filter(
-        Evidence.status == EvidenceStatus.VERIFIED
-    ).count()
+    total_evidence = int(snapshot["total_evidence"])
+    verified_evidence = int(snapshot["verified_evidence"])
     evidence_verification_rate = (verified_evidence / max(total_evidence, 1)) * 100
     
     # Calculate time savings (estimated)
@@ -223,81 +184,53 @@ async def get_key_performance_indicators(db: Session = Depends(get_db)):
 
 
 @router.get("/action-items")
-async def get_action_items(db: Session = Depends(get_db)):
+@cached(tags=ALL_TAGS)
+async def get_action_items(
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = None,
+    owner: Optional[str] = None,
+    item_type: Optional[List[ActionItemType]] = Query(None, alias="type"),
+    include_total: bool = True,
+    db: AsyncSession = Depends(get_async_db)
+):
     """Get prioritized action items across all GRC areas"""
-    action_items = []
-    
-    # Critical risks
-    critical_risks = db.query(Risk).filter(
-        Risk.status.in_([RiskStatus.OPEN, RiskStatus.IN_PROGRESS]),
-        Risk.inherent_risk_score >= 15
-    ).limit(10).all()
-    
-    for risk in critical_risks:
-        action_items.append({
-            "type": "Risk",
-            "priority": "Critical",
-            "id": risk.risk_id,
-            "title": f"Address critical risk: {risk.title}",
-            "owner": risk.owner,
-            "due_date": risk.mitigation_deadline.isoformat() if risk.mitigation_deadline else None
-        })
-    
-    # Controls needing testing
-    controls_needing_test = db.query(Control).filter(
-        Control.next_test_date <= datetime.utcnow()
-    ).limit(10).all()
-    
-    for control in controls_needing_test:
-        action_items.append({
-            "type": "Control",
-            "priority": "High",
-            "id": control.control_id,
-            "title": f"Test control: {control.title}",
-            "owner": control.owner,
-            "due_date": control.next_test_date.isoformat() if control.next_test_date else None
-        })
-    
-    # Upcoming vendor assessments
-    upcoming_assessments = db.query(Vendor).filter(
-        Vendor.next_assessment_date <= datetime.utcnow() + timedelta(days=30),
-        Vendor.status == VendorStatus.ACTIVE
-    ).limit(10).all()
-    
-    for vendor in upcoming_assessments:
-        action_items.append({
-            "type": "Vendor",
-            "priority": "Medium",
-            "id": vendor.vendor_id,
-            "title": f"Complete vendor assessment: {vendor.name}",
-            "owner": vendor.primary_contact_name,
-            "due_date": vendor.next_assessment_date.isoformat() if vendor.next_assessment_date else None
-        })
-    
-    # Expiring evidence
-    expiring_evidence = db.query(Evidence).filter(
-        Evidence.valid_until <= datetime.utcnow() + timedelta(days=30),
-        Evidence.valid_until >= datetime.utcnow()
-    ).limit(10).all()
-    
-    for evidence in expiring_evidence:
-        action_items.append({
-            "type": "Evidence",
-            "priority": "Medium",
-            "id": evidence.evidence_id,
-            "title": f"Renew evidence: {evidence.title}",
-            "owner": evidence.collected_by,
-            "due_date": evidence.valid_until.isoformat() if evidence.valid_until else None
-        })
-    
-    # Sort by priority and due date
-    priority_order = {"Critical": 0, "High": 1, "Medium": 2, "Low": 3}
-    action_items.sort(key=lambda x: (
-        priority_order.get(x["priority"], 4),
-        x["due_date"] or "9999-12-31"
-    ))
+    # Ordered by priority, then due date, in one query across all sources
+    return await db.run_sync(
+        get_action_items_page,
+        limit=limit,
+        cursor=cursor,
+        owner=owner,
+        item_types=item_type,
+        include_total=include_total
+    )
+
+
+@router.post("/snapshot/rebuild")
+async def rebuild_dashboard_snapshot(db: AsyncSession = Depends(get_async_db)):
+    """Rebuild dashboard snapshot counters from the base tables"""
+    counters = await db.run_sync(rebuild_snapshot)
+    await db.commit()
     
     return {
-        "total_action_items": len(action_items),
-        "action_items": action_items[:50]  # Return top 50
-    }
\ No newline at end of file
+        "success": True,
+        "counters": counters
+    }
+
+
+@router.get("/cache/stats")
+async def get_cache_stats():
+    """Get response cache backend and hit/miss counters"""
+    return await run_in_threadpool(response_cache.stats)
+
+
+@router.get("/stream")
+async def stream_dashboard_updates(request: Request):
+    """Stream dashboard counter changes to the client as server-sent events"""
+    return StreamingResponse(
+        dashboard_event_stream(request),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"  # disable nginx response buffering
+        }
+    )
\ No newline at end of file
@@ -1,24 +1,43 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Response
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Any, Dict, List, Optional
 from datetime import datetime, timedelta
 import hashlib
 import os
 
-from database import get_db
+from database import get_async_db
 from models.evidence import Evidence, EvidenceCollection, EvidenceStatus, EvidenceType, CollectionMethod
 from schemas.evidence import EvidenceCreate, EvidenceResponse
+from services.cache import cached
+from services.conditional import conditional_get
+from services.pagination import PageParams, page_params, paginate, set_page_headers
+from services.serialization import field_params, json_response
+from services.id_allocator import reserve_ids
+from services.statistics import breakdowns
 
 router = APIRouter()
 
+EVIDENCE_SORTS = {
+    "id": Evidence.id,
+    "created_at": Evidence.created_at,
+    "updated_at": Evidence.updated_at,
+    "title": Evidence.title,
+    "valid_until": Evidence.valid_until,
+}
+
 UPLOAD_DIR = "/workspace/grc-command-center/backend/evidence_storage"
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
 
-def generate_evidence_id(db: Session) -> str:
+async def generate_evidence_id() -> str:
     """Generate unique evidence ID"""
-    count = db.query(Evidence).count()
-    return f"EVD-{count + 1:06d}"
+    return (await reserve_ids(Evidence, "EVD", 6))[0]
+
+
+async def generate_collection_id() -> str:
+    """Generate unique evidence collection ID"""
+    return (await reserve_ids(EvidenceCollection, "COLL", 5))[0]
 
 
 def calculate_file_hash(file_content: bytes) -> str:
@@ -27,17 +46,17 @@ def calculate_file_hash(file_content: bytes) -> str:
 
 
 @router.post("/", response_model=EvidenceResponse, status_code=status.HTTP_201_CREATED)
-async def create_evidence(evidence: EvidenceCreate, db: Session = Depends(get_db)):
+async def create_evidence(evidence: EvidenceCreate, db: AsyncSession = Depends(get_async_db)):
     """Create a new evidence record"""
     db_evidence = Evidence(
-        evidence_id=generate_evidence_id(db),
+        evidence_id=await generate_evidence_id(),
         collection_method=CollectionMethod.MANUAL,
         **evidence.dict()
     )
     
     db.add(db_evidence)
-    db.commit()
-    db.refresh(db_evidence)
+    await db.commit()
+    await db.refresh(db_evidence)
     return db_evidence
 
 
@@ -49,7 +68,7 @@ async def upload_evidence(
     evidence_type: EvidenceType = EvidenceType.DOCUMENT,
     control_id: Optional[str] = None,
     framework: Optional[str] = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Upload evidence file"""
     try:
@@ -64,7 +83,7 @@ async def upload_evidence(
         
         # Create evidence record
         evidence = Evidence(
-            evidence_id=generate_evidence_id(db),
+            evidence_id=await generate_evidence_id(),
             title=title or file.filename,
             description=description,
             evidence_type=evidence_type,
@@ -80,8 +99,8 @@ async def upload_evidence(
         )
         
         db.add(evidence)
-        db.commit()
-        db.refresh(evidence)
+        await db.commit()
+        await db.refresh(evidence)
         
         return {
             "success": True,
@@ -94,36 +113,38 @@ async def upload_evidence(
         raise HTTPException(status_code=500, detail=f"Failed to upload evidence: {str(e)}")
 
 
-@router.get("/", response_model=List[EvidenceResponse])
+@router.get("/", response_model=List[EvidenceResponse], dependencies=[Depends(conditional_get("evidence"))])
 async def get_evidence(
-    skip: int = 0,
-    limit: int = 100,
+    response: Response,
+    page: PageParams = Depends(page_params(EVIDENCE_SORTS)),
+    fields: Dict[str, Any] = Depends(field_params(Evidence, EvidenceResponse)),
     evidence_type: Optional[EvidenceType] = None,
     status: Optional[EvidenceStatus] = None,
     control_id: Optional[str] = None,
     framework: Optional[str] = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get all evidence with optional filters"""
-    query = db.query(Evidence)
+    query = select(Evidence)
     
     if evidence_type:
-        query = query.filter(Evidence.evidence_type == evidence_type)
+        query = query.where(Evidence.evidence_type == evidence_type)
     if status:
-        query = query.filter(Evidence.status == status)
+        query = query.where(Evidence.status == status)
     if control_id:
-        query = query.filter(Evidence.control_id == control_id)
+        query = query.where(Evidence.control_id == control_id)
     if framework:
-        query = query.filter(Evidence.framework == framework)
+        query = query.where(Evidence.framework == framework)
     
-    evidence = query.offset(skip).limit(limit).all()
-    return evidence
+    evidence, next_cursor, total = await db.run_sync(paginate, query, Evidence.id, page, fields)
+    set_page_headers(response, next_cursor, total)
+    return json_response(evidence, response)
 
 
-@router.get("/{evidence_id}", response_model=EvidenceResponse)
-async def get_evidence_by_id(evidence_id: str, db: Session = Depends(get_db)):
+@router.get("/{evidence_id}", response_model=EvidenceResponse, dependencies=[Depends(conditional_get("evidence"))])
+async def get_evidence_by_id(evidence_id: str, db: AsyncSession = Depends(get_async_db)):
     """Get specific evidence by ID"""
-    evidence = db.query(Evidence).filter(Evidence.evidence_id == evidence_id).first()
+    evidence = await db.scalar(select(Evidence).where(Evidence.evidence_id == evidence_id))
     if not evidence:
         raise HTTPException(status_code=404, detail="Evidence not found")
     return evidence
@@ -134,10 +155,10 @@ async def verify_evidence(
     evidence_id: str,
     reviewer: str,
     notes: Optional[str] = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Verify evidence"""
-    evidence = db.query(Evidence).filter(Evidence.evidence_id == evidence_id).first()
+    evidence = await db.scalar(select(Evidence).where(Evidence.evidence_id == evidence_id))
     if not evidence:
         raise HTTPException(status_code=404, detail="Evidence not found")
     
@@ -146,7 +167,7 @@ async def verify_evidence(
     evidence.review_date = datetime.utcnow()
     evidence.review_notes = notes
     
-    db.commit()
+    await db.commit()
     
     return {
         "success": True,
@@ -163,14 +184,11 @@ async def create_evidence_collection(
     source_system: str,
     schedule: str,
     collection_params: dict,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create an automated evidence collection job"""
-    count = db.query(EvidenceCollection).count()
-    collection_id = f"COLL-{count + 1:05d}"
-    
     collection = EvidenceCollection(
-        collection_id=collection_id,
+        collection_id=await generate_collection_id(),
         name=name,
         description=description,
         collection_type=collection_type,
@@ -181,8 +199,8 @@ async def create_evidence_collection(
     )
     
     db.add(collection)
-    db.commit()
-    db.refresh(collection)
+    await db.commit()
+    await db.refresh(collection)
     
     return {
         "success": True,
@@ -191,10 +209,10 @@ async def create_evidence_collection(
     }
 
 
-@router.get("/collections/")
-async def get_evidence_collections(db: Session = Depends(get_db)):
+@router.get("/collections/", dependencies=[Depends(conditional_get("evidence"))])
+async def get_evidence_collections(db: AsyncSession = Depends(get_async_db)):
     """Get all evidence collection jobs"""
-    collections = db.query(EvidenceCollection).all()
+    collections = (await db.scalars(select(EvidenceCollection))).all()
     return [
         {
             "collection_id": c.collection_id,
@@ -212,38 +230,29 @@ async def get_evidence_collections(db: Session = Depends(get_db)):
 
 
 @router.get("/analytics/summary")
-async def get_evidence_summary(db: Session = Depends(get_db)):
+@cached(tags=["evidence"])
+async def get_evidence_summary(db: AsyncSession = Depends(get_async_db)):
     """Get evidence collection summary"""
-    total_evidence = db.query(Evidence).count()
-    
-    by_status = {}
-    for status in EvidenceStatus:
-        count = db.query(Evidence).filter(Evidence.status == status).count()
-        by_status[status.value] = count
-    
-    by_type = {}
-    for etype in EvidenceType:
-        count = db.query(Evidence).filter(Evidence.evidence_type == etype).count()
-        by_type[etype.value] = count
+    # Total, status, type and framework breakdowns from one grouped query;
+    # evidence without a framework only counts towards the total
+    counts = await db.run_sync(
+        breakdowns,
+        Evidence,
+        {"status": Evidence.status, "type": Evidence.evidence_type, "framework": Evidence.framework}
+    )
     
     # Expiring evidence (next 30 days)
-    expiring_soon = db.query(Evidence).filter(
-        Evidence.valid_until <= datetime.utcnow() + timedelta(days=30),
-        Evidence.valid_until >= datetime.utcnow()
-    ).count()
-    
-    # Evidence by framework
-    frameworks = db.query(Evidence.framework).distinct().all()
-    by_framework = {}
-    for (framework,) in frameworks:
-        if framework:
-            count = db.query(Evidence).filter(Evidence.framework == framework).count()
-            by_framework[framework] = count
+    expiring_soon = await db.scalar(
+        select(func.count()).where(
+            Evidence.valid_until <= datetime.utcnow() + timedelta(days=30),
+            Evidence.valid_until >= datetime.utcnow()
+        )
+    )
     
     return {
-        "total_evidence": total_evidence,
-        "by_status": by_status,
-        "by_type": by_type,
+        "total_evidence": counts["total"],
+        "by_status": counts["by_status"],
+        "by_type": counts["by_type"],
         "expiring_within_30_days": expiring_soon,
-        "by_framework": by_framework
+        "by_framework": counts["by_framework"]
     }
\ No newline at end of file
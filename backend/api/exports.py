@@ -0,0 +1,29 @@
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+
+from services.columnar_export import EXPORT_MODELS, describe_datasets, stream_columnar_export
+
+router = APIRouter()
+
+
+@router.get("/")
+async def list_export_datasets():
+    """List the tables available for columnar export and their column types"""
+    return describe_datasets()
+
+
+@router.get("/{dataset}")
+async def export_dataset(
+    dataset: str,
+    file_format: str = Query("parquet", alias="format", pattern="^(parquet|arrow)$")
+):
+    """Export a whole table as Parquet or an Arrow IPC stream, batch by batch"""
+    if dataset not in EXPORT_MODELS:
+        raise HTTPException(status_code=404, detail="Dataset not found")
+
+    media_type, filename, body = stream_columnar_export(dataset, file_format)
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f"attachment; filename={filename}"}
+    )
@@ -1,14 +1,18 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional, List
 import boto3
 from jira import JIRA
 import httpx
 
-from database import get_db
+from database import get_async_db
 from config import settings
 from models.risk import Risk, RiskCategory, RiskLikelihood, RiskImpact
 from models.evidence import Evidence, EvidenceType, CollectionMethod, EvidenceStatus
+from services.id_allocator import reserve_ids
+from services.risk_scoring import get_scoring_model, score_risk
 from datetime import datetime
 
 router = APIRouter()
@@ -35,7 +39,9 @@ async def get_aws_security_hub_findings(
         if severity:
             filters['SeverityLabel'] = [{'Value': severity, 'Comparison': 'EQUALS'}]
         
-        response = client.get_findings(
+        # SDK calls block, so they run in the threadpool rather than on the event loop
+        response = await run_in_threadpool(
+            client.get_findings,
             Filters=filters,
             MaxResults=limit
         )
@@ -65,7 +71,7 @@ async def get_aws_security_hub_findings(
 @router.post("/aws/security-hub/import-risks")
 async def import_aws_findings_as_risks(
     severity_filter: Optional[str] = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Import AWS Security Hub findings as risks"""
     try:
@@ -83,10 +89,11 @@ async def import_aws_findings_as_risks(
         if severity_filter:
             filters['SeverityLabel'] = [{'Value': severity_filter, 'Comparison': 'EQUALS'}]
         
-        response = client.get_findings(Filters=filters, MaxResults=100)
+        response = await run_in_threadpool(client.get_findings, Filters=filters, MaxResults=100)
         findings = response.get('Findings', [])
         
         imported_count = 0
+        scoring_model = await db.run_sync(get_scoring_model)
         for finding in findings:
             severity = finding.get('Severity', {}).get('Label', 'MEDIUM')
             
@@ -102,12 +109,13 @@ async def import_aws_findings_as_risks(
             
             # Check if risk already exists
             aws_id = finding.get('Id')
-            existing_risk = db.query(Risk).filter(Risk.custom_fields.contains({"aws_finding_id": aws_id})).first()
+            existing_risk = await db.scalar(
+                select(Risk).where(Risk.custom_fields.contains({"aws_finding_id": aws_id}))
+            )
             
             if not existing_risk:
-                count = db.query(Risk).count()
                 risk = Risk(
-                    risk_id=f"AWS-{count + 1:05d}",
+                    risk_id=(await reserve_ids(Risk, "AWS", 5))[0],
                     title=finding.get('Title', 'AWS Security Finding'),
                     description=finding.get('Description'),
                     category=RiskCategory.TECHNOLOGY,
@@ -116,13 +124,12 @@ async def import_aws_findings_as_risks(
                     threat_source="AWS Security Hub",
                     custom_fields={"aws_finding_id": aws_id, "aws_severity": severity}
                 )
-                risk.calculate_inherent_risk()
-                risk.residual_risk_score = risk.inherent_risk_score
+                await db.run_sync(score_risk, risk, scoring_model)
                 
                 db.add(risk)
                 imported_count += 1
         
-        db.commit()
+        await db.commit()
         
         return {
             "success": True,
@@ -140,13 +147,14 @@ async def get_jira_issues(project: Optional[str] = None):
         if not settings.JIRA_URL or not settings.JIRA_API_TOKEN:
             raise HTTPException(status_code=400, detail="Jira credentials not configured")
         
-        jira = JIRA(
+        jira = await run_in_threadpool(
+            JIRA,
             server=settings.JIRA_URL,
             basic_auth=(settings.JIRA_USERNAME, settings.JIRA_API_TOKEN)
         )
         
         jql = f"project = {project}" if project else "labels = 'grc' OR labels = 'compliance' OR labels = 'security'"
-        issues = jira.search_issues(jql, maxResults=100)
+        issues = await run_in_threadpool(jira.search_issues, jql, maxResults=100)
         
         return {
             "success": True,
@@ -180,7 +188,8 @@ async def create_jira_issue(
         if not settings.JIRA_URL or not settings.JIRA_API_TOKEN:
             raise HTTPException(status_code=400, detail="Jira credentials not configured")
         
-        jira = JIRA(
+        jira = await run_in_threadpool(
+            JIRA,
             server=settings.JIRA_URL,
             basic_auth=(settings.JIRA_USERNAME, settings.JIRA_API_TOKEN)
         )
@@ -193,7 +202,7 @@ async def create_jira_issue(
             'labels': labels
         }
         
-        new_issue = jira.create_issue(fields=issue_dict)
+        new_issue = await run_in_threadpool(jira.create_issue, fields=issue_dict)
         
         return {
             "success": True,
@@ -312,7 +321,7 @@ async def check_integrations_health():
                 aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
                 region_name=settings.AWS_REGION
             )
-            client.get_caller_identity()
+            await run_in_threadpool(client.get_caller_identity)
             health_status["aws"]["status"] = "healthy"
         except:
             health_status["aws"]["status"] = "error"
@@ -320,11 +329,12 @@ async def check_integrations_health():
     # Test Jira
     if health_status["jira"]["configured"]:
         try:
-            jira = JIRA(
+            jira = await run_in_threadpool(
+                JIRA,
                 server=settings.JIRA_URL,
                 basic_auth=(settings.JIRA_USERNAME, settings.JIRA_API_TOKEN)
             )
-            jira.myself()
+            await run_in_threadpool(jira.myself)
             health_status["jira"]["status"] = "healthy"
         except:
             health_status["jira"]["status"] = "error"
@@ -0,0 +1,83 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import settings
+from database import get_async_db
+from models.risk import Risk
+from models.risk_quantification import RiskQuantification
+from schemas.risk import RiskQuantificationBase, RiskQuantificationResponse
+from services.risk_quant import loss_parameters, simulate_risk, simulate_portfolio, load_portfolio_inputs
+
+router = APIRouter()
+
+ITERATIONS = Query(settings.QUANT_DEFAULT_ITERATIONS, ge=1000, le=10_000_000)
+
+
+async def _get_quantification(db: AsyncSession, risk_id: str) -> RiskQuantification:
+    quantification = await db.scalar(
+        select(RiskQuantification)
+        .join(Risk, Risk.id == RiskQuantification.risk_id)
+        .where(Risk.risk_id == risk_id)
+    )
+    if not quantification:
+        raise HTTPException(status_code=404, detail="Risk quantification not found")
+    return quantification
+
+
+@router.get("/risks/{risk_id}", response_model=RiskQuantificationResponse)
+async def get_risk_quantification(risk_id: str, db: AsyncSession = Depends(get_async_db)):
+    """Get a risk's loss frequency and magnitude estimates"""
+    return await _get_quantification(db, risk_id)
+
+
+@router.put("/risks/{risk_id}", response_model=RiskQuantificationResponse)
+async def set_risk_quantification(
+    risk_id: str,
+    data: RiskQuantificationBase,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Create or replace a risk's loss frequency and magnitude estimates"""
+    risk = await db.scalar(select(Risk).where(Risk.risk_id == risk_id))
+    if not risk:
+        raise HTTPException(status_code=404, detail="Risk not found")
+
+    quantification = await db.scalar(
+        select(RiskQuantification).where(RiskQuantification.risk_id == risk.id)
+    )
+    if not quantification:
+        quantification = RiskQuantification(risk_id=risk.id)
+        db.add(quantification)
+    for field, value in data.dict().items():
+        setattr(quantification, field, value)
+
+    await db.commit()
+    await db.refresh(quantification)
+    return quantification
+
+
+@router.post("/risks/{risk_id}/simulate")
+async def simulate_risk_losses(
+    risk_id: str,
+    iterations: int = ITERATIONS,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Simulate a risk's annual losses: expected loss, percentiles and loss exceedance curve"""
+    quantification = await _get_quantification(db, risk_id)
+    summary = await run_in_threadpool(
+        simulate_risk, risk_id, loss_parameters(quantification), iterations
+    )
+    return {"risk_id": risk_id, "currency": quantification.currency, **summary}
+
+
+@router.post("/portfolio")
+async def simulate_portfolio_losses(
+    iterations: int = ITERATIONS,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Simulate aggregate annual losses and VaR across all open quantified risks"""
+    inputs = await db.run_sync(load_portfolio_inputs)
+    if not inputs:
+        raise HTTPException(status_code=404, detail="No quantified open risks")
+    return await run_in_threadpool(simulate_portfolio, inputs, iterations)
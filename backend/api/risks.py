@@ -1,202 +1,244 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, Query, status, UploadFile, File, Response
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import StreamingResponse
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Any, Dict, List, Optional
 from datetime import datetime
-import pandas as pd
-import io
 import json
 
-from database import get_db
-from models.risk import Risk, RiskCategory, RiskStatus, RiskLikelihood, RiskImpact
+from database import get_async_db
+from models.risk import Risk, RiskCategory, RiskStatus
+from models.control import Control
+from models.control_link import RiskControlLink
 from schemas.risk import (
     RiskCreate, RiskUpdate, RiskResponse, RiskHeatmapData, 
-    RiskImportData, RiskExportFilter
+    RiskImportData, RiskExportFilter, RiskScoringMethodUpdate, RiskScoringMethodResponse
 )
+from schemas.batch import RiskBatchUpdate
+from schemas.control import ControlResponse
+from services.cache import cached
+from services.risk_metrics import get_risk_score_summary, aggregate_risk_heatmap, risk_filters
+from services.conditional import conditional_get
+from services.pagination import PageParams, page_params, paginate, set_page_headers
+from services.serialization import field_params, json_response, project
+from services.change_history import as_of_param, history_page
+from services.id_allocator import reserve_ids
+from services.risk_import import import_risks
+from services.risk_export import stream_risk_export
+from services.statistics import breakdowns
+from services.batch_updates import patch_risks
+from services.risk_scoring import score_risk, get_scoring_model, save_scoring_method, run_rescore
 
 router = APIRouter()
 
+RISK_SORTS = {
+    "id": Risk.id,
+    "created_at": Risk.created_at,
+    "updated_at": Risk.updated_at,
+    "title": Risk.title,
+    "inherent_risk_score": Risk.inherent_risk_score,
+    "residual_risk_score": Risk.residual_risk_score,
+}
 
-def generate_risk_id(db: Session) -> str:
+
+async def generate_risk_id() -> str:
     """Generate unique risk ID"""
-    count = db.query(Risk).count()
-    return f"RISK-{count + 1:05d}"
+    return (await reserve_ids(Risk, "RISK", 5))[0]
 
 
 @router.post("/", response_model=RiskResponse, status_code=status.HTTP_201_CREATED)
-async def create_risk(risk: RiskCreate, db: Session = Depends(get_db)):
+async def create_risk(risk: RiskCreate, db: AsyncSession = Depends(get_async_db)):
     """Create a new risk entry"""
     db_risk = Risk(
-        risk_id=generate_risk_id(db),
+        risk_id=await generate_risk_id(),
         **risk.dict()
     )
-    db_risk.calculate_inherent_risk()
-    db_risk.residual_risk_score = db_risk.inherent_risk_score
+    await db.run_sync(score_risk, db_risk)
     
     db.add(db_risk)
-    db.commit()
-    db.refresh(db_risk)
+    await db.commit()
+    await db.refresh(db_risk)
     return db_risk
 
 
-@router.get("/", response_model=List[RiskResponse])
+@router.get("/", response_model=List[RiskResponse], dependencies=[Depends(conditional_get("risks"))])
 async def get_risks(
-    skip: int = 0,
-    limit: int = 100,
+    response: Response,
+    page: PageParams = Depends(page_params(RISK_SORTS)),
+    fields: Dict[str, Any] = Depends(field_params(Risk, RiskResponse)),
     category: Optional[RiskCategory] = None,
     status: Optional[RiskStatus] = None,
-    db: Session = Depends(get_db)
+    as_of: Optional[datetime] = Depends(as_of_param),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Get all risks with optional filters"""
-    query = db.query(Risk)
+    """Get all risks with optional filters, now or as of a past time"""
+    if as_of:
+        risks, total = await db.run_sync(
+            history_page, Risk, as_of, {"category": category, "status": status}, page
+        )
+        set_page_headers(response, None, total)
+        return json_response(project(risks, fields), response)
+    
+    query = select(Risk)
     
     if category:
-        query = query.filter(Risk.category == category)
+        query = query.where(Risk.category == category)
     if status:
-        query = query.filter(Risk.status == status)
+        query = query.where(Risk.status == status)
     
-    risks = query.offset(skip).limit(limit).all()
-    return risks
+    risks, next_cursor, total = await db.run_sync(paginate, query, Risk.id, page, fields)
+    set_page_headers(response, next_cursor, total)
+    return json_response(risks, response)
 
 
-@router.get("/{risk_id}", response_model=RiskResponse)
-async def get_risk(risk_id: str, db: Session = Depends(get_db)):
+@router.get("/{risk_id}", response_model=RiskResponse, dependencies=[Depends(conditional_get("risks"))])
+async def get_risk(risk_id: str, db: AsyncSession = Depends(get_async_db)):
     """Get a specific risk by ID"""
-    risk = db.query(Risk).filter(Risk.risk_id == risk_id).first()
+    risk = await db.scalar(select(Risk).where(Risk.risk_id == risk_id))
     if not risk:
         raise HTTPException(status_code=404, detail="Risk not found")
     return risk
 
 
+@router.get("/{risk_id}/controls", response_model=List[ControlResponse], dependencies=[Depends(conditional_get("risks", "controls"))])
+async def get_risk_controls(risk_id: str, db: AsyncSession = Depends(get_async_db)):
+    """Get the controls mitigating a risk"""
+    risk = await db.scalar(select(Risk).where(Risk.risk_id == risk_id))
+    if not risk:
+        raise HTTPException(status_code=404, detail="Risk not found")
+    
+    controls = (await db.scalars(
+        select(Control)
+        .join(RiskControlLink, RiskControlLink.control_id == Control.id)
+        .where(RiskControlLink.risk_id == risk.id)
+        .order_by(Control.id)
+    )).all()
+    return controls
+
+
 @router.put("/{risk_id}", response_model=RiskResponse)
-async def update_risk(risk_id: str, risk_update: RiskUpdate, db: Session = Depends(get_db)):
+async def update_risk(risk_id: str, risk_update: RiskUpdate, db: AsyncSession = Depends(get_async_db)):
     """Update a risk"""
-    db_risk = db.query(Risk).filter(Risk.risk_id == risk_id).first()
+    db_risk = await db.scalar(select(Risk).where(Risk.risk_id == risk_id))
     if not db_risk:
         raise HTTPException(status_code=404, detail="Risk not found")
     
     update_data = risk_update.dict(exclude_unset=True)
     for field, value in update_data.items():
-        setattr(db_risk, field, value)
+        if field == "status":
+            db_risk.set_status(value)
+        else:
+            setattr(db_risk, field, value)
     
-    # Recalculate risk score if likelihood or impact changed
-    if 'likelihood' in update_data or 'impact' in update_data:
-        db_risk.calculate_inherent_risk()
+    # Recalculate risk scores if likelihood, impact or linked controls changed;
+    # an explicitly supplied residual score still wins
+    if update_data.keys() & {'likelihood', 'impact', 'control_ids'}:
+        await db.run_sync(score_risk, db_risk)
+        if 'residual_risk_score' in update_data:
+            db_risk.residual_risk_score = update_data['residual_risk_score']
     
     db_risk.updated_at = datetime.utcnow()
-    db.commit()
-    db.refresh(db_risk)
+    await db.commit()
+    await db.refresh(db_risk)
     return db_risk
 
 
+@router.patch("/batch")
+async def batch_update_risks(batch: RiskBatchUpdate, db: AsyncSession = Depends(get_async_db)):
+    """Apply one patch to many risks, by ID list or filter, in a single transaction"""
+    filters = []
+    if batch.filter:
+        filters = risk_filters(db, batch.filter.category, batch.filter.owner, batch.filter.tags)
+        if batch.filter.status:
+            filters.append(Risk.status == batch.filter.status)
+    result = await db.run_sync(patch_risks, batch.ids, filters, batch.patch.dict(exclude_unset=True))
+    await db.commit()
+    return result
+
+
 @router.delete("/{risk_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_risk(risk_id: str, db: Session = Depends(get_db)):
+async def delete_risk(risk_id: str, db: AsyncSession = Depends(get_async_db)):
     """Delete a risk"""
-    db_risk = db.query(Risk).filter(Risk.risk_id == risk_id).first()
+    db_risk = await db.scalar(select(Risk).where(Risk.risk_id == risk_id))
     if not db_risk:
         raise HTTPException(status_code=404, detail="Risk not found")
     
-    db.delete(db_risk)
-    db.commit()
+    await db.delete(db_risk)
+    await db.commit()
     return None
 
 
 @router.get("/analytics/heatmap", response_model=List[RiskHeatmapData])
-async def get_risk_heatmap(db: Session = Depends(get_db)):
-    """Generate risk heatmap data"""
-    risks = db.query(Risk).filter(Risk.status != RiskStatus.CLOSED).all()
-    
-    heatmap_data = {}
-    for risk in risks:
-        if risk.likelihood and risk.impact:
-            key = (risk.likelihood.value, risk.impact.value)
-            if key not in heatmap_data:
-                heatmap_data[key] = {
-                    "likelihood": risk.likelihood.value,
-                    "impact": risk.impact.value,
-                    "count": 0,
-                    "risk_level": risk.get_risk_level(risk.inherent_risk_score),
-                    "risks": []
-                }
-            heatmap_data[key]["count"] += 1
-            heatmap_data[key]["risks"].append(risk.risk_id)
-    
-    return list(heatmap_data.values())
+@cached(tags=["risks"])
+async def get_risk_heatmap(
+    category: Optional[RiskCategory] = None,
+    owner: Optional[str] = None,
+    tags: Optional[List[str]] = Query(None),
+    score: str = Query("inherent", pattern="^(inherent|residual)$"),
+    risk_ids_limit: Optional[int] = Query(None, ge=0, le=1000),
+    risk_ids_offset: int = Query(0, ge=0),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Generate risk heatmap data for open risks, aggregated per (likelihood, impact) cell"""
+    score_column = Risk.residual_risk_score if score == "residual" else Risk.inherent_risk_score
+    filters = [Risk.status != RiskStatus.CLOSED, *risk_filters(db, category, owner, tags)]
+    return await db.run_sync(
+        aggregate_risk_heatmap, filters, score_column, risk_ids_limit, risk_ids_offset
+    )
 
 
 @router.get("/analytics/statistics")
-async def get_risk_statistics(db: Session = Depends(get_db)):
+@cached(tags=["risks"])
+async def get_risk_statistics(db: AsyncSession = Depends(get_async_db)):
     """Get risk register statistics"""
-    total_risks = db.query(Risk).count()
-    
-    risks_by_status = {}
-    for status in RiskStatus:
-        count = db.query(Risk).filter(Risk.status == status).count()
-        risks_by_status[status.value] = count
-    
-    risks_by_category = {}
-    for category in RiskCategory:
-        count = db.query(Risk).filter(Risk.category == category).count()
-        risks_by_category[category.value] = count
+    # Total and every breakdown from one grouped query
+    counts = await db.run_sync(
+        breakdowns, Risk, {"status": Risk.status, "category": Risk.category}
+    )
     
-    # Risk level distribution
-    all_risks = db.query(Risk).all()
-    risk_levels = {"Critical": 0, "High": 0, "Medium": 0, "Low": 0}
-    for risk in all_risks:
-        if risk.inherent_risk_score:
-            level = risk.get_risk_level(risk.inherent_risk_score)
-            risk_levels[level] += 1
+    # Risk level distribution and averages, aggregated in the database
+    score_summary = await db.run_sync(get_risk_score_summary)
     
     return {
-        "total_risks": total_risks,
-        "by_status": risks_by_status,
-        "by_category": risks_by_category,
-        "by_risk_level": risk_levels,
-        "average_inherent_score": sum(r.inherent_risk_score or 0 for r in all_risks) / max(len(all_risks), 1),
-        "average_residual_score": sum(r.residual_risk_score or 0 for r in all_risks) / max(len(all_risks), 1)
+        "total_risks": counts["total"],
+        "by_status": counts["by_status"],
+        "by_category": counts["by_category"],
+        "by_risk_level": score_summary["by_risk_level"],
+        "average_inherent_score": score_summary["average_inherent_score"],
+        "average_residual_score": score_summary["average_residual_score"]
     }
 
 
+@router.get("/scoring/method", response_model=RiskScoringMethodResponse)
+async def get_scoring_method(db: AsyncSession = Depends(get_async_db)):
+    """Get the active risk scoring methodology"""
+    return (await db.run_sync(get_scoring_model)).as_dict()
+
+
+@router.put("/scoring/method")
+async def update_scoring_method(method: RiskScoringMethodUpdate, db: AsyncSession = Depends(get_async_db)):
+    """Replace the scoring methodology and re-score the whole register with it"""
+    await db.run_sync(save_scoring_method, method.model_dump(mode="json"))
+    await db.commit()
+    
+    result = await run_in_threadpool(run_rescore)
+    return {"success": True, **result}
+
+
+@router.post("/scoring/rescore")
+async def rescore_register():
+    """Re-score every risk with the active methodology and current control effectiveness"""
+    result = await run_in_threadpool(run_rescore)
+    return {"success": True, **result}
+
+
 @router.post("/import/excel")
-async def import_risks_excel(file: UploadFile = File(...), db: Session = Depends(get_db)):
-    """Import risks from Excel file"""
+async def import_risks_excel(file: UploadFile = File(...)):
+    """Import risks from an Excel (.xlsx) or CSV file"""
     try:
-        contents = await file.read()
-        df = pd.read_excel(io.BytesIO(contents))
-        
-        imported_count = 0
-        errors = []
-        
-        for index, row in df.iterrows():
-            try:
-                risk_data = {
-                    "title": row.get("Title"),
-                    "description": row.get("Description"),
-                    "category": RiskCategory[row.get("Category", "OPERATIONAL").upper()],
-                    "likelihood": RiskLikelihood[row.get("Likelihood", "POSSIBLE").upper()],
-                    "impact": RiskImpact[row.get("Impact", "MODERATE").upper()],
-                    "owner": row.get("Owner"),
-                    "threat_source": row.get("Threat Source"),
-                    "vulnerability": row.get("Vulnerability"),
-                    "mitigation_strategy": row.get("Mitigation Strategy")
-                }
-                
-                db_risk = Risk(risk_id=generate_risk_id(db), **risk_data)
-                db_risk.calculate_inherent_risk()
-                db_risk.residual_risk_score = db_risk.inherent_risk_score
-                
-                db.add(db_risk)
-                imported_count += 1
-            except Exception as e:
-                errors.append(f"Row {index + 2}: {str(e)}")
-        
-        db.commit()
-        
-        return {
-            "success": True,
-            "imported_count": imported_count,
-            "errors": errors
-        }
+        # Parsing and bulk inserts are blocking work; keep them off the event loop
+        return await run_in_threadpool(import_risks, file.file, file.filename or "")
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Failed to import file: {str(e)}")
 
@@ -204,55 +246,14 @@ async def import_risks_excel(file: UploadFile = File(...), db: Session = Depends
 @router.post("/export/excel")
 async def export_risks_excel(
     filters: Optional[RiskExportFilter] = None,
-    db: Session = Depends(get_db)
+    file_format: str = Query("xlsx", alias="format", pattern="^(xlsx|csv|ndjson)$")
 ):
-    """Export risks to Excel file"""
-    query = db.query(Risk)
-    
-    if filters:
-        if filters.category:
-            query = query.filter(Risk.category == filters.category)
-        if filters.status:
-            query = query.filter(Risk.status == filters.status)
-        if filters.min_score:
-            query = query.filter(Risk.inherent_risk_score >= filters.min_score)
-        if filters.max_score:
-            query = query.filter(Risk.inherent_risk_score <= filters.max_score)
-    
-    risks = query.all()
-    
-    # Convert to DataFrame
-    data = []
-    for risk in risks:
-        data.append({
-            "Risk ID": risk.risk_id,
-            "Title": risk.title,
-            "Description": risk.description,
-            "Category": risk.category.value if risk.category else None,
-            "Status": risk.status.value if risk.status else None,
-            "Likelihood": risk.likelihood.value if risk.likelihood else None,
-            "Impact": risk.impact.value if risk.impact else None,
-            "Inherent Risk Score": risk.inherent_risk_score,
-            "Residual Risk Score": risk.residual_risk_score,
-            "Risk Level": risk.get_risk_level(risk.inherent_risk_score) if risk.inherent_risk_score else None,
-            "Owner": risk.owner,
-            "Threat Source": risk.threat_source,
-            "Vulnerability": risk.vulnerability,
-            "Mitigation Strategy": risk.mitigation_strategy,
-            "Created At": risk.created_at,
-            "Updated At": risk.updated_at
-        })
-    
-    df = pd.DataFrame(data)
-    
-    # Create Excel file in memory
-    output = io.BytesIO()
-    with pd.ExcelWriter(output, engine='openpyxl') as writer:
-        df.to_excel(writer, index=False, sheet_name='Risk Register')
-    output.seek(0)
+    """Export the risk register as an Excel, CSV or NDJSON file"""
+    media_type, filename, body = stream_risk_export(filters, file_format)
     
+    # Rows are read in batches and written as they arrive; the iterator runs in the threadpool
     return StreamingResponse(
-        output,
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        headers={"Content-Disposition": f"attachment; filename=risk_register_{datetime.now().strftime('%Y%m%d')}.xlsx"}
-    )
\ No newline at end of file
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f"attachment; filename={filename}"}
+    )
@@ -0,0 +1,27 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+
+from database import get_async_db
+from services.cache import cached
+from services.search import SEARCH_TYPES, search
+
+router = APIRouter()
+
+
+@router.get("/")
+@cached(tags=["risks", "controls", "compliance", "evidence"])
+async def search_entities(
+    q: str = Query(..., min_length=1, max_length=200),
+    types: Optional[List[str]] = Query(None),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Full-text search across risks, controls, requirements and evidence"""
+    unknown = sorted(set(types or []) - set(SEARCH_TYPES))
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown type(s): {', '.join(unknown)}")
+
+    results = await db.run_sync(search, q, types, limit, offset)
+    return {"query": q, "count": len(results), "results": results}
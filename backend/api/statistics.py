@@ -0,0 +1,41 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List
+
+from database import get_async_db
+from services.cache import cached
+from services.statistics import STATISTICS_DIMENSIONS, entity_statistics
+
+router = APIRouter()
+
+
+@router.get("/")
+async def list_statistics_dimensions():
+    """List the entities and the dimensions they can be grouped by"""
+    return {
+        entity: list(dimensions)
+        for entity, (_, dimensions) in STATISTICS_DIMENSIONS.items()
+    }
+
+
+@router.get("/{entity}")
+@cached(tags=["risks", "controls", "vendors", "evidence"])
+async def get_entity_statistics(
+    entity: str,
+    by: List[str] = Query(..., description="Dimension, or comma-separated dimensions for a cross-tab; repeatable"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Count an entity grouped by each requested dimension set, in a single query"""
+    if entity not in STATISTICS_DIMENSIONS:
+        raise HTTPException(status_code=404, detail="Entity not found")
+
+    _, dimensions = STATISTICS_DIMENSIONS[entity]
+    groupings = [[name.strip() for name in spec.split(",") if name.strip()] for spec in by]
+    unknown = sorted({name for names in groupings for name in names} - set(dimensions))
+    if unknown or not all(groupings):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown dimension(s): {', '.join(unknown)}" if unknown else "Empty dimension set"
+        )
+
+    return await db.run_sync(entity_statistics, entity, groupings)
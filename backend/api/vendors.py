@@ -1,25 +1,43 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, status, Response
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from typing import Any, Dict, List, Optional
 from datetime import datetime, timedelta
 
-from database import get_db
+from database import get_async_db
 from models.vendor import Vendor, VendorAssessment, VendorQuestionnaire, VendorStatus, VendorRiskLevel, AssessmentStatus
 from schemas.vendor import VendorCreate, VendorUpdate, VendorResponse, VendorAssessmentCreate, VendorAssessmentResponse
+from schemas.batch import VendorBatchUpdate
+from services.cache import cached
+from services.conditional import conditional_get
+from services.batch_updates import patch_vendors
+from services.pagination import PageParams, page_params, paginate, set_page_headers
+from services.serialization import field_params, json_response, project
+from services.change_history import as_of_param, history_page
+from services.id_allocator import reserve_ids
+from services.statistics import breakdowns
 
 router = APIRouter()
 
+VENDOR_SORTS = {
+    "id": Vendor.id,
+    "created_at": Vendor.created_at,
+    "updated_at": Vendor.updated_at,
+    "name": Vendor.name,
+    "risk_score": Vendor.risk_score,
+    "next_assessment_date": Vendor.next_assessment_date,
+}
 
-def generate_vendor_id(db: Session) -> str:
+
+async def generate_vendor_id() -> str:
     """Generate unique vendor ID"""
-    count = db.query(Vendor).count()
-    return f"VND-{count + 1:05d}"
+    return (await reserve_ids(Vendor, "VND", 5))[0]
 
 
-def generate_assessment_id(db: Session) -> str:
+async def generate_assessment_id() -> str:
     """Generate unique assessment ID"""
-    count = db.query(VendorAssessment).count()
-    return f"ASSESS-{count + 1:05d}"
+    return (await reserve_ids(VendorAssessment, "ASSESS", 5))[0]
 
 
 def calculate_vendor_risk_score(vendor: Vendor, assessment: VendorAssessment = None) -> float:
@@ -47,43 +65,53 @@ def calculate_vendor_risk_score(vendor: Vendor, assessment: VendorAssessment = N
 
 
 @router.post("/", response_model=VendorResponse, status_code=status.HTTP_201_CREATED)
-async def create_vendor(vendor: VendorCreate, db: Session = Depends(get_db)):
+async def create_vendor(vendor: VendorCreate, db: AsyncSession = Depends(get_async_db)):
     """Create a new vendor"""
     db_vendor = Vendor(
-        vendor_id=generate_vendor_id(db),
+        vendor_id=await generate_vendor_id(),
         **vendor.dict()
     )
     
     db.add(db_vendor)
-    db.commit()
-    db.refresh(db_vendor)
+    await db.commit()
+    await db.refresh(db_vendor)
     return db_vendor
 
 
-@router.get("/", response_model=List[VendorResponse])
+@router.get("/", response_model=List[VendorResponse], dependencies=[Depends(conditional_get("vendors"))])
 async def get_vendors(
-    skip: int = 0,
-    limit: int = 100,
+    response: Response,
+    page: PageParams = Depends(page_params(VENDOR_SORTS)),
+    fields: Dict[str, Any] = Depends(field_params(Vendor, VendorResponse)),
     status: Optional[VendorStatus] = None,
     risk_level: Optional[VendorRiskLevel] = None,
-    db: Session = Depends(get_db)
+    as_of: Optional[datetime] = Depends(as_of_param),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Get all vendors with optional filters"""
-    query = db.query(Vendor)
+    """Get all vendors with optional filters, now or as of a past time"""
+    if as_of:
+        vendors, total = await db.run_sync(
+            history_page, Vendor, as_of, {"status": status, "risk_level": risk_level}, page
+        )
+        set_page_headers(response, None, total)
+        return json_response(project(vendors, fields), response)
+    
+    query = select(Vendor)
     
     if status:
-        query = query.filter(Vendor.status == status)
+        query = query.where(Vendor.status == status)
     if risk_level:
-        query = query.filter(Vendor.risk_level == risk_level)
+        query = query.where(Vendor.risk_level == risk_level)
     
-    vendors = query.offset(skip).limit(limit).all()
-    return vendors
+    vendors, next_cursor, total = await db.run_sync(paginate, query, Vendor.id, page, fields)
+    set_page_headers(response, next_cursor, total)
+    return json_response(vendors, response)
 
 
-@router.get("/{vendor_id}", response_model=VendorResponse)
-async def get_vendor(vendor_id: str, db: Session = Depends(get_db)):
+@router.get("/{vendor_id}", response_model=VendorResponse, dependencies=[Depends(conditional_get("vendors"))])
+async def get_vendor(vendor_id: str, db: AsyncSession = Depends(get_async_db)):
     """Get a specific vendor by ID"""
-    vendor = db.query(Vendor).filter(Vendor.vendor_id == vendor_id).first()
+    vendor = await db.scalar(select(Vendor).where(Vendor.vendor_id == vendor_id))
     if not vendor:
         raise HTTPException(status_code=404, detail="Vendor not found")
     return vendor
@@ -93,10 +121,10 @@ async def get_vendor(vendor_id: str, db: Session = Depends(get_db)):
 async def update_vendor(
     vendor_id: str,
     vendor_update: VendorUpdate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update a vendor"""
-    db_vendor = db.query(Vendor).filter(Vendor.vendor_id == vendor_id).first()
+    db_vendor = await db.scalar(select(Vendor).where(Vendor.vendor_id == vendor_id))
     if not db_vendor:
         raise HTTPException(status_code=404, detail="Vendor not found")
     
@@ -105,43 +133,57 @@ async def update_vendor(
         setattr(db_vendor, field, value)
     
     db_vendor.updated_at = datetime.utcnow()
-    db.commit()
-    db.refresh(db_vendor)
+    await db.commit()
+    await db.refresh(db_vendor)
     return db_vendor
 
 
+@router.patch("/batch")
+async def batch_update_vendors(batch: VendorBatchUpdate, db: AsyncSession = Depends(get_async_db)):
+    """Apply one patch to many vendors, by ID list or filter, in a single transaction"""
+    filters = []
+    if batch.filter:
+        if batch.filter.status:
+            filters.append(Vendor.status == batch.filter.status)
+        if batch.filter.risk_level:
+            filters.append(Vendor.risk_level == batch.filter.risk_level)
+    result = await db.run_sync(patch_vendors, batch.ids, filters, batch.patch.dict(exclude_unset=True))
+    await db.commit()
+    return result
+
+
 @router.post("/assessments/", response_model=VendorAssessmentResponse, status_code=status.HTTP_201_CREATED)
 async def create_assessment(
     assessment: VendorAssessmentCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create a new vendor assessment"""
-    vendor = db.query(Vendor).filter(Vendor.id == assessment.vendor_id).first()
+    vendor = await db.get(Vendor, assessment.vendor_id)
     if not vendor:
         raise HTTPException(status_code=404, detail="Vendor not found")
     
     db_assessment = VendorAssessment(
-        assessment_id=generate_assessment_id(db),
+        assessment_id=await generate_assessment_id(),
         start_date=datetime.utcnow(),
         **assessment.dict()
     )
     
     db.add(db_assessment)
-    db.commit()
-    db.refresh(db_assessment)
+    await db.commit()
+    await db.refresh(db_assessment)
     return db_assessment
 
 
-@router.get("/assessments/{vendor_id}", response_model=List[VendorAssessmentResponse])
-async def get_vendor_assessments(vendor_id: str, db: Session = Depends(get_db)):
+@router.get("/assessments/{vendor_id}", response_model=List[VendorAssessmentResponse], dependencies=[Depends(conditional_get("vendors"))])
+async def get_vendor_assessments(vendor_id: str, db: AsyncSession = Depends(get_async_db)):
     """Get all assessments for a vendor"""
-    vendor = db.query(Vendor).filter(Vendor.vendor_id == vendor_id).first()
+    vendor = await db.scalar(select(Vendor).where(Vendor.vendor_id == vendor_id))
     if not vendor:
         raise HTTPException(status_code=404, detail="Vendor not found")
     
-    assessments = db.query(VendorAssessment).filter(
-        VendorAssessment.vendor_id == vendor.id
-    ).all()
+    assessments = (await db.scalars(
+        select(VendorAssessment).where(VendorAssessment.vendor_id == vendor.id)
+    )).all()
     
     return assessments
 
@@ -150,12 +192,14 @@ async def get_vendor_assessments(vendor_id: str, db: Session = Depends(get_db)):
 async def complete_assessment(
     assessment_id: str,
     scores: dict,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Complete a vendor assessment with scores"""
-    assessment = db.query(VendorAssessment).filter(
-        VendorAssessment.assessment_id == assessment_id
-    ).first()
+    assessment = await db.scalar(
+        select(VendorAssessment)
+        .where(VendorAssessment.assessment_id == assessment_id)
+        .options(selectinload(VendorAssessment.vendor))
+    )
     if not assessment:
         raise HTTPException(status_code=404, detail="Assessment not found")
     
@@ -191,7 +235,7 @@ async def complete_assessment(
     vendor.last_assessment_date = datetime.utcnow()
     vendor.next_assessment_date = datetime.utcnow() + timedelta(days=vendor.assessment_frequency_days)
     
-    db.commit()
+    await db.commit()
     
     return {
         "success": True,
@@ -202,32 +246,35 @@ async def complete_assessment(
 
 
 @router.get("/analytics/risk-distribution")
-async def get_vendor_risk_distribution(db: Session = Depends(get_db)):
+@cached(tags=["vendors"])
+async def get_vendor_risk_distribution(db: AsyncSession = Depends(get_async_db)):
     """Get vendor risk distribution analytics"""
-    total_vendors = db.query(Vendor).filter(Vendor.status == VendorStatus.ACTIVE).count()
-    
-    risk_distribution = {}
-    for risk_level in VendorRiskLevel:
-        count = db.query(Vendor).filter(
-            Vendor.status == VendorStatus.ACTIVE,
-            Vendor.risk_level == risk_level
-        ).count()
-        risk_distribution[risk_level.value] = {
+    counts = await db.run_sync(
+        breakdowns, Vendor, {"risk_level": Vendor.risk_level}, [Vendor.status == VendorStatus.ACTIVE]
+    )
+    total_vendors = counts["total"]
+    
+    risk_distribution = {
+        risk_level: {
             "count": count,
             "percentage": (count / total_vendors * 100) if total_vendors > 0 else 0
         }
+        for risk_level, count in counts["by_risk_level"].items()
+    }
     
     # Upcoming assessments
-    upcoming_assessments = db.query(Vendor).filter(
-        Vendor.next_assessment_date <= datetime.utcnow() + timedelta(days=30),
-        Vendor.status == VendorStatus.ACTIVE
-    ).count()
+    upcoming_assessments = await db.scalar(
+        select(func.count()).where(
+            Vendor.next_assessment_date <= datetime.utcnow() + timedelta(days=30),
+            Vendor.status == VendorStatus.ACTIVE
+        )
+    )
     
     # Total assessments completed this year
     year_start = datetime(datetime.utcnow().year, 1, 1)
-    assessments_this_year = db.query(VendorAssessment).filter(
-        VendorAssessment.completion_date >= year_start
-    ).count()
+    assessments_this_year = await db.scalar(
+        select(func.count()).where(VendorAssessment.completion_date >= year_start)
+    )
     
     return {
         "total_active_vendors": total_vendors,
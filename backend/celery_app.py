@@ -0,0 +1,11 @@
+from celery import Celery
+from config import settings
+
+# Workers: celery -A celery_app worker --loglevel=info
+celery_app = Celery("grc", broker=settings.REDIS_URL, include=["services.session_hooks", "services.control_testing"])
+celery_app.conf.update(
+    task_acks_late=True,  # a run whose worker dies is redelivered, not lost
+    worker_prefetch_multiplier=1,
+    task_ignore_result=True,
+    timezone="UTC",
+)
@@ -48,12 +48,36 @@ class Settings(BaseSettings):
     # Redis (for caching and Celery)
     REDIS_URL: str = "redis://localhost:6379/0"
     
+    # Response cache
+    CACHE_ENABLED: bool = True
+    CACHE_DEFAULT_TTL_SECONDS: int = 60
+    CACHE_LOCAL_MAX_ENTRIES: int = 1024
+    
+    # Background jobs
+    SCHEDULER_ENABLED: bool = True
+    METRICS_ROLLUP_INTERVAL_MINUTES: int = 15
+    CHANGE_CHECKPOINT_INTERVAL_HOURS: int = 24
+    # Checkpoints stop this far behind now so transactions still open are not missed
+    CHANGE_CHECKPOINT_LAG_MINUTES: int = 10
+    CONTROL_TEST_DISPATCH_INTERVAL_MINUTES: int = 5
+    # Due controls queued per dispatch pass; the rest wait for the next pass
+    CONTROL_TEST_DISPATCH_BATCH: int = 500
+    
+    # Quantitative risk simulation
+    QUANT_DEFAULT_ITERATIONS: int = 1_000_000
+    QUANT_WORKERS: int = 0  # 0 = one process per CPU
+    QUANT_CACHE_TTL_SECONDS: int = 86400
+    
     @property
     def database_url(self) -> str:
         if self.DATABASE_TYPE == "postgresql":
             return f"postgresql://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}@{self.POSTGRES_HOST}:{self.POSTGRES_PORT}/{self.POSTGRES_DB}"
         return self.MONGODB_URL
     
+    @property
+    def async_database_url(self) -> str:
+        return f"postgresql+asyncpg://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}@{self.POSTGRES_HOST}:{self.POSTGRES_PORT}/{self.POSTGRES_DB}"
+    
     class Config:
         env_file = ".env"
         case_sensitive = True
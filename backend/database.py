@@ -1,14 +1,18 @@
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from config import settings
+import orjson
 
-# PostgreSQL setup
+# PostgreSQL setup (sync: scripts, scheduled jobs and startup). JSON columns
+# are decoded with orjson; list endpoints read thousands of them per page.
 engine = create_engine(
     settings.database_url,
     pool_pre_ping=True,
     pool_size=10,
-    max_overflow=20
+    max_overflow=20,
+    json_deserializer=orjson.loads
 )
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -25,6 +29,32 @@ def get_db():
         db.close()
 
 
+# Async PostgreSQL setup (asyncpg) used by request handlers
+async_engine = create_async_engine(
+    settings.async_database_url,
+    pool_pre_ping=True,
+    pool_size=10,
+    max_overflow=20,
+    json_deserializer=orjson.loads
+)
+
+# Async sessions wrap SessionLocal's session class, so the flush and commit
+# listeners registered on SessionLocal run for them too. Attributes are not
+# expired on commit because they cannot be lazily reloaded outside an await.
+AsyncSessionLocal = async_sessionmaker(
+    async_engine,
+    sync_session_class=SessionLocal.class_,
+    autoflush=False,
+    expire_on_commit=False
+)
+
+
+async def get_async_db():
+    """Dependency for getting an async database session"""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
 # MongoDB setup (alternative)
 from pymongo import MongoClient
 
@@ -5,9 +5,20 @@ from contextlib import asynccontextmanager
 import logging
 from datetime import datetime
 
-from api import risks, controls, compliance, vendors, evidence, integrations, dashboard
-from database import engine, Base
+import services.session_hooks  # noqa: F401  first, so the hooks register in order
+from api import risks, controls, compliance, vendors, evidence, integrations, dashboard, exports, statistics, quantification, search
+from database import engine, async_engine, Base, SessionLocal
 from config import settings
+from services.scheduler import start_scheduler, shutdown_scheduler
+from services.live_updates import broadcaster
+from services.id_allocator import resync_id_sequences
+from services.risk_quant import shutdown_simulation_pool
+from services.search import ensure_search_indexes
+from services.control_links import ensure_control_links
+from services.change_history import ensure_history_baseline
+from services.control_testing import ensure_test_schedule
+from services.schema_upgrades import ensure_schema_upgrades
+from services.metrics_rollup import rollup_missing_days
 
 # Configure logging
 logging.basicConfig(
@@ -23,10 +34,33 @@ async def lifespan(app: FastAPI):
     # Startup
     logger.info("Starting GRC Command Center...")
     Base.metadata.create_all(bind=engine)
+    ensure_schema_upgrades(engine)
+    ensure_search_indexes(engine)
     logger.info("Database tables created successfully")
+    with SessionLocal() as db:
+        # Keep ID series ahead of rows inserted by scripts while the API was down
+        resync_id_sequences(db)
+        # Fill the control link tables from the JSON lists on first start
+        if ensure_control_links(db):
+            logger.info("Control link tables backfilled")
+        # Change history starts with a checkpoint of the current state
+        ensure_history_baseline(db)
+        # Controls given a test frequency before scheduling existed get a due date
+        ensure_test_schedule(db)
+        # Trend rollups for days missed while the API was down, or all history on first start
+        rollup_missing_days(db)
+        db.commit()
+    if settings.SCHEDULER_ENABLED:
+        start_scheduler()
+        logger.info("Background scheduler started")
+    await broadcaster.start()
     yield
     # Shutdown
     logger.info("Shutting down GRC Command Center...")
+    shutdown_scheduler()
+    await broadcaster.stop()
+    shutdown_simulation_pool()
+    await async_engine.dispose()
 
 
 app = FastAPI(
@@ -43,6 +77,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor", "X-Total-Count"],
 )
 
 
@@ -64,6 +99,10 @@ app.include_router(vendors.router, prefix="/api/vendors", tags=["Vendor Risk"])
 app.include_router(evidence.router, prefix="/api/evidence", tags=["Evidence"])
 app.include_router(integrations.router, prefix="/api/integrations", tags=["Integrations"])
 app.include_router(dashboard.router, prefix="/api/dashboard", tags=["Dashboard"])
+app.include_router(exports.router, prefix="/api/exports", tags=["Exports"])
+app.include_router(statistics.router, prefix="/api/statistics", tags=["Statistics"])
+app.include_router(quantification.router, prefix="/api/quantification", tags=["Risk Quantification"])
+app.include_router(search.router, prefix="/api/search", tags=["Search"])
 
 
 @app.get("/")
@@ -3,6 +3,14 @@ from .control import Control, ControlFramework, ControlMapping
 from .vendor import Vendor, VendorAssessment, VendorQuestionnaire
 from .evidence import Evidence, EvidenceCollection
 from .compliance import ComplianceFramework, ComplianceRequirement, ComplianceStatus
+from .dashboard import DashboardSnapshot, DailyMetrics
+from .entity_version import EntityVersion
+from .id_sequence import IdSequence
+from .risk_scoring import RiskScoringMethod
+from .risk_quantification import RiskQuantification
+from .control_link import RiskControlLink, RequirementControlLink
+from .change_history import ChangeEvent, ChangeCheckpoint, ChangeCheckpointRow
+from .control_test import ControlTestRun, ControlTestResult
 
 __all__ = [
     "Risk",
@@ -18,4 +26,17 @@ __all__ = [
     "ComplianceFramework",
     "ComplianceRequirement",
     "ComplianceStatus",
-]
\ No newline at end of file
+    "DashboardSnapshot",
+    "DailyMetrics",
+    "EntityVersion",
+    "IdSequence",
+    "RiskScoringMethod",
+    "RiskQuantification",
+    "RiskControlLink",
+    "RequirementControlLink",
+    "ChangeEvent",
+    "ChangeCheckpoint",
+    "ChangeCheckpointRow",
+    "ControlTestRun",
+    "ControlTestResult",
+]
@@ -0,0 +1,46 @@
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, JSON, ForeignKey, Index
+from datetime import datetime
+from database import Base
+
+# SQLite only auto-increments INTEGER primary keys
+EventId = BigInteger().with_variant(Integer, "sqlite")
+
+
+class ChangeEvent(Base):
+    """One write to a tracked row: the full row on insert, changed fields only on update"""
+    __tablename__ = "change_events"
+    __table_args__ = (
+        # Replay after a checkpoint scans one entity's events in id order
+        Index("ix_change_events_entity_id", "entity", "id"),
+        Index("ix_change_events_entity_row", "entity", "entity_id", "id"),
+    )
+
+    id = Column(EventId, primary_key=True)
+    entity = Column(String(50), nullable=False)  # Table name, e.g. "risks"
+    entity_id = Column(Integer, nullable=False)  # Primary key of the changed row
+    operation = Column(String(10), nullable=False)  # insert, update or delete
+    changes = Column(JSON)  # Field -> new value
+    changed_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+
+class ChangeCheckpoint(Base):
+    """Full state of an entity's rows as of a point in time, for replaying history from"""
+    __tablename__ = "change_checkpoints"
+    __table_args__ = (
+        Index("ix_change_checkpoints_entity_as_of", "entity", "as_of"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    entity = Column(String(50), nullable=False)
+    as_of = Column(DateTime, nullable=False)
+    last_event_id = Column(EventId, nullable=False, default=0)  # Events up to here are included
+    row_count = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class ChangeCheckpointRow(Base):
+    __tablename__ = "change_checkpoint_rows"
+
+    checkpoint_id = Column(Integer, ForeignKey("change_checkpoints.id", ondelete="CASCADE"), primary_key=True)
+    entity_id = Column(Integer, primary_key=True)
+    state = Column(JSON, nullable=False)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, Enum, ForeignKey, JSON, Boolean, Table
+from sqlalchemy import Column, Integer, String, DateTime, Text, Enum, ForeignKey, JSON, Boolean, Table, Index, text
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
@@ -35,6 +35,14 @@ class ControlFramework(Base):
 
 class Control(Base):
     __tablename__ = "controls"
+    __table_args__ = (
+        # The test due queue: only controls on a schedule are indexed
+        Index(
+            "ix_controls_test_due", "next_test_date",
+            postgresql_where=text("next_test_date IS NOT NULL"),
+            sqlite_where=text("next_test_date IS NOT NULL")
+        ),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     control_id = Column(String(100), unique=True, index=True)
@@ -52,7 +60,7 @@ class Control(Base):
     test_procedure = Column(Text)
     test_frequency_days = Column(Integer)
     last_tested = Column(DateTime)
-    next_test_date = Column(DateTime)
+    next_test_date = Column(DateTime)  # maintained by services.control_testing
     test_status = Column(String(50))
     
     # Effectiveness
@@ -60,7 +68,7 @@ class Control(Base):
     system_orchestration_level = Column(Integer)  # 0-100%
     
     # Metadata
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Additional fields
@@ -0,0 +1,28 @@
+from sqlalchemy import Column, Integer, DateTime, ForeignKey, Index
+from datetime import datetime
+from database import Base
+
+
+class RiskControlLink(Base):
+    """A control mitigating a risk; normalized form of Risk.control_ids"""
+    __tablename__ = "risk_control_links"
+    __table_args__ = (
+        # The primary key serves risk -> controls; this serves control -> risks
+        Index("ix_risk_control_links_control", "control_id", "risk_id"),
+    )
+
+    risk_id = Column(Integer, ForeignKey("risks.id", ondelete="CASCADE"), primary_key=True)
+    control_id = Column(Integer, ForeignKey("controls.id", ondelete="CASCADE"), primary_key=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class RequirementControlLink(Base):
+    """A control mapped to a compliance requirement; normalized form of ComplianceRequirement.mapped_controls"""
+    __tablename__ = "requirement_control_links"
+    __table_args__ = (
+        Index("ix_requirement_control_links_control", "control_id", "requirement_id"),
+    )
+
+    requirement_id = Column(Integer, ForeignKey("compliance_requirements.id", ondelete="CASCADE"), primary_key=True)
+    control_id = Column(Integer, ForeignKey("controls.id", ondelete="CASCADE"), primary_key=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
@@ -0,0 +1,35 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text, Enum, ForeignKey, Boolean, Index, text
+from datetime import datetime
+import enum
+from database import Base
+
+
+class ControlTestResult(enum.Enum):
+    PASSED = "Passed"
+    FAILED = "Failed"
+    PENDING_REVIEW = "Pending Review"  # automated check inconclusive, needs a manual test
+
+
+class ControlTestRun(Base):
+    """One scheduled or recorded test of a control"""
+    __tablename__ = "control_test_runs"
+    __table_args__ = (
+        # At most one open run per control, so dispatch never queues a control twice
+        Index(
+            "ix_control_test_runs_open", "control_id", unique=True,
+            postgresql_where=text("completed_at IS NULL"),
+            sqlite_where=text("completed_at IS NULL")
+        ),
+        Index("ix_control_test_runs_control", "control_id", "id"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    control_id = Column(Integer, ForeignKey("controls.id", ondelete="CASCADE"), nullable=False)
+    due_at = Column(DateTime)  # the control's next_test_date when the run was queued
+    queued_at = Column(DateTime, default=datetime.utcnow)
+    dispatched_at = Column(DateTime)  # set once a worker task was enqueued
+    completed_at = Column(DateTime)
+    result = Column(Enum(ControlTestResult))
+    automated = Column(Boolean, default=False)
+    tested_by = Column(String(100))
+    notes = Column(Text)
@@ -0,0 +1,37 @@
+from sqlalchemy import Column, String, Float, Integer, Date, DateTime
+from datetime import datetime
+from database import Base
+
+
+class DashboardSnapshot(Base):
+    """Pre-aggregated dashboard counters, one row per metric"""
+    __tablename__ = "dashboard_snapshot"
+    
+    metric = Column(String(100), primary_key=True)
+    value = Column(Float, nullable=False, default=0.0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class DailyMetrics(Base):
+    """Per-day activity counts rolled up from the entity tables"""
+    __tablename__ = "daily_metrics"
+    
+    day = Column(Date, primary_key=True)
+    
+    # Risk activity
+    new_risks = Column(Integer, nullable=False, default=0)
+    closed_risks = Column(Integer, nullable=False, default=0)
+    
+    # Control activity
+    new_controls = Column(Integer, nullable=False, default=0)
+    
+    # Vendor activity
+    new_vendors = Column(Integer, nullable=False, default=0)
+    assessments_completed = Column(Integer, nullable=False, default=0)
+    
+    # Evidence activity
+    new_evidence = Column(Integer, nullable=False, default=0)
+    verified_evidence = Column(Integer, nullable=False, default=0)
+    
+    # Metadata
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
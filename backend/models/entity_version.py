@@ -0,0 +1,12 @@
+from sqlalchemy import Column, String, BigInteger, DateTime
+from datetime import datetime
+from database import Base
+
+
+class EntityVersion(Base):
+    """Per-entity change counter, bumped in every transaction that writes the entity"""
+    __tablename__ = "entity_versions"
+    
+    entity = Column(String(50), primary_key=True)  # Change tag, e.g. "risks"
+    version = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -53,25 +53,25 @@ class Evidence(Base):
     collection_source = Column(String(255))  # System, API, etc.
     
     # Associations
-    control_id = Column(String(100))
+    control_id = Column(String(100), index=True)
     framework = Column(String(100))
     requirement_id = Column(String(100))
     
     # Validity
     valid_from = Column(DateTime)
-    valid_until = Column(DateTime)
+    valid_until = Column(DateTime, index=True)
     is_expired = Column(Boolean, default=False)
     
     # Review
     reviewed_by = Column(String(100))
-    review_date = Column(DateTime)
+    review_date = Column(DateTime, index=True)
     review_notes = Column(Text)
     
     # Metadata
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     tags = Column(JSON)
-    metadata = Column(JSON)
+    metadata_ = Column("metadata", JSON)  # "metadata" is reserved on declarative models
     
     # Relationships
     collection_id = Column(Integer, ForeignKey("evidence_collections.id"))
@@ -0,0 +1,12 @@
+from sqlalchemy import Column, String, BigInteger, DateTime
+from datetime import datetime
+from database import Base
+
+
+class IdSequence(Base):
+    """Last issued number for each business ID series, e.g. risks:RISK"""
+    __tablename__ = "id_sequences"
+    
+    name = Column(String(100), primary_key=True)
+    last_value = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Text, Enum, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, Float, DateTime, Text, Enum, ForeignKey, JSON, case
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
@@ -38,6 +38,14 @@ class RiskImpact(enum.Enum):
     CATASTROPHIC = 5
 
 
+# Minimum score for each risk level, highest first; anything below is "Low"
+RISK_LEVEL_THRESHOLDS = [
+    (15, "Critical"),
+    (10, "High"),
+    (5, "Medium"),
+]
+
+
 class Risk(Base):
     __tablename__ = "risks"
     
@@ -51,7 +59,7 @@ class Risk(Base):
     # Risk Scoring
     likelihood = Column(Enum(RiskLikelihood), nullable=False)
     impact = Column(Enum(RiskImpact), nullable=False)
-    inherent_risk_score = Column(Float)  # likelihood * impact
+    inherent_risk_score = Column(Float, index=True)  # likelihood * impact
     residual_risk_score = Column(Float)  # after controls
     
     # Details
@@ -66,8 +74,9 @@ class Risk(Base):
     control_ids = Column(JSON)  # List of control IDs
     
     # Metadata
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    closed_at = Column(DateTime, index=True)  # set when status moves to Closed
     last_reviewed = Column(DateTime)
     review_frequency_days = Column(Integer, default=90)
     
@@ -80,13 +89,25 @@ class Risk(Base):
         if self.likelihood and self.impact:
             self.inherent_risk_score = self.likelihood.value * self.impact.value
     
+    def set_status(self, status: RiskStatus):
+        """Change status, tracking when the risk was closed"""
+        if status == RiskStatus.CLOSED and self.status != RiskStatus.CLOSED:
+            self.closed_at = datetime.utcnow()
+        elif status != RiskStatus.CLOSED:
+            self.closed_at = None
+        self.status = status
+    
     def get_risk_level(self, score: float) -> str:
         """Get risk level based on score"""
-        if score >= 15:
-            return "Critical"
-        elif score >= 10:
-            return "High"
-        elif score >= 5:
-            return "Medium"
-        else:
-            return "Low"
\ No newline at end of file
+        for threshold, level in RISK_LEVEL_THRESHOLDS:
+            if score >= threshold:
+                return level
+        return "Low"
+    
+    @staticmethod
+    def risk_level_expression(score):
+        """SQL expression equivalent of get_risk_level, for use in aggregate queries"""
+        return case(
+            *[(score >= threshold, level) for threshold, level in RISK_LEVEL_THRESHOLDS],
+            else_="Low"
+        )
\ No newline at end of file
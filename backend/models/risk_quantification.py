@@ -0,0 +1,26 @@
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey
+from datetime import datetime
+from database import Base
+
+
+class RiskQuantification(Base):
+    """FAIR-style loss inputs for a risk, as (min, most likely, max) PERT estimates"""
+    __tablename__ = "risk_quantifications"
+
+    id = Column(Integer, primary_key=True, index=True)
+    risk_id = Column(Integer, ForeignKey("risks.id", ondelete="CASCADE"), unique=True, nullable=False)
+
+    # Loss event frequency, events per year
+    frequency_min = Column(Float, nullable=False)
+    frequency_most_likely = Column(Float, nullable=False)
+    frequency_max = Column(Float, nullable=False)
+
+    # Loss magnitude per event
+    magnitude_min = Column(Float, nullable=False)
+    magnitude_most_likely = Column(Float, nullable=False)
+    magnitude_max = Column(Float, nullable=False)
+
+    currency = Column(String(3), default="USD")
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -0,0 +1,23 @@
+from sqlalchemy import Column, Integer, String, Float, DateTime, JSON, Boolean
+from datetime import datetime
+from database import Base
+
+
+class RiskScoringMethod(Base):
+    """A risk scoring methodology; the active row drives every risk score"""
+    __tablename__ = "risk_scoring_methods"
+
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String(100), nullable=False)
+    is_active = Column(Boolean, default=False, index=True)
+
+    # Inherent score per cell: matrix[likelihood - 1][impact - 1]
+    matrix = Column(JSON, nullable=False)
+
+    # Residual model: each linked control mitigates rating/5 * status weight,
+    # and all controls together remove at most max_control_reduction
+    control_status_weights = Column(JSON, nullable=False)  # {"Implemented": 1.0, ...}
+    max_control_reduction = Column(Float, nullable=False)
+
+    created_by = Column(String(100))
+    created_at = Column(DateTime, default=datetime.utcnow)
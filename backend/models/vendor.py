@@ -61,12 +61,12 @@ class Vendor(Base):
     certifications = Column(JSON)  # List of vendor certifications (SOC2, ISO, etc.)
     
     # Assessment tracking
-    last_assessment_date = Column(DateTime)
-    next_assessment_date = Column(DateTime)
+    last_assessment_date = Column(DateTime, index=True)
+    next_assessment_date = Column(DateTime, index=True)
     assessment_frequency_days = Column(Integer, default=365)
     
     # Metadata
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     tags = Column(JSON)
     custom_fields = Column(JSON)
@@ -89,7 +89,7 @@ class VendorAssessment(Base):
     
     # Dates
     start_date = Column(DateTime)
-    completion_date = Column(DateTime)
+    completion_date = Column(DateTime, index=True)
     due_date = Column(DateTime)
     
     # Scoring
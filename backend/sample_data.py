@@ -15,11 +15,15 @@ from sqlalchemy.orm import Session
 sys.path.insert(0, os.path.dirname(__file__))
 
 from database import SessionLocal, engine, Base
+import services.session_hooks  # noqa: F401  change log, snapshot and link hooks for the seeded rows
 from models.risk import Risk, RiskCategory, RiskStatus, RiskLikelihood, RiskImpact
 from models.control import Control, ControlFramework, ControlMapping, ControlType, ControlStatus
 from models.vendor import Vendor, VendorAssessment, VendorQuestionnaire, VendorStatus, VendorRiskLevel
 from models.evidence import Evidence, EvidenceType, EvidenceStatus, CollectionMethod
 from models.compliance import ComplianceFramework, ComplianceRequirement, ComplianceStatus
+from services.dashboard_snapshot import rebuild_snapshot
+from services.id_allocator import resync_id_sequences
+from services.schema_upgrades import ensure_schema_upgrades
 
 
 def create_sample_risks(db: Session):
@@ -299,6 +303,7 @@ def main():
     # Create database tables
     print("Creating database tables...")
     Base.metadata.create_all(bind=engine)
+    ensure_schema_upgrades(engine)
     print("✓ Database tables ready\n")
     
     # Create database session
@@ -319,6 +324,15 @@ def main():
         create_sample_vendors(db)
         create_sample_evidence(db)
         
+        # Bring dashboard counters in line with the new data
+        rebuild_snapshot(db)
+        db.commit()
+        print("✓ Dashboard snapshot rebuilt")
+        
+        # Sample rows carry fixed IDs; move the ID series past them
+        resync_id_sequences(db)
+        db.commit()
+        
         print("\n" + "="*50)
         print("✓ Sample data creation complete!")
         print("="*50)
@@ -0,0 +1,55 @@
+from pydantic import BaseModel, Field, model_validator
+from typing import Optional, List
+from models.risk import RiskCategory, RiskStatus
+from models.control import ControlStatus
+from models.vendor import VendorStatus, VendorRiskLevel
+from schemas.risk import RiskUpdate
+from schemas.control import ControlUpdate
+from schemas.vendor import VendorUpdate
+
+
+class RiskBatchFilter(BaseModel):
+    category: Optional[RiskCategory] = None
+    status: Optional[RiskStatus] = None
+    owner: Optional[str] = None
+    tags: Optional[List[str]] = None
+
+
+class ControlBatchFilter(BaseModel):
+    status: Optional[ControlStatus] = None
+    owner: Optional[str] = None
+
+
+class VendorBatchFilter(BaseModel):
+    status: Optional[VendorStatus] = None
+    risk_level: Optional[VendorRiskLevel] = None
+
+
+class BatchUpdateBase(BaseModel):
+    """Target rows by ID list or by filter (exactly one), and the patch to apply to all of them"""
+    ids: Optional[List[str]] = Field(None, min_length=1, max_length=10000)
+
+    @model_validator(mode="after")
+    def check_target(self):
+        if (self.ids is None) == (self.filter is None):
+            raise ValueError("Provide exactly one of ids or filter")
+        if self.filter is not None and not self.filter.model_dump(exclude_none=True):
+            raise ValueError("filter needs at least one criterion")
+        if not self.patch.model_fields_set:
+            raise ValueError("patch must set at least one field")
+        return self
+
+
+class RiskBatchUpdate(BatchUpdateBase):
+    filter: Optional[RiskBatchFilter] = None
+    patch: RiskUpdate
+
+
+class ControlBatchUpdate(BatchUpdateBase):
+    filter: Optional[ControlBatchFilter] = None
+    patch: ControlUpdate
+
+
+class VendorBatchUpdate(BatchUpdateBase):
+    filter: Optional[VendorBatchFilter] = None
+    patch: VendorUpdate
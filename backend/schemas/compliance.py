@@ -33,6 +33,10 @@ class ComplianceRequirementResponse(BaseModel):
         from_attributes = True
 
 
+class RequirementControlsUpdate(BaseModel):
+    control_ids: List[str]
+
+
 class ComplianceDashboardData(BaseModel):
     framework_name: str
     compliance_percentage: float
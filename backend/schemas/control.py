@@ -1,7 +1,8 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, field_validator
 from typing import Optional, List
 from datetime import datetime
 from models.control import ControlType, ControlStatus
+from models.control_test import ControlTestResult
 
 
 class ControlBase(BaseModel):
@@ -27,6 +28,7 @@ class ControlUpdate(BaseModel):
     owner: Optional[str] = None
     effectiveness_rating: Optional[int] = None
     system_orchestration_level: Optional[int] = None
+    test_frequency_days: Optional[int] = Field(None, ge=1)
 
 
 class ControlResponse(ControlBase):
@@ -35,6 +37,9 @@ class ControlResponse(ControlBase):
     status: ControlStatus
     effectiveness_rating: Optional[int]
     system_orchestration_level: Optional[int]
+    last_tested: Optional[datetime]
+    next_test_date: Optional[datetime]
+    test_status: Optional[str]
     created_at: datetime
     updated_at: datetime
     
@@ -50,4 +55,34 @@ class ControlFrameworkResponse(BaseModel):
     created_at: datetime
     
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class ControlTestRecord(BaseModel):
+    """A manual test result; completes the control's open test run"""
+    result: ControlTestResult
+    tested_at: Optional[datetime] = None
+    tested_by: Optional[str] = None
+    notes: Optional[str] = None
+    effectiveness_rating: Optional[int] = Field(None, ge=1, le=5)
+
+    @field_validator("result")
+    @classmethod
+    def check_result(cls, value):
+        if value == ControlTestResult.PENDING_REVIEW:
+            raise ValueError("Record Passed or Failed; Pending Review is set by automated checks")
+        return value
+
+
+class ControlTestRunResponse(BaseModel):
+    id: int
+    due_at: Optional[datetime]
+    queued_at: Optional[datetime]
+    dispatched_at: Optional[datetime]
+    completed_at: Optional[datetime]
+    result: Optional[ControlTestResult]
+    automated: Optional[bool]
+    tested_by: Optional[str]
+    notes: Optional[str]
+    
+    class Config:
+        from_attributes = True
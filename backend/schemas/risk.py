@@ -1,7 +1,8 @@
-from pydantic import BaseModel, Field
-from typing import Optional, List
+from pydantic import BaseModel, Field, field_validator, model_validator
+from typing import Annotated, Optional, List, Dict
 from datetime import datetime
 from models.risk import RiskCategory, RiskStatus, RiskLikelihood, RiskImpact
+from models.control import ControlStatus
 
 
 class RiskBase(BaseModel):
@@ -15,6 +16,7 @@ class RiskBase(BaseModel):
     threat_source: Optional[str] = None
     vulnerability: Optional[str] = None
     mitigation_strategy: Optional[str] = None
+    control_ids: Optional[List[str]] = None
     tags: Optional[List[str]] = None
 
 
@@ -32,6 +34,7 @@ class RiskUpdate(BaseModel):
     owner: Optional[str] = None
     mitigation_strategy: Optional[str] = None
     residual_risk_score: Optional[float] = None
+    control_ids: Optional[List[str]] = None
     tags: Optional[List[str]] = None
 
 
@@ -53,7 +56,8 @@ class RiskHeatmapData(BaseModel):
     impact: int
     count: int
     risk_level: str
-    risks: List[str]  # List of risk IDs
+    average_score: Optional[float] = None
+    risks: List[str]  # Risk IDs, highest score first; capped by risk_ids_limit
 
 
 class RiskImportData(BaseModel):
@@ -64,4 +68,59 @@ class RiskExportFilter(BaseModel):
     category: Optional[RiskCategory] = None
     status: Optional[RiskStatus] = None
     min_score: Optional[float] = None
-    max_score: Optional[float] = None
\ No newline at end of file
+    max_score: Optional[float] = None
+
+# Fraction of a risk score removed; outside 0-1 residual scores would exceed inherent or go negative
+Reduction = Annotated[float, Field(ge=0, le=1)]
+
+
+class RiskScoringMethodUpdate(BaseModel):
+    name: str
+    # matrix[likelihood - 1][impact - 1]
+    matrix: List[List[float]] = Field(..., min_length=5, max_length=5)
+    control_status_weights: Dict[ControlStatus, Reduction] = Field(
+        default_factory=lambda: {ControlStatus.IMPLEMENTED: 1.0, ControlStatus.PARTIALLY_IMPLEMENTED: 0.5}
+    )
+    max_control_reduction: Reduction = 0.8
+    created_by: Optional[str] = None
+
+    @field_validator("matrix")
+    @classmethod
+    def check_matrix(cls, matrix):
+        if any(len(row) != 5 for row in matrix):
+            raise ValueError("matrix must be 5x5 (likelihood x impact)")
+        return matrix
+
+
+class RiskScoringMethodResponse(BaseModel):
+    name: str
+    matrix: List[List[float]]
+    control_status_weights: Dict[str, float]
+    max_control_reduction: float
+
+
+class RiskQuantificationBase(BaseModel):
+    # Loss events per year
+    frequency_min: float = Field(..., ge=0)
+    frequency_most_likely: float = Field(..., ge=0)
+    frequency_max: float = Field(..., ge=0)
+    # Loss per event
+    magnitude_min: float = Field(..., ge=0)
+    magnitude_most_likely: float = Field(..., ge=0)
+    magnitude_max: float = Field(..., ge=0)
+    currency: str = Field("USD", min_length=3, max_length=3)
+
+    @model_validator(mode="after")
+    def check_ranges(self):
+        for name in ("frequency", "magnitude"):
+            low, mode, high = (getattr(self, f"{name}_{part}") for part in ("min", "most_likely", "max"))
+            if not low <= mode <= high:
+                raise ValueError(f"{name} must satisfy min <= most_likely <= max")
+        return self
+
+
+class RiskQuantificationResponse(RiskQuantificationBase):
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
@@ -0,0 +1,152 @@
+from sqlalchemy import select, func, literal, union_all, tuple_
+from sqlalchemy.orm import Session
+from fastapi import HTTPException
+from datetime import datetime, timedelta
+from typing import List, Optional
+import enum
+
+from models.risk import Risk, RiskStatus
+from models.control import Control
+from models.vendor import Vendor, VendorStatus
+from models.evidence import Evidence
+from services.pagination import encode_cursor, decode_cursor
+
+
+class ActionItemType(enum.Enum):
+    RISK = "Risk"
+    CONTROL = "Control"
+    VENDOR = "Vendor"
+    EVIDENCE = "Evidence"
+
+
+PRIORITY_RANKS = {"Critical": 0, "High": 1, "Medium": 2, "Low": 3}
+
+# Items without a due date sort after every dated item of the same priority
+NO_DUE_DATE = datetime(9999, 12, 31)
+
+
+def _source(item_type: ActionItemType, priority: str, item_id, title, owner, due_date, conditions):
+    return select(
+        literal(item_type.value).label("type"),
+        literal(PRIORITY_RANKS[priority]).label("priority_rank"),
+        literal(priority).label("priority"),
+        item_id.label("id"),
+        title.label("title"),
+        owner.label("owner"),
+        due_date.label("due_date"),
+    ).where(*conditions)
+
+
+def _sources(owner: Optional[str]) -> dict:
+    now = datetime.utcnow()
+    in_30_days = now + timedelta(days=30)
+    
+    def owned_by(column):
+        return [column == owner] if owner else []
+    
+    return {
+        ActionItemType.RISK: _source(
+            ActionItemType.RISK, "Critical",
+            Risk.risk_id,
+            literal("Address critical risk: ") + Risk.title,
+            Risk.owner,
+            Risk.mitigation_deadline,
+            [
+                Risk.status.in_([RiskStatus.OPEN, RiskStatus.IN_PROGRESS]),
+                Risk.inherent_risk_score >= 15,
+                *owned_by(Risk.owner)
+            ]
+        ),
+        ActionItemType.CONTROL: _source(
+            ActionItemType.CONTROL, "High",
+            Control.control_id,
+            literal("Test control: ") + Control.title,
+            Control.owner,
+            Control.next_test_date,
+            [Control.next_test_date <= now, *owned_by(Control.owner)]
+        ),
+        ActionItemType.VENDOR: _source(
+            ActionItemType.VENDOR, "Medium",
+            Vendor.vendor_id,
+            literal("Complete vendor assessment: ") + Vendor.name,
+            Vendor.primary_contact_name,
+            Vendor.next_assessment_date,
+            [
+                Vendor.next_assessment_date <= in_30_days,
+                Vendor.status == VendorStatus.ACTIVE,
+                *owned_by(Vendor.primary_contact_name)
+            ]
+        ),
+        ActionItemType.EVIDENCE: _source(
+            ActionItemType.EVIDENCE, "Medium",
+            Evidence.evidence_id,
+            literal("Renew evidence: ") + Evidence.title,
+            Evidence.collected_by,
+            Evidence.valid_until,
+            [
+                Evidence.valid_until <= in_30_days,
+                Evidence.valid_until >= now,
+                *owned_by(Evidence.collected_by)
+            ]
+        ),
+    }
+
+
+def get_action_items_page(
+    db: Session,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    owner: Optional[str] = None,
+    item_types: Optional[List[ActionItemType]] = None,
+    include_total: bool = True
+) -> dict:
+    """Get one page of action items across all sources in global priority and due-date order"""
+    sources = _sources(owner)
+    selected = [sources[t] for t in (item_types or list(ActionItemType))]
+    items = union_all(*selected).subquery("action_items")
+    
+    due_sort = func.coalesce(items.c.due_date, NO_DUE_DATE)
+    sort_key = (items.c.priority_rank, due_sort, items.c.type, items.c.id)
+    
+    stmt = select(items).order_by(*sort_key).limit(limit + 1)
+    if cursor:
+        rank, due, item_type, item_id = decode_cursor(cursor, 4)
+        try:
+            due = datetime.fromisoformat(due)
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        stmt = stmt.where(tuple_(*sort_key) > tuple_(rank, due, item_type, item_id))
+    
+    rows = db.execute(stmt).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    
+    next_cursor = None
+    if has_more:
+        last = rows[-1]
+        next_cursor = encode_cursor([
+            last.priority_rank,
+            (last.due_date or NO_DUE_DATE).isoformat(),
+            last.type,
+            last.id
+        ])
+    
+    page = {
+        "action_items": [
+            {
+                "type": row.type,
+                "priority": row.priority,
+                "id": row.id,
+                "title": row.title,
+                "owner": row.owner,
+                "due_date": row.due_date.isoformat() if row.due_date else None
+            }
+            for row in rows
+        ],
+        "next_cursor": next_cursor
+    }
+    if include_total:
+        page["total_action_items"] = db.execute(
+            select(func.count()).select_from(items)
+        ).scalar_one()
+    return page
@@ -0,0 +1,146 @@
+from fastapi import HTTPException
+from sqlalchemy import select, update, case
+from sqlalchemy.orm import Session
+from datetime import datetime
+from typing import List, Optional, Sequence
+
+from models.risk import Risk, RiskStatus
+from models.control import Control
+from models.vendor import Vendor
+from services.change_tracking import MODEL_TAGS, mark_changed
+from services.change_history import record_changes
+from services.dashboard_snapshot import row_counters, record_bulk_update
+from services.live_updates import record_status_changes
+from services.risk_scoring import rescore_risks
+from services.control_links import PROPAGATED_FIELDS, replace_links, propagate_control_changes
+from services.control_testing import SCHEDULE_FIELDS, reschedule_controls
+
+# Largest batch accepted; each item gets a result entry
+MAX_BATCH_SIZE = 10000
+
+# Rows per UPDATE ... WHERE id IN (...) statement
+BATCH_CHUNK_SIZE = 5000
+
+# Patch fields that change a risk's scores
+RISK_SCORE_FIELDS = {"likelihood", "impact", "control_ids"}
+
+
+def _select_targets(db: Session, model, key, ids: Optional[List[str]], filters: Sequence) -> list:
+    """Primary and business keys of the rows to update, locked for the transaction"""
+    stmt = select(model.id, key).order_by(model.id).with_for_update()
+    stmt = stmt.where(key.in_(ids)) if ids is not None else stmt.where(*filters)
+    return db.execute(stmt).all()
+
+
+def patch_rows(db: Session, model, key, ids: Optional[List[str]], filters: Sequence, values: dict) -> dict:
+    """Apply one patch to every matching row with set-based UPDATEs.
+
+    Rows are selected by business ID (ids) or by filters. Nothing is
+    committed; the caller commits so the batch is a single transaction.
+    Returns the matched primary keys and a per-item result list.
+    """
+    targets = _select_targets(db, model, key, ids, filters)
+    if len(targets) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=400,
+            detail=f"{len(targets)} rows match; batches are limited to {MAX_BATCH_SIZE}, narrow the filter"
+        )
+    pks = [pk for pk, _ in targets]
+
+    if pks and values:
+        values = {**values, "updated_at": datetime.utcnow()}
+        for start in range(0, len(pks), BATCH_CHUNK_SIZE):
+            in_chunk = [model.id.in_(pks[start:start + BATCH_CHUNK_SIZE])]
+            # Bulk writes bypass the flush hooks that keep these in step
+            before = row_counters(db, model, in_chunk)
+            if "status" in values:
+                record_status_changes(db, model, in_chunk, values["status"])
+            db.execute(
+                update(model)
+                .where(*in_chunk)
+                .values(values)
+                .execution_options(synchronize_session=False)
+            )
+            record_changes(db, model, in_chunk, values.keys())
+            record_bulk_update(db, model, before, in_chunk)
+        mark_changed(db, MODEL_TAGS[model])
+
+    found = {business_id for _, business_id in targets}
+    results = [{"id": business_id, "status": "updated"} for _, business_id in targets]
+    if ids is not None:
+        results.extend({"id": missing, "status": "not_found"} for missing in dict.fromkeys(ids) if missing not in found)
+
+    return {
+        "pks": pks,
+        "summary": {
+            "matched": len(targets),
+            "updated": len(targets) if values else 0,
+            "not_found": len(results) - len(targets),
+        },
+        "results": results,
+    }
+
+
+def _risk_values(patch: dict) -> dict:
+    values = dict(patch)
+    if "status" in values:
+        # Set-based equivalent of Risk.set_status
+        if values["status"] == RiskStatus.CLOSED:
+            values["closed_at"] = case(
+                (Risk.status == RiskStatus.CLOSED, Risk.closed_at),
+                else_=datetime.utcnow()
+            )
+        else:
+            values["closed_at"] = None
+    return values
+
+
+def patch_risks(db: Session, ids: Optional[List[str]], filters: Sequence, patch: dict) -> dict:
+    """Patch many risks and re-score the ones whose likelihood, impact or controls changed"""
+    outcome = patch_rows(db, Risk, Risk.risk_id, ids, filters, _risk_values(patch))
+    pks = outcome.pop("pks")
+    if pks and "control_ids" in patch:
+        replace_links(db, Risk, pks, patch["control_ids"])
+
+    if pks and patch.keys() & RISK_SCORE_FIELDS:
+        outcome["rescore"] = rescore_risks(db, [Risk.id.in_(pks)])
+        # An explicitly supplied residual score still wins, as in update_risk
+        if "residual_risk_score" in patch:
+            db.execute(
+                update(Risk)
+                .where(Risk.id.in_(pks))
+                .values(residual_risk_score=patch["residual_risk_score"])
+                .execution_options(synchronize_session=False)
+            )
+            record_changes(db, Risk, [Risk.id.in_(pks)], ["residual_risk_score"])
+
+    if pks:
+        scores = {
+            risk_id: (inherent, residual)
+            for risk_id, inherent, residual in db.execute(
+                select(Risk.risk_id, Risk.inherent_risk_score, Risk.residual_risk_score)
+                .where(Risk.id.in_(pks))
+            )
+        }
+        for result in outcome["results"]:
+            if result["id"] in scores:
+                result["inherent_risk_score"], result["residual_risk_score"] = scores[result["id"]]
+    return outcome
+
+
+def patch_controls(db: Session, ids: Optional[List[str]], filters: Sequence, patch: dict) -> dict:
+    """Patch many controls, updating linked risks and requirements when status or effectiveness changed"""
+    outcome = patch_rows(db, Control, Control.control_id, ids, filters, patch)
+    pks = outcome.pop("pks")
+    if pks and patch.keys() & PROPAGATED_FIELDS:
+        outcome["propagation"] = propagate_control_changes(db, pks)
+    if pks and patch.keys() & SCHEDULE_FIELDS:
+        outcome["schedule"] = reschedule_controls(db, [Control.id.in_(pks)])
+    return outcome
+
+
+def patch_vendors(db: Session, ids: Optional[List[str]], filters: Sequence, patch: dict) -> dict:
+    """Patch many vendors"""
+    outcome = patch_rows(db, Vendor, Vendor.vendor_id, ids, filters, patch)
+    outcome.pop("pks")
+    return outcome
@@ -0,0 +1,345 @@
+from fastapi.encoders import jsonable_encoder
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from collections import OrderedDict
+from functools import wraps
+from weakref import WeakValueDictionary
+from typing import Iterable, Optional
+import asyncio
+import hashlib
+import json
+import logging
+import threading
+import time
+import redis
+
+from config import settings
+from services.change_tracking import on_commit
+
+logger = logging.getLogger(__name__)
+
+MISS = object()
+
+# How long to stop talking to Redis after a connection error
+REDIS_RETRY_SECONDS = 30
+# Poll interval while waiting for another worker to fill a locked key
+LOCK_POLL_SECONDS = 0.05
+
+
+class LocalCache:
+    """Thread-safe in-process LRU cache with per-entry TTLs"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._tag_versions = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, payload = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return payload
+
+    def set(self, key: str, payload: str, ttl: int):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, payload)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def tag_versions(self, tags: list) -> list:
+        with self._lock:
+            return [self._tag_versions.get(tag, 0) for tag in tags]
+
+    def bump_tags(self, tags: Iterable[str]):
+        with self._lock:
+            for tag in tags:
+                self._tag_versions[tag] = self._tag_versions.get(tag, 0) + 1
+
+    def acquire_lock(self, key: str, timeout: float) -> bool:
+        # In-process requests are already single-flighted by the decorator
+        return True
+
+    def release_lock(self, key: str):
+        pass
+
+    def incr_stat(self, name: str):
+        pass
+
+
+class RedisCache:
+    """Redis cache shared by all workers; tags are versioned counters"""
+
+    def __init__(self, url: str):
+        self.client = redis.Redis.from_url(
+            url,
+            socket_connect_timeout=0.5,
+            socket_timeout=0.5
+        )
+
+    def get(self, key: str) -> Optional[str]:
+        payload = self.client.get(key)
+        return payload.decode() if payload is not None else None
+
+    def set(self, key: str, payload: str, ttl: int):
+        self.client.set(key, payload, ex=ttl)
+
+    def tag_versions(self, tags: list) -> list:
+        versions = self.client.mget([f"cache:tag:{tag}" for tag in tags])
+        return [int(v) if v is not None else 0 for v in versions]
+
+    def bump_tags(self, tags: Iterable[str]):
+        pipe = self.client.pipeline(transaction=False)
+        for tag in tags:
+            pipe.incr(f"cache:tag:{tag}")
+        pipe.execute()
+
+    def acquire_lock(self, key: str, timeout: float) -> bool:
+        return bool(self.client.set(f"{key}:lock", "1", nx=True, px=int(timeout * 1000)))
+
+    def release_lock(self, key: str):
+        self.client.delete(f"{key}:lock")
+
+    def incr_stat(self, name: str):
+        self.client.hincrby("cache:stats", name, 1)
+
+    def stats(self) -> dict:
+        return {k.decode(): int(v) for k, v in self.client.hgetall("cache:stats").items()}
+
+
+class ResponseCache:
+    """Tag-invalidated response cache backed by Redis, with an in-process LRU fallback"""
+
+    def __init__(self):
+        self.local = LocalCache(settings.CACHE_LOCAL_MAX_ENTRIES)
+        self._redis = None
+        self._redis_down_until = 0.0
+        self._stats = {"hits": 0, "misses": 0, "fallbacks": 0}
+        self._stats_lock = threading.Lock()
+        self._flight_guard = threading.Lock()
+        self._thread_flights = WeakValueDictionary()
+        self._async_flights = WeakValueDictionary()
+        # Redis tag bumps still running in a thread, started from the event loop
+        self._pending_bumps = set()
+
+    def _call(self, method: str, *args):
+        """Run a backend operation on Redis, falling back to the local cache on failure"""
+        if time.monotonic() >= self._redis_down_until:
+            try:
+                if self._redis is None:
+                    self._redis = RedisCache(settings.REDIS_URL)
+                return getattr(self._redis, method)(*args)
+            except redis.RedisError as e:
+                logger.warning(f"Redis cache unavailable, using in-process cache: {e}")
+                self._redis_down_until = time.monotonic() + REDIS_RETRY_SECONDS
+                self._record("fallbacks")
+        return getattr(self.local, method)(*args)
+
+    @property
+    def backend(self) -> str:
+        return "redis" if time.monotonic() >= self._redis_down_until else "local"
+
+    def _record(self, name: str):
+        with self._stats_lock:
+            self._stats[name] += 1
+
+    def record(self, name: str):
+        """Count a hit or miss in this process and, when available, across workers"""
+        self._record(name)
+        self._call("incr_stat", name)
+
+    def key_for(self, namespace: str, tags: list, params: dict) -> str:
+        versions = self._call("tag_versions", tags)
+        raw = json.dumps({"params": params, "versions": versions}, sort_keys=True, default=str)
+        return f"cache:{namespace}:{hashlib.sha1(raw.encode()).hexdigest()}"
+
+    def lookup(self, key: str):
+        payload = self._call("get", key)
+        return json.loads(payload) if payload is not None else MISS
+
+    def fetch(self, namespace: str, tags: list, params: dict):
+        """Key and cached value (MISS when absent) for a call, counting a hit"""
+        key = self.key_for(namespace, tags, params)
+        value = self.lookup(key)
+        if value is not MISS:
+            self.record("hits")
+        return key, value
+
+    def claim(self, key: str, timeout: float):
+        """Re-check a missed key, taking its cross-worker lock if still missing: (value, holds_lock)"""
+        value = self.lookup(key)
+        return value, value is MISS and self.acquire_lock(key, timeout)
+
+    def store(self, key: str, value, ttl: int):
+        self._call("set", key, json.dumps(value), ttl)
+
+    def acquire_lock(self, key: str, timeout: float) -> bool:
+        return self._call("acquire_lock", key, timeout)
+
+    def release_lock(self, key: str):
+        self._call("release_lock", key)
+
+    def invalidate(self, tags: Iterable[str]):
+        """Invalidate every entry carrying any of the tags"""
+        tags = list(tags)
+        # Bump local versions too, so entries cached during a Redis outage go stale
+        self.local.bump_tags(tags)
+        if self.backend == "redis":
+            self._call("bump_tags", tags)
+
+    def invalidate_from_loop(self, tags: Iterable[str], loop: asyncio.AbstractEventLoop):
+        """invalidate() for commits made on the event loop: the Redis round trip runs in a thread"""
+        tags = list(tags)
+        self.local.bump_tags(tags)
+        if self.backend == "redis":
+            bump = loop.run_in_executor(None, self._call, "bump_tags", tags)
+            self._pending_bumps.add(bump)
+            bump.add_done_callback(self._pending_bumps.discard)
+
+    async def settle(self):
+        """Wait for tag bumps still in flight, so this worker never serves what it just invalidated"""
+        if self._pending_bumps:
+            await asyncio.gather(*self._pending_bumps, return_exceptions=True)
+
+    def thread_flight(self, key: str) -> threading.Lock:
+        with self._flight_guard:
+            lock = self._thread_flights.get(key)
+            if lock is None:
+                lock = self._thread_flights[key] = threading.Lock()
+            return lock
+
+    def async_flight(self, key: str) -> asyncio.Lock:
+        with self._flight_guard:
+            lock = self._async_flights.get(key)
+            if lock is None:
+                lock = self._async_flights[key] = asyncio.Lock()
+            return lock
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            process_stats = dict(self._stats)
+        lookups = process_stats["hits"] + process_stats["misses"]
+        result = {
+            "backend": self.backend,
+            "process": {
+                **process_stats,
+                "hit_ratio": round(process_stats["hits"] / lookups, 4) if lookups else 0.0
+            }
+        }
+        if self._redis is not None and self.backend == "redis":
+            try:
+                result["shared"] = self._redis.stats()
+            except redis.RedisError:
+                pass
+        return result
+
+
+response_cache = ResponseCache()
+
+
+@on_commit
+def invalidate_changed_tags(session: Session, tags: set):
+    try:
+        # Async sessions commit on the event loop, which must not wait on Redis
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        response_cache.invalidate(tags)
+    else:
+        response_cache.invalidate_from_loop(tags, loop)
+
+
+def _cache_params(kwargs: dict) -> dict:
+    return {
+        name: value
+        for name, value in kwargs.items()
+        if not isinstance(value, (Session, AsyncSession))
+    }
+
+
+def cached(tags: list, ttl: Optional[int] = None, lock_timeout: float = 10.0):
+    """Cache an endpoint's JSON result, invalidated whenever an entity in `tags` is written.
+
+    Concurrent misses for the same key are collapsed: one caller computes the
+    value while the others wait for it, within this process via a lock and
+    across workers via a short-lived Redis lock.
+    """
+    def decorator(func):
+        namespace = f"{func.__module__}.{func.__qualname__}"
+
+        def expires_in() -> int:
+            return ttl or settings.CACHE_DEFAULT_TTL_SECONDS
+
+        if asyncio.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if not settings.CACHE_ENABLED:
+                    return await func(*args, **kwargs)
+
+                # Redis calls are blocking; they run in the threadpool, off the event loop
+                await response_cache.settle()
+                key, value = await run_in_threadpool(response_cache.fetch, namespace, tags, _cache_params(kwargs))
+                if value is not MISS:
+                    return value
+
+                async with response_cache.async_flight(key):
+                    value, holds_lock = await run_in_threadpool(response_cache.claim, key, lock_timeout)
+                    if value is MISS and not holds_lock:
+                        deadline = time.monotonic() + lock_timeout
+                        while value is MISS and time.monotonic() < deadline:
+                            await asyncio.sleep(LOCK_POLL_SECONDS)
+                            value = await run_in_threadpool(response_cache.lookup, key)
+                    if value is not MISS:
+                        await run_in_threadpool(response_cache.record, "hits")
+                        return value
+
+                    await run_in_threadpool(response_cache.record, "misses")
+                    try:
+                        value = jsonable_encoder(await func(*args, **kwargs))
+                        await run_in_threadpool(response_cache.store, key, value, expires_in())
+                        return value
+                    finally:
+                        if holds_lock:
+                            await run_in_threadpool(response_cache.release_lock, key)
+
+            return async_wrapper
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not settings.CACHE_ENABLED:
+                return func(*args, **kwargs)
+
+            key, value = response_cache.fetch(namespace, tags, _cache_params(kwargs))
+            if value is not MISS:
+                return value
+
+            with response_cache.thread_flight(key):
+                value, holds_lock = response_cache.claim(key, lock_timeout)
+                if value is MISS and not holds_lock:
+                    deadline = time.monotonic() + lock_timeout
+                    while value is MISS and time.monotonic() < deadline:
+                        time.sleep(LOCK_POLL_SECONDS)
+                        value = response_cache.lookup(key)
+                if value is not MISS:
+                    response_cache.record("hits")
+                    return value
+
+                response_cache.record("misses")
+                try:
+                    value = jsonable_encoder(func(*args, **kwargs))
+                    response_cache.store(key, value, expires_in())
+                    return value
+                finally:
+                    if holds_lock:
+                        response_cache.release_lock(key)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,379 @@
+from fastapi import HTTPException, Query
+from sqlalchemy import select, insert, func, event, inspect, types
+from sqlalchemy.orm import Session
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import enum
+import logging
+
+from config import settings
+from database import SessionLocal
+from models.risk import Risk
+from models.control import Control
+from models.vendor import Vendor
+from models.compliance import ComplianceRequirement
+from models.change_history import ChangeEvent, ChangeCheckpoint, ChangeCheckpointRow
+from services.pagination import PageParams
+
+logger = logging.getLogger(__name__)
+
+# Models whose writes are logged, keyed by the entity name stored on events
+HISTORY_MODELS = {model.__tablename__: model for model in (Risk, Control, Vendor, ComplianceRequirement)}
+
+# Rows per executemany INSERT for events and checkpoint rows
+HISTORY_BATCH_SIZE = 5000
+
+
+def _jsonable(value):
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _columns(model) -> List[str]:
+    return [attr.key for attr in inspect(model).column_attrs]
+
+
+def _event(entity: str, entity_id: int, operation: str, changes: Optional[dict], now: datetime) -> dict:
+    return {"entity": entity, "entity_id": entity_id, "operation": operation, "changes": changes, "changed_at": now}
+
+
+def _write_events(db, events: List[dict]):
+    for start in range(0, len(events), HISTORY_BATCH_SIZE):
+        db.execute(insert(ChangeEvent.__table__), events[start:start + HISTORY_BATCH_SIZE])
+
+
+@event.listens_for(SessionLocal, "after_flush")
+def _record_flush(session, flush_context):
+    # Attribute history still reflects the flush here, and new rows have their IDs
+    now = datetime.utcnow()
+    events = []
+    for obj in session.new:
+        if type(obj) in HISTORY_MODELS.values():
+            state = {key: _jsonable(getattr(obj, key)) for key in _columns(type(obj))}
+            events.append(_event(type(obj).__tablename__, obj.id, "insert", state, now))
+    for obj in session.dirty:
+        if type(obj) in HISTORY_MODELS.values():
+            attrs = inspect(obj).attrs
+            changes = {}
+            for key in _columns(type(obj)):
+                history = attrs[key].history
+                if history.has_changes():
+                    changes[key] = _jsonable(history.added[0] if history.added else None)
+            if changes:
+                events.append(_event(type(obj).__tablename__, obj.id, "update", changes, now))
+    for obj in session.deleted:
+        if type(obj) in HISTORY_MODELS.values():
+            events.append(_event(type(obj).__tablename__, obj.id, "delete", None, now))
+    if events:
+        _write_events(session.connection(), events)
+
+
+def record_updates(db: Session, model, rows: Iterable[dict]):
+    """Log rows written by a bulk UPDATE by primary key; each dict holds "id" and the new values"""
+    now = datetime.utcnow()
+    _write_events(db, [
+        _event(model.__tablename__, row["id"], "update",
+               {key: _jsonable(value) for key, value in row.items() if key != "id"}, now)
+        for row in rows
+    ])
+
+
+def record_changes(db: Session, model, filters: Sequence, fields: Optional[Iterable[str]] = None,
+                   operation: str = "update"):
+    """Log rows written by a bulk statement, reading their current values back.
+
+    Bulk statements bypass the flush listener; call this after them, in the
+    same transaction. Inserts log every column.
+    """
+    keys = _columns(model) if operation == "insert" or fields is None else [key for key in fields if key != "id"]
+    rows = db.execute(select(model.id, *[getattr(model, key) for key in keys]).where(*filters)).all()
+    now = datetime.utcnow()
+    _write_events(db, [
+        _event(model.__tablename__, row[0], operation,
+               {key: _jsonable(value) for key, value in zip(keys, row[1:])}, now)
+        for row in rows
+    ])
+
+
+def _apply(state: Dict[int, dict], entity_id: int, operation: str, changes: Optional[dict]):
+    if operation == "delete":
+        state.pop(entity_id, None)
+    elif operation == "insert":
+        state[entity_id] = dict(changes or {})
+    elif entity_id in state:
+        state[entity_id].update(changes or {})
+    # An update to a row with no insert event or checkpoint row was written by
+    # a process without the flush hook; its full state is unknown, so skip it
+
+
+def _replay(db: Session, entity: str, state: Dict[int, dict], after_event_id: int, until: datetime):
+    # Re-applying an event already reflected in the state is harmless: events
+    # carry new values, not increments, and replay runs in id order
+    events = db.execute(
+        select(ChangeEvent.entity_id, ChangeEvent.operation, ChangeEvent.changes)
+        .where(
+            ChangeEvent.entity == entity,
+            ChangeEvent.id > after_event_id,
+            ChangeEvent.changed_at <= until
+        )
+        .order_by(ChangeEvent.id)
+        .execution_options(yield_per=HISTORY_BATCH_SIZE)
+    )
+    for entity_id, operation, changes in events:
+        _apply(state, entity_id, operation, changes)
+
+
+def _latest_checkpoint(db: Session, entity: str, as_of: Optional[datetime] = None) -> Optional[ChangeCheckpoint]:
+    stmt = select(ChangeCheckpoint).where(ChangeCheckpoint.entity == entity)
+    if as_of is not None:
+        stmt = stmt.where(ChangeCheckpoint.as_of <= as_of)
+    return db.scalar(stmt.order_by(ChangeCheckpoint.as_of.desc()).limit(1))
+
+
+def _checkpoint_state(db: Session, checkpoint: ChangeCheckpoint) -> Dict[int, dict]:
+    rows = db.execute(
+        select(ChangeCheckpointRow.entity_id, ChangeCheckpointRow.state)
+        .where(ChangeCheckpointRow.checkpoint_id == checkpoint.id)
+        .execution_options(yield_per=HISTORY_BATCH_SIZE)
+    )
+    return {entity_id: state for entity_id, state in rows}
+
+
+def _checkpoint_for(db: Session, entity: str, as_of: datetime) -> ChangeCheckpoint:
+    """The nearest checkpoint at or before as_of, or a 400 naming where history starts"""
+    checkpoint = _latest_checkpoint(db, entity, as_of)
+    if checkpoint is None:
+        first = db.scalar(select(func.min(ChangeCheckpoint.as_of)).where(ChangeCheckpoint.entity == entity))
+        detail = f"History for {entity} starts at {first.isoformat()}" if first else f"No history recorded for {entity}"
+        raise HTTPException(status_code=400, detail=detail)
+    return checkpoint
+
+
+def _events_since(entity: str, checkpoint: ChangeCheckpoint, as_of: datetime) -> list:
+    return [ChangeEvent.entity == entity, ChangeEvent.id > checkpoint.last_event_id, ChangeEvent.changed_at <= as_of]
+
+
+def _changed_rows(db: Session, entity: str, checkpoint: ChangeCheckpoint, as_of: datetime) -> Dict[int, Optional[dict]]:
+    """State at as_of of the rows with events since the checkpoint; None where deleted or unknown.
+
+    Only these rows are replayed in Python, so the work is bounded by the
+    events of one checkpoint interval, not by the size of the table.
+    """
+    events = db.execute(
+        select(ChangeEvent.entity_id, ChangeEvent.operation, ChangeEvent.changes)
+        .where(*_events_since(entity, checkpoint, as_of))
+        .order_by(ChangeEvent.id)
+    ).all()
+    changed = list(dict.fromkeys(entity_id for entity_id, _, _ in events))
+    state = {}
+    for start in range(0, len(changed), HISTORY_BATCH_SIZE):
+        state.update(db.execute(
+            select(ChangeCheckpointRow.entity_id, ChangeCheckpointRow.state).where(
+                ChangeCheckpointRow.checkpoint_id == checkpoint.id,
+                ChangeCheckpointRow.entity_id.in_(changed[start:start + HISTORY_BATCH_SIZE])
+            )
+        ).all())
+    for entity_id, operation, changes in events:
+        _apply(state, entity_id, operation, changes)
+    return {entity_id: state.get(entity_id) for entity_id in changed}
+
+
+def _state_value(model, key: str):
+    """A checkpoint row's stored value for one attribute, typed as _jsonable wrote it"""
+    column_type = getattr(model, key).type
+    value = ChangeCheckpointRow.state[key]
+    if isinstance(column_type, types.Enum) and column_type.enum_class is not None:
+        numeric = all(isinstance(member.value, int) for member in column_type.enum_class)
+        return value.as_integer() if numeric else value.as_string()
+    if isinstance(column_type, types.Boolean):
+        return value.as_boolean()
+    if isinstance(column_type, types.Integer):
+        return value.as_integer()
+    if isinstance(column_type, types.Numeric):
+        return value.as_float()
+    return value.as_string()
+
+
+def _unchanged_rows(model, checkpoint: ChangeCheckpoint, as_of: datetime, wanted: dict):
+    """Select the stored state of checkpoint rows with no events since, matching wanted"""
+    changed_since = select(ChangeEvent.id).where(
+        ChangeEvent.entity_id == ChangeCheckpointRow.entity_id,
+        *_events_since(model.__tablename__, checkpoint, as_of)
+    )
+    return select(ChangeCheckpointRow.state).where(
+        ChangeCheckpointRow.checkpoint_id == checkpoint.id,
+        ~changed_since.exists(),
+        *[_state_value(model, key) == value for key, value in wanted.items()]
+    )
+
+
+def _matching_changed_rows(db: Session, model, checkpoint: ChangeCheckpoint, as_of: datetime, wanted: dict) -> List[dict]:
+    changed = _changed_rows(db, model.__tablename__, checkpoint, as_of)
+    return [
+        row for row in changed.values()
+        if row is not None and all(row.get(key) == value for key, value in wanted.items())
+    ]
+
+
+def create_checkpoint(db: Session, model, now: Optional[datetime] = None) -> ChangeCheckpoint:
+    """Store the entity's full state at a recent cutoff.
+
+    The first checkpoint copies the live table. Later ones replay the events
+    since the previous checkpoint, up to now minus CHANGE_CHECKPOINT_LAG_MINUTES
+    so that transactions still open when the checkpoint runs are not skipped.
+    """
+    entity = model.__tablename__
+    now = now or datetime.utcnow()
+    previous = _latest_checkpoint(db, entity)
+
+    if previous is None:
+        # Read the last event first: anything logged meanwhile is replayed again, harmlessly
+        last_event_id = db.scalar(select(func.max(ChangeEvent.id)).where(ChangeEvent.entity == entity)) or 0
+        keys = _columns(model)
+        state = {}
+        for row in db.execute(select(*[getattr(model, key) for key in keys])):
+            values = {key: _jsonable(value) for key, value in zip(keys, row)}
+            state[values["id"]] = values
+        as_of = now
+    else:
+        as_of = now - timedelta(minutes=settings.CHANGE_CHECKPOINT_LAG_MINUTES)
+        if as_of <= previous.as_of:
+            return previous
+        state = _checkpoint_state(db, previous)
+        _replay(db, entity, state, previous.last_event_id, as_of)
+        # Resume after the last event every later replay must still see
+        first_later = db.scalar(
+            select(func.min(ChangeEvent.id)).where(
+                ChangeEvent.entity == entity,
+                ChangeEvent.id > previous.last_event_id,
+                ChangeEvent.changed_at > as_of
+            )
+        )
+        if first_later is not None:
+            last_event_id = first_later - 1
+        else:
+            last_event_id = db.scalar(select(func.max(ChangeEvent.id)).where(ChangeEvent.entity == entity)) or 0
+
+    checkpoint = ChangeCheckpoint(entity=entity, as_of=as_of, last_event_id=last_event_id, row_count=len(state))
+    db.add(checkpoint)
+    db.flush()
+    rows = [{"checkpoint_id": checkpoint.id, "entity_id": entity_id, "state": row} for entity_id, row in state.items()]
+    for start in range(0, len(rows), HISTORY_BATCH_SIZE):
+        db.execute(insert(ChangeCheckpointRow.__table__), rows[start:start + HISTORY_BATCH_SIZE])
+    return checkpoint
+
+
+def create_checkpoints(db: Session) -> Dict[str, int]:
+    """Checkpoint every tracked entity; returns the rows stored per entity"""
+    return {entity: create_checkpoint(db, model).row_count for entity, model in HISTORY_MODELS.items()}
+
+
+def ensure_history_baseline(db: Session):
+    """Create the first checkpoint for entities that have none, so history starts at deployment"""
+    for entity, model in HISTORY_MODELS.items():
+        if _latest_checkpoint(db, entity) is None:
+            create_checkpoint(db, model)
+
+
+def run_scheduled_checkpoints():
+    """Scheduled job: checkpoint every tracked entity"""
+    db = SessionLocal()
+    try:
+        counts = create_checkpoints(db)
+        db.commit()
+        logger.info("Change history checkpoints created: %s", counts)
+    except Exception:
+        logger.exception("Change history checkpoint failed")
+        db.rollback()
+    finally:
+        db.close()
+
+
+def as_of_param(
+    as_of: Optional[datetime] = Query(None, description="Return the list as it was at this UTC time")
+) -> Optional[datetime]:
+    """Dependency parsing as_of for list endpoints.
+
+    A value with an offset (...Z, +02:00) is converted to naive UTC, the
+    form changed_at and checkpoint times are stored in.
+    """
+    if as_of is not None and as_of.tzinfo is not None:
+        as_of = as_of.astimezone(timezone.utc).replace(tzinfo=None)
+    return as_of
+
+
+def _wanted(criteria: dict) -> dict:
+    return {key: _jsonable(value) for key, value in criteria.items() if value is not None}
+
+
+def rows_as_of(db: Session, model, as_of: datetime, criteria: dict) -> List[dict]:
+    """Rows of a tracked model at as_of whose attributes equal the given values (None = any), by id.
+
+    Rows unchanged since the nearest checkpoint are filtered in SQL; only
+    rows with later events are replayed.
+    """
+    wanted = _wanted(criteria)
+    checkpoint = _checkpoint_for(db, model.__tablename__, as_of)
+    rows = list(db.scalars(_unchanged_rows(model, checkpoint, as_of, wanted)))
+    rows.extend(_matching_changed_rows(db, model, checkpoint, as_of, wanted))
+    rows.sort(key=lambda row: row["id"])
+    return rows
+
+
+def history_page(db: Session, model, as_of: datetime, criteria: dict, params: PageParams) -> Tuple[list, Optional[int]]:
+    """One page of a list endpoint as it was at as_of.
+
+    criteria maps attribute names to required values (None = any). Sorting
+    and skip/limit behave as in live mode; cursors are not supported. Rows
+    unchanged since the nearest checkpoint are filtered, sorted and cut to
+    skip + limit in SQL, then merged with the replayed rows that changed.
+    """
+    if params.cursor:
+        raise HTTPException(status_code=400, detail="Cursors cannot be combined with as_of; use skip")
+    wanted = _wanted(criteria)
+    checkpoint = _checkpoint_for(db, model.__tablename__, as_of)
+    unchanged = _unchanged_rows(model, checkpoint, as_of, wanted)
+    changed = _matching_changed_rows(db, model, checkpoint, as_of, wanted)
+
+    key = params.sort_column.key
+    stored = _state_value(model, key)
+    # NULLs last ascending and first descending, as in live mode
+    order = [stored.is_(None), stored, ChangeCheckpointRow.entity_id]
+    if params.descending:
+        order = [column.desc() for column in order]
+    rows = list(db.scalars(unchanged.order_by(*order).limit(params.skip + params.limit)))
+
+    def sort_key(row):
+        value = row.get(key)
+        return (value is None, 0 if value is None else value, row["id"])
+
+    rows.extend(changed)
+    rows.sort(key=sort_key, reverse=params.descending)
+    total = None
+    if params.include_total:
+        total = db.scalar(select(func.count()).select_from(unchanged.subquery())) + len(changed)
+    return rows[params.skip:params.skip + params.limit], total
+
+
+def main():
+    """Checkpoint the change history now (run from backend/: python -m services.change_history)"""
+    db = SessionLocal()
+    try:
+        counts = create_checkpoints(db)
+        db.commit()
+        for entity, rows in counts.items():
+            print(f"{entity}: {rows} rows")
+        print("✓ Change history checkpoints created")
+    except Exception as e:
+        print(f"✗ Error creating checkpoints: {e}")
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
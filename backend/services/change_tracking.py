@@ -0,0 +1,117 @@
+from sqlalchemy import select, event
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from datetime import datetime
+from typing import Iterable
+import logging
+
+from database import SessionLocal
+from models.risk import Risk
+from models.risk_quantification import RiskQuantification
+from models.control import Control, ControlFramework, ControlMapping
+from models.control_test import ControlTestRun
+from models.vendor import Vendor, VendorAssessment, VendorQuestionnaire
+from models.evidence import Evidence, EvidenceCollection
+from models.compliance import ComplianceFramework, ComplianceRequirement
+from models.entity_version import EntityVersion
+
+logger = logging.getLogger(__name__)
+
+# INSERT ... ON CONFLICT constructs of the supported databases
+UPSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+# Entity tag each model's writes are reported under
+MODEL_TAGS = {
+    Risk: "risks",
+    RiskQuantification: "risks",
+    Control: "controls",
+    ControlFramework: "controls",
+    ControlMapping: "controls",
+    ControlTestRun: "controls",
+    Vendor: "vendors",
+    VendorAssessment: "vendors",
+    VendorQuestionnaire: "vendors",
+    Evidence: "evidence",
+    EvidenceCollection: "evidence",
+    ComplianceFramework: "compliance",
+    ComplianceRequirement: "compliance",
+}
+
+ALL_TAGS = sorted(set(MODEL_TAGS.values()))
+
+_commit_hooks = []
+
+
+def on_commit(hook):
+    """Register a callable run as hook(session, changed_tags) after each commit that changed entities"""
+    _commit_hooks.append(hook)
+    return hook
+
+
+def _bump_versions(session: Session, tags: Iterable[str]):
+    """Increment each entity's version once per transaction, inside that transaction"""
+    bumped = session.info.setdefault("bumped_tags", set())
+    tags = sorted(set(tags) - bumped)
+    if not tags:
+        return
+    table = EntityVersion.__table__
+    connection = session.connection()
+    now = datetime.utcnow()
+    # One upsert, so concurrent first writes of an entity cannot both try to
+    # create its row; sorted for a fixed lock order, as with the snapshot counters
+    stmt = UPSERTS[connection.dialect.name](table).values(
+        [{"entity": tag, "version": 1, "updated_at": now} for tag in tags]
+    )
+    connection.execute(stmt.on_conflict_do_update(
+        index_elements=[table.c.entity],
+        set_={"version": table.c.version + 1, "updated_at": now}
+    ))
+    bumped.update(tags)
+
+
+def mark_changed(session: Session, *tags: str):
+    """Record changed entity tags for writes that bypass the unit of work (bulk statements)"""
+    session.info.setdefault("changed_tags", set()).update(tags)
+    _bump_versions(session, tags)
+
+
+def get_entity_versions(db: Session, tags: Iterable[str]) -> dict:
+    """Current version of each entity tag (0 if never written), via a primary key lookup"""
+    tags = sorted(set(tags))
+    rows = db.execute(
+        select(EntityVersion.entity, EntityVersion.version).where(EntityVersion.entity.in_(tags))
+    ).all()
+    versions = dict.fromkeys(tags, 0)
+    versions.update({entity: version for entity, version in rows})
+    return versions
+
+
+@event.listens_for(SessionLocal, "before_flush")
+def _collect_changed_tags(session, flush_context, instances):
+    tags = {
+        MODEL_TAGS[type(obj)]
+        for obj in (*session.new, *session.dirty, *session.deleted)
+        if type(obj) in MODEL_TAGS
+    }
+    if tags:
+        mark_changed(session, *tags)
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _run_commit_hooks(session):
+    session.info.pop("bumped_tags", None)
+    tags = session.info.pop("changed_tags", None)
+    if not tags:
+        return
+    for hook in _commit_hooks:
+        try:
+            hook(session, tags)
+        except Exception:
+            # The transaction is already committed; a failing hook must not fail the request
+            logger.exception("Commit hook %s failed", getattr(hook, "__name__", hook))
+
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _discard_changed_tags(session):
+    session.info.pop("changed_tags", None)
+    session.info.pop("bumped_tags", None)
@@ -0,0 +1,173 @@
+from sqlalchemy import select, types
+import pyarrow as pa
+import pyarrow.parquet as pq
+from typing import Iterator
+import io
+import json
+
+from database import engine
+from models.risk import Risk
+from models.control import Control, ControlFramework, ControlMapping
+from models.vendor import Vendor, VendorAssessment, VendorQuestionnaire
+from models.evidence import Evidence, EvidenceCollection
+from models.compliance import ComplianceFramework, ComplianceRequirement
+from models.dashboard import DashboardSnapshot, DailyMetrics
+
+# Rows per record batch / Parquet row group chunk
+EXPORT_BATCH_SIZE = 50000
+
+# Dataset name (table name) -> model; bookkeeping tables are not exported
+EXPORT_MODELS = {
+    model.__tablename__: model
+    for model in (
+        Risk,
+        Control, ControlFramework, ControlMapping,
+        Vendor, VendorAssessment, VendorQuestionnaire,
+        Evidence, EvidenceCollection,
+        ComplianceFramework, ComplianceRequirement,
+        DashboardSnapshot, DailyMetrics,
+    )
+}
+
+# format -> (media type, file extension)
+COLUMNAR_FORMATS = {
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+    "arrow": ("application/vnd.apache.arrow.stream", "arrows"),
+}
+
+
+def _enum_value_type(enum_class) -> pa.DataType:
+    # Integer-valued enums (likelihood, impact 1-5) stay numeric
+    if all(isinstance(member.value, int) for member in enum_class):
+        return pa.int16()
+    return pa.string()
+
+
+def _arrow_field(column) -> pa.Field:
+    """Map a SQLAlchemy column to a typed Arrow field"""
+    column_type = column.type
+    metadata = None
+    if isinstance(column_type, types.Enum) and column_type.enum_class is not None:
+        arrow_type = pa.dictionary(pa.int16(), _enum_value_type(column_type.enum_class))
+    elif isinstance(column_type, types.Boolean):
+        arrow_type = pa.bool_()
+    elif isinstance(column_type, types.BigInteger):
+        arrow_type = pa.int64()
+    elif isinstance(column_type, types.Integer):
+        arrow_type = pa.int32()
+    elif isinstance(column_type, types.Float):
+        arrow_type = pa.float64()
+    elif isinstance(column_type, types.DateTime):
+        arrow_type = pa.timestamp("us")
+    elif isinstance(column_type, types.Date):
+        arrow_type = pa.date32()
+    elif isinstance(column_type, types.JSON):
+        # Kept as JSON text so nested lists/objects of any shape round-trip
+        arrow_type = pa.string()
+        metadata = {"encoding": "json"}
+    else:
+        arrow_type = pa.string()
+    return pa.field(column.name, arrow_type, nullable=column.nullable or column.primary_key, metadata=metadata)
+
+
+def arrow_schema(model) -> pa.Schema:
+    return pa.schema([_arrow_field(column) for column in model.__table__.columns])
+
+
+def _enum_array(values, enum_class, value_type: pa.DataType) -> pa.DictionaryArray:
+    # A fixed dictionary of every member keeps batches compatible in one stream
+    dictionary = [member.value for member in enum_class]
+    positions = {member: index for index, member in enumerate(enum_class)}
+    indices = pa.array([positions.get(value) for value in values], type=pa.int16())
+    return pa.DictionaryArray.from_arrays(indices, pa.array(dictionary, type=value_type))
+
+
+def _column_array(column, field: pa.Field, values: list) -> pa.Array:
+    if pa.types.is_dictionary(field.type):
+        return _enum_array(values, column.type.enum_class, field.type.value_type)
+    if field.metadata and field.metadata.get(b"encoding") == b"json":
+        values = [json.dumps(value) if value is not None else None for value in values]
+    return pa.array(values, type=field.type)
+
+
+def iter_record_batches(model, schema: pa.Schema) -> Iterator[pa.RecordBatch]:
+    """Read a table in primary key order through a server-side cursor, one record batch per chunk"""
+    table = model.__table__
+    columns = list(table.columns)
+    stmt = select(*columns).order_by(*table.primary_key.columns)
+    with engine.connect() as conn:
+        result = conn.execution_options(yield_per=EXPORT_BATCH_SIZE).execute(stmt)
+        for rows in result.partitions():
+            arrays = [
+                _column_array(column, schema.field(index), [row[index] for row in rows])
+                for index, column in enumerate(columns)
+            ]
+            yield pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file that hands back whatever was written since the last drain"""
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _iter_parquet(model, schema: pa.Schema) -> Iterator[bytes]:
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema, compression="zstd")
+    try:
+        for batch in iter_record_batches(model, schema):
+            writer.write_batch(batch)
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+def _iter_arrow(model, schema: pa.Schema) -> Iterator[bytes]:
+    sink = _ChunkSink()
+    writer = pa.ipc.new_stream(sink, schema)
+    try:
+        yield sink.drain()
+        for batch in iter_record_batches(model, schema):
+            writer.write_batch(batch)
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+def stream_columnar_export(dataset: str, file_format: str):
+    """Return (media type, filename, byte iterator) for a Parquet or Arrow IPC export of one table"""
+    model = EXPORT_MODELS[dataset]
+    media_type, extension = COLUMNAR_FORMATS[file_format]
+    writer = _iter_parquet if file_format == "parquet" else _iter_arrow
+    return media_type, f"{dataset}.{extension}", writer(model, arrow_schema(model))
+
+
+def describe_datasets() -> list:
+    """Dataset names with their Arrow column types"""
+    return [
+        {
+            "dataset": dataset,
+            "columns": [{"name": field.name, "type": str(field.type)} for field in arrow_schema(model)]
+        }
+        for dataset, model in EXPORT_MODELS.items()
+    ]
@@ -0,0 +1,39 @@
+from fastapi import Depends, HTTPException, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+import hashlib
+import json
+
+from database import get_async_db
+from services.change_tracking import get_entity_versions
+
+
+def _matches(if_none_match: str, etag: str) -> bool:
+    # If-None-Match uses weak comparison and may list several tags
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return "*" in candidates or any(
+        candidate.removeprefix("W/") == etag for candidate in candidates
+    )
+
+
+def conditional_get(*tags: str):
+    """Dependency emitting an ETag derived from entity versions and answering If-None-Match with 304.
+
+    The ETag covers the request path and query and the versions of every tag the
+    response is built from, so the check is a primary key lookup and the
+    endpoint's own query is skipped when nothing has changed.
+    """
+    async def dependency(request: Request, response: Response, db: AsyncSession = Depends(get_async_db)):
+        versions = await db.run_sync(get_entity_versions, tags)
+        raw = json.dumps(
+            {"path": request.url.path, "query": request.url.query, "versions": versions},
+            sort_keys=True
+        )
+        etag = f'"{hashlib.sha1(raw.encode()).hexdigest()}"'
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and _matches(if_none_match, etag):
+            raise HTTPException(status_code=304, headers=headers)
+        response.headers.update(headers)
+
+    return dependency
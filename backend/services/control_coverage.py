@@ -0,0 +1,118 @@
+from sqlalchemy import select, func, distinct
+from sqlalchemy.orm import Session, outerjoin
+from typing import Dict, List, Optional, Sequence
+
+from models.control import Control, ControlFramework, ControlMapping, ControlStatus
+from services.statistics import grouped_aggregates
+
+# Dimensions the coverage breakdowns can be drilled down by
+COVERAGE_DIMENSIONS = {
+    "responsible_team": Control.responsible_team,
+    "owner": Control.owner,
+}
+
+# Framework coverage counts a mapping as implemented by its own compliance
+# status only; a mapping without one is counted but not implemented
+MAPPING_STATUS = ControlMapping.compliance_status
+
+# Every control once, with each of its framework mappings
+COVERAGE_SOURCE = outerjoin(Control, ControlMapping, ControlMapping.control_id == Control.id)
+
+
+def _percentage(part: int, whole: int) -> float:
+    return (part / whole * 100) if whole > 0 else 0
+
+
+def _status_counts() -> Dict[str, int]:
+    return {status.value: 0 for status in ControlStatus}
+
+
+def _summary(total: int, status_rows: List[tuple], framework_rows: List[tuple], frameworks: List[tuple]) -> dict:
+    """Shape one scope's grouped rows: (status, controls, mappings) and (framework, status, controls, mappings)"""
+    by_status = _status_counts()
+    for status, controls, _ in status_rows:
+        if status is not None:
+            by_status[status.value] = controls
+
+    framework_totals = {framework_id: 0 for framework_id, _ in frameworks}
+    framework_statuses = {framework_id: _status_counts() for framework_id, _ in frameworks}
+    unmapped = 0
+    for framework_id, status, controls, mappings in framework_rows:
+        if framework_id is None:
+            # The outer join's NULL side: controls without any mapping
+            unmapped += controls
+            continue
+        framework_totals[framework_id] += mappings
+        if status is not None:
+            framework_statuses[framework_id][status.value] += mappings
+
+    return {
+        "total_controls": total,
+        "by_status": {
+            status: {"count": count, "percentage": _percentage(count, total)}
+            for status, count in by_status.items()
+        },
+        "by_framework": [
+            {
+                "framework": name,
+                "total_controls": framework_totals[framework_id],
+                "implemented": framework_statuses[framework_id][ControlStatus.IMPLEMENTED.value],
+                "coverage_percentage": _percentage(
+                    framework_statuses[framework_id][ControlStatus.IMPLEMENTED.value], framework_totals[framework_id]
+                ),
+                "by_status": framework_statuses[framework_id],
+            }
+            for framework_id, name in frameworks
+        ],
+        "unmapped_controls": unmapped,
+    }
+
+
+def control_coverage(db: Session, group_by: Optional[str] = None, filters: Sequence = ()) -> dict:
+    """Control coverage by status and by framework and status, from one grouped query.
+
+    Control counts are distinct controls; framework counts are mappings, by
+    the mapping's own compliance status (not the control's).
+    With group_by ("responsible_team" or "owner") the same breakdowns are
+    also returned per value of that column. The framework list is read
+    separately so frameworks without mappings are still listed.
+    """
+    dimension = COVERAGE_DIMENSIONS[group_by] if group_by else None
+    status_set = (Control.status,)
+    framework_set = (ControlMapping.framework_id, MAPPING_STATUS)
+    grouping_sets = [status_set, framework_set]
+    if dimension is not None:
+        grouping_sets += [(dimension, *status_set), (dimension, *framework_set)]
+
+    (total, _), results = grouped_aggregates(
+        db, COVERAGE_SOURCE, grouping_sets,
+        [func.count(distinct(Control.id)), func.count(ControlMapping.id)],
+        filters
+    )
+    frameworks = db.execute(
+        select(ControlFramework.id, ControlFramework.name).order_by(ControlFramework.id)
+    ).all()
+
+    coverage = _summary(total or 0, results[0], results[1], frameworks)
+    if dimension is None:
+        return coverage
+
+    status_groups: Dict[Optional[str], List[tuple]] = {}
+    for value, *row in results[2]:
+        status_groups.setdefault(value, []).append(tuple(row))
+    framework_groups: Dict[Optional[str], List[tuple]] = {}
+    for value, *row in results[3]:
+        framework_groups.setdefault(value, []).append(tuple(row))
+
+    coverage["group_by"] = group_by
+    coverage["groups"] = [
+        {
+            group_by: value,
+            **_summary(
+                sum(controls for _, controls, _ in rows), rows, framework_groups.get(value, []), frameworks
+            ),
+        }
+        # Unassigned (NULL) last
+        for value, rows in sorted(status_groups.items(), key=lambda item: (item[0] is None, item[0] or ""))
+    ]
+    return coverage
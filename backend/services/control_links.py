@@ -0,0 +1,240 @@
+from sqlalchemy import select, insert, delete, update, func, case, or_, cast, literal, event, inspect
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Session
+from typing import Iterable, List, Optional, Sequence
+
+from database import SessionLocal
+from models.risk import Risk
+from models.control import Control, ControlStatus
+from models.compliance import ComplianceRequirement, ComplianceStatus
+from models.control_link import RiskControlLink, RequirementControlLink
+from services.change_tracking import mark_changed
+from services.change_history import record_updates
+from services.dashboard_metrics import count_where
+from services.risk_scoring import rescore_risks
+
+# Owner model -> (link model, owner key column, JSON list attribute it mirrors)
+LINKS = {
+    Risk: (RiskControlLink, RiskControlLink.risk_id, "control_ids"),
+    ComplianceRequirement: (RequirementControlLink, RequirementControlLink.requirement_id, "mapped_controls"),
+}
+
+# Control fields that linked risk scores and requirement compliance depend on
+PROPAGATED_FIELDS = {"status", "effectiveness_rating"}
+
+# Link rows per executemany INSERT during the backfill
+BACKFILL_BATCH_SIZE = 5000
+
+# A requirement's compliance is the average of its applicable mapped controls
+CONTROL_COMPLIANCE = {
+    ControlStatus.IMPLEMENTED: 100.0,
+    ControlStatus.PARTIALLY_IMPLEMENTED: 50.0,
+}
+
+
+def replace_links(db, model, owner_pks: List[int], control_ids: Optional[Iterable[str]]):
+    """Point each owner's links at exactly the given control IDs; unknown IDs are skipped.
+
+    db may be a Session or a Connection, so flush listeners can use it.
+    """
+    link, owner_column, _ = LINKS[model]
+    if not owner_pks:
+        return
+    db.execute(delete(link).where(owner_column.in_(owner_pks)))
+    control_ids = list(dict.fromkeys(control_ids or []))
+    if not control_ids:
+        return
+    control_pks = db.execute(select(Control.id).where(Control.control_id.in_(control_ids))).scalars().all()
+    if control_pks:
+        db.execute(insert(link), [
+            {owner_column.key: owner_pk, "control_id": control_pk}
+            for owner_pk in owner_pks
+            for control_pk in control_pks
+        ])
+
+
+def _lists_naming(connection, column, control_id: str):
+    """WHERE clause for owners whose JSON control list contains control_id"""
+    if connection.dialect.name == "postgresql":
+        return cast(column, JSONB).contains([control_id])
+    # SQLite has no JSON containment operator
+    elements = func.json_each(column).table_valued("value")
+    return select(literal(1)).select_from(elements).where(elements.c.value == control_id).exists()
+
+
+def _link_control(connection, control_pk: int, control_id: str):
+    """Point a control's links at exactly the owners whose JSON lists name it.
+
+    Owners skip control IDs that do not exist yet, so a control created or
+    renamed after them is linked here. Scans the JSON lists once, which is
+    fine for control inserts and renames but not for hot paths.
+    """
+    for model, (link, owner_column, attribute) in LINKS.items():
+        connection.execute(delete(link).where(link.control_id == control_pk))
+        connection.execute(
+            insert(link).from_select(
+                [owner_column.key, "control_id"],
+                select(model.id, literal(control_pk)).where(
+                    _lists_naming(connection, getattr(model, attribute), control_id)
+                )
+            )
+        )
+
+
+@event.listens_for(SessionLocal, "after_flush")
+def _sync_links(session, flush_context):
+    # Attribute history still reflects the flush here, and new rows have their IDs
+    changed = [
+        obj for obj in (*session.new, *session.dirty)
+        if type(obj) in LINKS and (
+            obj in session.new or inspect(obj).attrs[LINKS[type(obj)][2]].history.has_changes()
+        )
+    ]
+    deleted = [obj for obj in session.deleted if type(obj) in LINKS]
+    controls = [
+        obj for obj in (*session.new, *session.dirty)
+        if isinstance(obj, Control) and (obj in session.new or inspect(obj).attrs.control_id.history.has_changes())
+    ]
+    removed_controls = [obj.id for obj in session.deleted if isinstance(obj, Control)]
+    if not (changed or deleted or controls or removed_controls):
+        return
+    connection = session.connection()
+    for obj in changed:
+        replace_links(connection, type(obj), [obj.id], getattr(obj, LINKS[type(obj)][2]))
+    for obj in deleted:
+        link, owner_column, _ = LINKS[type(obj)]
+        connection.execute(delete(link).where(owner_column == obj.id))
+    # After the owners, so owners flushed together with a control are included
+    for obj in controls:
+        _link_control(connection, obj.id, obj.control_id)
+    if removed_controls:
+        for link, _, _ in LINKS.values():
+            connection.execute(delete(link).where(link.control_id.in_(removed_controls)))
+
+
+def linked_risk_ids(control_pks: Sequence[int]):
+    """Subquery of the risks mitigated by the given controls, served by the link index"""
+    return select(RiskControlLink.risk_id).where(RiskControlLink.control_id.in_(control_pks))
+
+
+def linked_requirement_ids(control_pks: Sequence[int]):
+    """Subquery of the requirements mapped to the given controls, served by the link index"""
+    return select(RequirementControlLink.requirement_id).where(RequirementControlLink.control_id.in_(control_pks))
+
+
+def refresh_requirement_compliance(db: Session, filters: Sequence = ()) -> dict:
+    """Recompute compliance of the matching requirements from their mapped controls.
+
+    Only requirements with at least one mapped control are touched, and only
+    rows whose values changed are written. The caller commits.
+    """
+    applicable = or_(Control.status.is_(None), Control.status != ControlStatus.NOT_APPLICABLE)
+    score = case(
+        *[(Control.status == status, value) for status, value in CONTROL_COMPLIANCE.items()],
+        else_=0.0
+    )
+    rows = db.execute(
+        select(
+            ComplianceRequirement.id,
+            ComplianceRequirement.status,
+            ComplianceRequirement.compliance_percentage,
+            func.avg(case((applicable, score))).label("percentage"),
+            count_where(applicable).label("applicable"),
+        )
+        .join(RequirementControlLink, RequirementControlLink.requirement_id == ComplianceRequirement.id)
+        .join(Control, Control.id == RequirementControlLink.control_id)
+        .where(*filters)
+        .group_by(ComplianceRequirement.id, ComplianceRequirement.status, ComplianceRequirement.compliance_percentage)
+    ).all()
+
+    changes = []
+    for pk, old_status, old_percentage, percentage, applicable_count in rows:
+        percentage = round(float(percentage or 0.0), 2)
+        if not applicable_count:
+            status = ComplianceStatus.NOT_APPLICABLE
+        elif percentage >= 100:
+            status = ComplianceStatus.COMPLIANT
+        elif percentage > 0:
+            status = ComplianceStatus.PARTIALLY_COMPLIANT
+        else:
+            status = ComplianceStatus.NON_COMPLIANT
+        if status != old_status or percentage != old_percentage:
+            changes.append({"id": pk, "status": status, "compliance_percentage": percentage})
+
+    if changes:
+        db.execute(update(ComplianceRequirement), changes)
+        record_updates(db, ComplianceRequirement, changes)
+        mark_changed(db, "compliance")
+    return {"scanned": len(rows), "updated": len(changes)}
+
+
+def propagate_control_changes(db: Session, control_pks: Sequence[int]) -> dict:
+    """Re-score the risks and refresh the requirements linked to changed controls, and nothing else"""
+    if not control_pks:
+        return {"risks": {"scanned": 0, "updated": 0}, "requirements": {"scanned": 0, "updated": 0}}
+    return {
+        "risks": rescore_risks(db, [Risk.id.in_(linked_risk_ids(control_pks))]),
+        "requirements": refresh_requirement_compliance(
+            db, [ComplianceRequirement.id.in_(linked_requirement_ids(control_pks))]
+        ),
+    }
+
+
+def backfill_links(db: Session) -> dict:
+    """Rebuild both link tables from the JSON control lists. The caller commits."""
+    control_pks = dict(db.execute(select(Control.control_id, Control.id)).all())
+    counts = {}
+    for model, (link, owner_column, attribute) in LINKS.items():
+        db.execute(delete(link))
+        inserted = unknown = 0
+        pending = []
+        for owner_pk, control_ids in db.execute(select(model.id, getattr(model, attribute))).all():
+            for control_id in dict.fromkeys(control_ids or []):
+                if control_id not in control_pks:
+                    unknown += 1
+                    continue
+                pending.append({owner_column.key: owner_pk, "control_id": control_pks[control_id]})
+            if len(pending) >= BACKFILL_BATCH_SIZE:
+                db.execute(insert(link), pending)
+                inserted += len(pending)
+                pending = []
+        if pending:
+            db.execute(insert(link), pending)
+            inserted += len(pending)
+        counts[link.__tablename__] = {"links": inserted, "unknown_control_ids": unknown}
+    mark_changed(db, "risks", "controls", "compliance")
+    return counts
+
+
+def ensure_control_links(db: Session) -> Optional[dict]:
+    """Backfill the link tables on first start after they were added"""
+    if db.scalar(select(RiskControlLink.risk_id).limit(1)) is not None:
+        return None
+    if db.scalar(select(RequirementControlLink.requirement_id).limit(1)) is not None:
+        return None
+    has_lists = any(
+        db.scalar(select(model.id).where(getattr(model, attribute).isnot(None)).limit(1)) is not None
+        for model, (_, _, attribute) in LINKS.items()
+    )
+    return backfill_links(db) if has_lists else None
+
+
+def main():
+    """Rebuild the control link tables (run from backend/: python -m services.control_links)"""
+    db = SessionLocal()
+    try:
+        counts = backfill_links(db)
+        db.commit()
+        for table, result in counts.items():
+            print(f"{table}: {result['links']} links, {result['unknown_control_ids']} unknown control IDs skipped")
+        print("✓ Control links rebuilt")
+    except Exception as e:
+        print(f"✗ Error rebuilding control links: {e}")
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
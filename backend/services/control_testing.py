@@ -0,0 +1,277 @@
+from sqlalchemy import select, insert, update, exists, or_, event, inspect
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from datetime import datetime, timedelta
+from typing import List, Optional, Sequence
+import logging
+
+from celery_app import celery_app
+from config import settings
+from database import SessionLocal
+from models.control import Control, ControlStatus
+from models.control_test import ControlTestRun, ControlTestResult
+from models.evidence import Evidence, EvidenceStatus
+from services.change_tracking import mark_changed
+from services.change_history import record_updates
+
+logger = logging.getLogger(__name__)
+
+# Control attributes the next test date is computed from
+SCHEDULE_FIELDS = {"status", "test_frequency_days", "last_tested"}
+
+# Rows per executemany UPDATE when rescheduling in bulk
+RESCHEDULE_BATCH_SIZE = 5000
+
+
+def next_test_due(status, frequency_days: Optional[int], last_tested: Optional[datetime],
+                  current: Optional[datetime], now: datetime) -> Optional[datetime]:
+    """When a control's next test is due.
+
+    One frequency after the last test; a control never tested keeps any date
+    already set, otherwise it is due now. Controls without a frequency, or
+    marked Not Applicable, are not scheduled (None keeps them out of the due index).
+    """
+    if not frequency_days or frequency_days <= 0 or status == ControlStatus.NOT_APPLICABLE:
+        return None
+    if last_tested is None:
+        return current or now
+    return last_tested + timedelta(days=frequency_days)
+
+
+@event.listens_for(SessionLocal, "before_flush")
+def _schedule_tests(session, flush_context, instances):
+    now = datetime.utcnow()
+    for obj in (*session.new, *session.dirty):
+        if type(obj) is not Control:
+            continue
+        attrs = inspect(obj).attrs
+        if obj in session.new or any(attrs[key].history.has_changes() for key in SCHEDULE_FIELDS):
+            obj.next_test_date = next_test_due(
+                obj.status, obj.test_frequency_days, obj.last_tested, obj.next_test_date, now
+            )
+
+
+def reschedule_controls(db: Session, filters: Sequence = ()) -> dict:
+    """Recompute next_test_date for the matching controls.
+
+    Bulk writes bypass the flush hook; call this after them. Only rows whose
+    date changed are written. The caller commits.
+    """
+    now = datetime.utcnow()
+    rows = db.execute(
+        select(Control.id, Control.status, Control.test_frequency_days, Control.last_tested, Control.next_test_date)
+        .where(*filters)
+    ).all()
+    changes = []
+    for pk, status, frequency_days, last_tested, current in rows:
+        due = next_test_due(status, frequency_days, last_tested, current, now)
+        if due != current:
+            changes.append({"id": pk, "next_test_date": due})
+
+    for start in range(0, len(changes), RESCHEDULE_BATCH_SIZE):
+        db.execute(update(Control), changes[start:start + RESCHEDULE_BATCH_SIZE])
+    if changes:
+        record_updates(db, Control, changes)
+        mark_changed(db, "controls")
+    return {"scanned": len(rows), "updated": len(changes)}
+
+
+def ensure_test_schedule(db: Session) -> dict:
+    """Schedule controls that have a test frequency but no next test date yet"""
+    return reschedule_controls(db, [Control.test_frequency_days.isnot(None), Control.next_test_date.is_(None)])
+
+
+def due_controls(until: datetime):
+    """Select the controls due for testing by until; a range scan of the partial due index"""
+    return select(Control).where(Control.next_test_date <= until)
+
+
+def _open_run(control_pk):
+    return exists().where(ControlTestRun.control_id == control_pk, ControlTestRun.completed_at.is_(None))
+
+
+def queue_due_tests(db: Session, now: Optional[datetime] = None, limit: Optional[int] = None) -> List[int]:
+    """Open a test run for each due control that has none, earliest due first.
+
+    Reads only due rows through the due index, never the whole table.
+    Returns the new run IDs. The caller commits.
+    """
+    now = now or datetime.utcnow()
+    due = db.execute(
+        select(Control.id, Control.next_test_date)
+        .where(Control.next_test_date <= now, ~_open_run(Control.id))
+        .order_by(Control.next_test_date, Control.id)
+        .limit(limit or settings.CONTROL_TEST_DISPATCH_BATCH)
+    ).all()
+    if not due:
+        return []
+    run_ids = db.scalars(
+        insert(ControlTestRun).returning(ControlTestRun.id),
+        [{"control_id": pk, "due_at": due_at, "queued_at": now} for pk, due_at in due]
+    ).all()
+    mark_changed(db, "controls")
+    return run_ids
+
+
+def send_queued_runs(db: Session, limit: Optional[int] = None) -> int:
+    """Enqueue a worker task for each open run not sent yet.
+
+    Runs stay unsent when the broker is unreachable and go out on the next
+    pass. The caller commits.
+    """
+    run_ids = db.scalars(
+        select(ControlTestRun.id)
+        .where(ControlTestRun.completed_at.is_(None), ControlTestRun.dispatched_at.is_(None))
+        .order_by(ControlTestRun.id)
+        .limit(limit or settings.CONTROL_TEST_DISPATCH_BATCH)
+    ).all()
+    sent = []
+    for run_id in run_ids:
+        try:
+            run_control_test.delay(run_id)
+        except Exception as e:
+            logger.warning("Could not enqueue control test run %s: %s", run_id, e)
+            break
+        sent.append(run_id)
+    if sent:
+        db.execute(
+            update(ControlTestRun)
+            .where(ControlTestRun.id.in_(sent))
+            .values(dispatched_at=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        )
+        mark_changed(db, "controls")
+    return len(sent)
+
+
+def dispatch_due_tests(db: Session) -> dict:
+    """Queue runs for due controls and hand them to the workers"""
+    try:
+        queued = queue_due_tests(db)
+        # Workers must see the runs before their tasks arrive
+        db.commit()
+    except IntegrityError:
+        # Another process opened runs for the same controls first
+        db.rollback()
+        queued = []
+    sent = send_queued_runs(db)
+    db.commit()
+    return {"queued": len(queued), "sent": sent}
+
+
+def run_scheduled_dispatch():
+    """Scheduled job: dispatch due control tests"""
+    db = SessionLocal()
+    try:
+        result = dispatch_due_tests(db)
+        if result["queued"] or result["sent"]:
+            logger.info("Control tests dispatched: %s", result)
+    except Exception:
+        logger.exception("Control test dispatch failed")
+        db.rollback()
+    finally:
+        db.close()
+
+
+def record_test_result(db: Session, control: Control, result: ControlTestResult,
+                       tested_at: Optional[datetime] = None, tested_by: Optional[str] = None,
+                       notes: Optional[str] = None, effectiveness_rating: Optional[int] = None,
+                       automated: bool = False, run: Optional[ControlTestRun] = None) -> ControlTestRun:
+    """Record a completed test, closing the control's open run if any.
+
+    Setting last_tested reschedules the control through the flush hook.
+    The caller commits.
+    """
+    now = datetime.utcnow()
+    if run is None:
+        run = db.scalar(
+            select(ControlTestRun).where(ControlTestRun.control_id == control.id, ControlTestRun.completed_at.is_(None))
+        )
+    if run is None:
+        run = ControlTestRun(control_id=control.id, due_at=control.next_test_date, queued_at=now)
+        db.add(run)
+    run.result = result
+    run.completed_at = now
+    run.automated = automated
+    run.tested_by = tested_by
+    run.notes = notes
+
+    control.last_tested = tested_at or now
+    control.test_status = result.value
+    if effectiveness_rating is not None:
+        control.effectiveness_rating = effectiveness_rating
+    control.updated_at = now
+    return run
+
+
+def _current_evidence(db: Session, control: Control, now: datetime) -> Optional[Evidence]:
+    """Verified, unexpired evidence for the control collected within its test period"""
+    return db.scalar(
+        select(Evidence)
+        .where(
+            Evidence.control_id == control.control_id,
+            Evidence.status == EvidenceStatus.VERIFIED,
+            Evidence.collection_date >= now - timedelta(days=control.test_frequency_days or 0),
+            or_(Evidence.valid_until.is_(None), Evidence.valid_until >= now)
+        )
+        .order_by(Evidence.collection_date.desc())
+        .limit(1)
+    )
+
+
+def execute_test_run(db: Session, run_id: int) -> Optional[ControlTestRun]:
+    """Run the automated check for a queued test.
+
+    The control passes when current verified evidence exists; otherwise the
+    run stays open as Pending Review until a manual result is recorded.
+    Runs already completed are skipped, so redelivered tasks are harmless.
+    The caller commits.
+    """
+    run = db.get(ControlTestRun, run_id, with_for_update=True)
+    if run is None or run.completed_at is not None:
+        return None
+    control = db.get(Control, run.control_id)
+    now = datetime.utcnow()
+    evidence = _current_evidence(db, control, now)
+    if evidence is None:
+        run.result = ControlTestResult.PENDING_REVIEW
+        run.notes = "No current verified evidence; manual test required"
+        return run
+    return record_test_result(
+        db, control, ControlTestResult.PASSED, tested_at=now, automated=True,
+        notes=f"Verified evidence {evidence.evidence_id}", run=run
+    )
+
+
+@celery_app.task(name="control_testing.run_test")
+def run_control_test(run_id: int):
+    """Worker task: execute one queued control test"""
+    db = SessionLocal()
+    try:
+        execute_test_run(db, run_id)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def main():
+    """Recompute every control's next test date (run from backend/: python -m services.control_testing)"""
+    db = SessionLocal()
+    try:
+        result = reschedule_controls(db)
+        db.commit()
+        print(f"Controls scanned: {result['scanned']}, rescheduled: {result['updated']}")
+        print("✓ Control test schedule rebuilt")
+    except Exception as e:
+        print(f"✗ Error rebuilding control test schedule: {e}")
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
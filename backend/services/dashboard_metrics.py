@@ -0,0 +1,49 @@
+from sqlalchemy import select, func, case, and_
+from sqlalchemy.orm import Session
+from datetime import datetime, timedelta
+
+from models.control import Control
+from models.vendor import Vendor
+from models.evidence import Evidence
+from models.compliance import ComplianceFramework
+
+
+def count_where(*conditions):
+    """Conditional aggregate: count rows matching all conditions"""
+    return func.count(case((and_(*conditions), 1)))
+
+
+def get_alert_counters(db: Session) -> dict:
+    """Get the time-dependent dashboard alert counters in a single statement"""
+    now = datetime.utcnow()
+    in_30_days = now + timedelta(days=30)
+
+    # These depend on the current time, so they cannot be kept in the snapshot;
+    # each is a range count over an indexed date column
+    controls_needing_testing = select(func.count()).select_from(Control).where(
+        Control.next_test_date <= now
+    )
+    assessments_due = select(func.count()).select_from(Vendor).where(
+        Vendor.next_assessment_date <= in_30_days
+    )
+    expiring_evidence = select(func.count()).select_from(Evidence).where(
+        Evidence.valid_until <= in_30_days,
+        Evidence.valid_until >= now
+    )
+
+    stmt = select(
+        controls_needing_testing.scalar_subquery().label("controls_needing_testing"),
+        assessments_due.scalar_subquery().label("assessments_due"),
+        expiring_evidence.scalar_subquery().label("expiring_evidence"),
+    )
+    return dict(db.execute(stmt).mappings().one())
+
+
+def get_active_frameworks(db: Session) -> list:
+    """Get name, compliance percentage and status of active compliance frameworks"""
+    stmt = select(
+        ComplianceFramework.name,
+        ComplianceFramework.overall_compliance_percentage,
+        ComplianceFramework.status,
+    ).where(ComplianceFramework.is_active == True)
+    return db.execute(stmt).all()
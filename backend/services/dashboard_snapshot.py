@@ -0,0 +1,290 @@
+from sqlalchemy import select, update, insert, func, event, inspect
+from sqlalchemy.orm import Session
+from datetime import datetime
+from collections import defaultdict
+
+from database import SessionLocal
+from models.risk import Risk, RiskStatus
+from models.control import Control, ControlStatus
+from models.vendor import Vendor, VendorStatus
+from models.evidence import Evidence, EvidenceStatus
+from models.dashboard import DashboardSnapshot
+from services.dashboard_metrics import count_where
+
+
+# Counters maintained per tracked model. Each entry pairs the columns a row
+# contributes from, a per-row contribution function used for incremental
+# updates, and the equivalent SQL aggregates used for a full rebuild.
+
+def _risk_contribution(v: dict) -> dict:
+    inherent = v["inherent_risk_score"]
+    return {
+        "total_risks": 1,
+        "open_risks": int(v["status"] == RiskStatus.OPEN),
+        "critical_risks": int(inherent is not None and inherent >= 15),
+        "sum_inherent_risk": inherent or 0,
+        "sum_residual_risk": v["residual_risk_score"] or 0,
+    }
+
+
+def _control_contribution(v: dict) -> dict:
+    orchestration = v["system_orchestration_level"]
+    return {
+        "total_controls": 1,
+        "implemented_controls": int(v["status"] == ControlStatus.IMPLEMENTED),
+        "orchestrated_controls": int(orchestration is not None and orchestration >= 80),
+    }
+
+
+def _vendor_contribution(v: dict) -> dict:
+    active = v["status"] == VendorStatus.ACTIVE
+    risk_score = v["risk_score"]
+    return {
+        "active_vendors": int(active),
+        "high_risk_vendors": int(active and risk_score is not None and risk_score >= 75),
+    }
+
+
+def _evidence_contribution(v: dict) -> dict:
+    return {
+        "total_evidence": 1,
+        "verified_evidence": int(v["status"] == EvidenceStatus.VERIFIED),
+    }
+
+
+TRACKED_MODELS = {
+    Risk: (
+        ("status", "inherent_risk_score", "residual_risk_score"),
+        _risk_contribution,
+        lambda: [
+            func.count().label("total_risks"),
+            count_where(Risk.status == RiskStatus.OPEN).label("open_risks"),
+            count_where(Risk.inherent_risk_score >= 15).label("critical_risks"),
+            func.coalesce(func.sum(Risk.inherent_risk_score), 0).label("sum_inherent_risk"),
+            func.coalesce(func.sum(Risk.residual_risk_score), 0).label("sum_residual_risk"),
+        ],
+    ),
+    Control: (
+        ("status", "system_orchestration_level"),
+        _control_contribution,
+        lambda: [
+            func.count().label("total_controls"),
+            count_where(Control.status == ControlStatus.IMPLEMENTED).label("implemented_controls"),
+            count_where(Control.system_orchestration_level >= 80).label("orchestrated_controls"),
+        ],
+    ),
+    Vendor: (
+        ("status", "risk_score"),
+        _vendor_contribution,
+        lambda: [
+            count_where(Vendor.status == VendorStatus.ACTIVE).label("active_vendors"),
+            count_where(
+                Vendor.status == VendorStatus.ACTIVE,
+                Vendor.risk_score >= 75
+            ).label("high_risk_vendors"),
+        ],
+    ),
+    Evidence: (
+        ("status",),
+        _evidence_contribution,
+        lambda: [
+            func.count().label("total_evidence"),
+            count_where(Evidence.status == EvidenceStatus.VERIFIED).label("verified_evidence"),
+        ],
+    ),
+}
+
+SNAPSHOT_METRICS = [
+    label.name
+    for _, _, aggregates in TRACKED_MODELS.values()
+    for label in aggregates()
+]
+
+
+def _column_default(model, attr: str):
+    """Scalar column default applied at INSERT time, if any"""
+    default = model.__table__.columns[attr].default
+    if default is not None and default.is_scalar:
+        return default.arg
+    return None
+
+
+def _current_values(obj, attrs) -> dict:
+    values = {}
+    for attr in attrs:
+        value = getattr(obj, attr)
+        if value is None and inspect(obj).pending:
+            value = _column_default(type(obj), attr)
+        values[attr] = value
+    return values
+
+
+def _committed_values(obj, attrs) -> dict:
+    state = inspect(obj)
+    values = {}
+    for attr in attrs:
+        history = state.attrs[attr].history
+        if history.deleted:
+            values[attr] = history.deleted[0]
+        elif history.unchanged:
+            values[attr] = history.unchanged[0]
+        else:
+            values[attr] = None if history.added else getattr(obj, attr)
+    return values
+
+
+def _collect_deltas(session: Session) -> dict:
+    deltas = defaultdict(float)
+
+    def apply(contribution: dict, sign: int):
+        for metric, value in contribution.items():
+            deltas[metric] += sign * value
+
+    for obj in session.new:
+        tracked = TRACKED_MODELS.get(type(obj))
+        if tracked:
+            attrs, contribution, _ = tracked
+            apply(contribution(_current_values(obj, attrs)), 1)
+
+    for obj in session.dirty:
+        tracked = TRACKED_MODELS.get(type(obj))
+        if tracked and session.is_modified(obj):
+            attrs, contribution, _ = tracked
+            apply(contribution(_committed_values(obj, attrs)), -1)
+            apply(contribution(_current_values(obj, attrs)), 1)
+
+    for obj in session.deleted:
+        tracked = TRACKED_MODELS.get(type(obj))
+        if tracked:
+            attrs, contribution, _ = tracked
+            apply(contribution(_committed_values(obj, attrs)), -1)
+
+    return {metric: delta for metric, delta in deltas.items() if delta}
+
+
+def apply_snapshot_deltas(session: Session, deltas: dict):
+    """Increment snapshot counters within the session's transaction"""
+    table = DashboardSnapshot.__table__
+    connection = session.connection()
+    now = datetime.utcnow()
+    # Fixed lock order so concurrent writers cannot deadlock on counter rows
+    for metric in sorted(deltas):
+        connection.execute(
+            update(table)
+            .where(table.c.metric == metric)
+            .values(value=table.c.value + deltas[metric], updated_at=now)
+        )
+
+
+def _apply_and_stash(session: Session, deltas: dict):
+    apply_snapshot_deltas(session, deltas)
+    # Kept until commit so listeners can report what the transaction changed
+    pending = session.info.setdefault("snapshot_deltas", defaultdict(float))
+    for metric, delta in deltas.items():
+        pending[metric] += delta
+
+
+def record_bulk_insert(session: Session, model, rows: list):
+    """Count rows written with a bulk INSERT, which bypasses the flush hook"""
+    tracked = TRACKED_MODELS.get(model)
+    if not tracked or not rows:
+        return
+    attrs, contribution, _ = tracked
+    deltas = defaultdict(float)
+    for row in rows:
+        values = {attr: row.get(attr, _column_default(model, attr)) for attr in attrs}
+        for metric, value in contribution(values).items():
+            deltas[metric] += value
+    deltas = {metric: delta for metric, delta in deltas.items() if delta}
+    if deltas:
+        _apply_and_stash(session, deltas)
+
+
+@event.listens_for(SessionLocal, "before_flush")
+def _maintain_snapshot(session, flush_context, instances):
+    deltas = _collect_deltas(session)
+    if deltas:
+        _apply_and_stash(session, deltas)
+
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _discard_snapshot_deltas(session):
+    session.info.pop("snapshot_deltas", None)
+
+
+def row_counters(db: Session, model, filters=()) -> dict:
+    """Snapshot counters contributed by the matching rows of one model (empty if untracked)"""
+    tracked = TRACKED_MODELS.get(model)
+    if not tracked:
+        return {}
+    _, _, aggregates = tracked
+    row = db.execute(select(*aggregates()).select_from(model).where(*filters)).mappings().one()
+    return {metric: float(value or 0) for metric, value in row.items()}
+
+
+def record_bulk_update(session: Session, model, before: dict, filters):
+    """Count rows changed by a bulk UPDATE, which bypasses the flush hook.
+
+    before is row_counters() for the same filters, read just ahead of the
+    UPDATE; the difference from the rows' counters now is applied.
+    """
+    after = row_counters(session, model, filters)
+    deltas = {metric: after[metric] - before[metric] for metric in after if after[metric] != before[metric]}
+    if deltas:
+        _apply_and_stash(session, deltas)
+
+
+def compute_counters(db: Session, models=None) -> dict:
+    """Compute snapshot counters from the base tables, one statement per table"""
+    counters = {}
+    for model in TRACKED_MODELS:
+        if models is None or model in models:
+            counters.update(row_counters(db, model))
+    return counters
+
+
+def rebuild_snapshot(db: Session, models=None) -> dict:
+    """Recompute snapshot counters from scratch, correcting any drift"""
+    table = DashboardSnapshot.__table__
+    counters = compute_counters(db, models)
+    now = datetime.utcnow()
+    for metric in sorted(counters):
+        result = db.execute(
+            update(table)
+            .where(table.c.metric == metric)
+            .values(value=counters[metric], updated_at=now)
+        )
+        if result.rowcount == 0:
+            db.execute(insert(table).values(metric=metric, value=counters[metric], updated_at=now))
+    return counters
+
+
+def read_snapshot(db: Session) -> dict:
+    """Read all snapshot counters, building the snapshot on first use"""
+    rows = db.execute(select(DashboardSnapshot.metric, DashboardSnapshot.value)).all()
+    snapshot = {metric: value for metric, value in rows}
+    if not all(metric in snapshot for metric in SNAPSHOT_METRICS):
+        snapshot = rebuild_snapshot(db)
+        db.commit()
+    return snapshot
+
+
+def main():
+    """Rebuild the dashboard snapshot (run from backend/: python -m services.dashboard_snapshot)"""
+    db = SessionLocal()
+    try:
+        counters = rebuild_snapshot(db)
+        db.commit()
+        for metric, value in sorted(counters.items()):
+            print(f"{metric}: {value:g}")
+        print("✓ Dashboard snapshot rebuilt")
+    except Exception as e:
+        print(f"✗ Error rebuilding dashboard snapshot: {e}")
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
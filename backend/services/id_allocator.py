@@ -0,0 +1,133 @@
+from sqlalchemy import select, update, insert, func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from datetime import datetime
+from typing import List, Optional
+
+from database import engine, async_engine
+from models.risk import Risk
+from models.control import Control
+from models.vendor import Vendor, VendorAssessment
+from models.evidence import Evidence, EvidenceCollection
+from models.id_sequence import IdSequence
+
+# Business ID column per model; each (model, prefix) pair is its own series
+BUSINESS_ID_COLUMNS = {
+    Risk: Risk.risk_id,
+    Control: Control.control_id,
+    Vendor: Vendor.vendor_id,
+    VendorAssessment: VendorAssessment.assessment_id,
+    Evidence: Evidence.evidence_id,
+    EvidenceCollection: EvidenceCollection.collection_id,
+}
+
+MODELS_BY_TABLE = {model.__tablename__: model for model in BUSINESS_ID_COLUMNS}
+
+
+def _sequence_name(model, prefix: str) -> str:
+    return f"{model.__tablename__}:{prefix}"
+
+
+def _highest_issued_statement(model, prefix: str):
+    column = BUSINESS_ID_COLUMNS[model]
+    # Longest, then greatest, ID sorts the highest number first even past the padding width
+    return (
+        select(column)
+        .where(column.like(f"{prefix}-%"))
+        .order_by(func.length(column).desc(), column.desc())
+        .limit(1)
+    )
+
+
+def _parse_number(business_id, prefix: str) -> int:
+    suffix = business_id[len(prefix) + 1:] if business_id else ""
+    return int(suffix) if suffix.isdigit() else 0
+
+
+def _increment(connection, name: str, count: int) -> Optional[int]:
+    table = IdSequence.__table__
+    return connection.scalar(
+        update(table)
+        .where(table.c.name == name)
+        .values(last_value=table.c.last_value + count, updated_at=datetime.utcnow())
+        .returning(table.c.last_value)
+    )
+
+
+def _create_series(connection, model, prefix: str, count: int) -> int:
+    # First use of a series: continue after the highest ID already stored
+    highest = connection.scalar(_highest_issued_statement(model, prefix))
+    last = _parse_number(highest, prefix) + count
+    connection.execute(
+        insert(IdSequence.__table__).values(
+            name=_sequence_name(model, prefix),
+            last_value=last,
+            updated_at=datetime.utcnow()
+        )
+    )
+    return last
+
+
+def _format_ids(prefix: str, width: int, last: int, count: int) -> List[str]:
+    return [f"{prefix}-{number:0{width}d}" for number in range(last - count + 1, last + 1)]
+
+
+async def reserve_ids(model, prefix: str, width: int, count: int = 1) -> List[str]:
+    """Reserve `count` consecutive business IDs such as RISK-00042.
+
+    The counter row is incremented in its own short transaction, so
+    concurrent requests never receive the same number and the row lock is
+    not held for the rest of the caller's transaction. Numbers reserved by a
+    transaction that later rolls back are skipped, not reused.
+    """
+    name = _sequence_name(model, prefix)
+    async with async_engine.begin() as conn:
+        last = await conn.run_sync(_increment, name, count)
+
+    if last is None:
+        try:
+            async with async_engine.begin() as conn:
+                last = await conn.run_sync(_create_series, model, prefix, count)
+        except IntegrityError:
+            # Another worker created the series first
+            async with async_engine.begin() as conn:
+                last = await conn.run_sync(_increment, name, count)
+
+    return _format_ids(prefix, width, last, count)
+
+
+def reserve_ids_sync(model, prefix: str, width: int, count: int = 1) -> List[str]:
+    """reserve_ids() for synchronous callers such as bulk imports run in a worker thread"""
+    name = _sequence_name(model, prefix)
+    with engine.begin() as conn:
+        last = _increment(conn, name, count)
+
+    if last is None:
+        try:
+            with engine.begin() as conn:
+                last = _create_series(conn, model, prefix, count)
+        except IntegrityError:
+            with engine.begin() as conn:
+                last = _increment(conn, name, count)
+
+    return _format_ids(prefix, width, last, count)
+
+
+def resync_id_sequences(db: Session) -> dict:
+    """Advance every series past IDs written without the allocator (e.g. sample data)"""
+    table = IdSequence.__table__
+    synced = {}
+    for name, last_value in db.execute(select(table.c.name, table.c.last_value)).all():
+        table_name, prefix = name.split(":", 1)
+        model = MODELS_BY_TABLE.get(table_name)
+        if model is None:
+            continue
+        highest = _parse_number(db.scalar(_highest_issued_statement(model, prefix)), prefix)
+        if highest > last_value:
+            db.execute(
+                update(table)
+                .where(table.c.name == name, table.c.last_value < highest)
+                .values(last_value=highest, updated_at=datetime.utcnow())
+            )
+        synced[name] = max(highest, last_value)
+    return synced
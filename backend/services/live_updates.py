@@ -0,0 +1,185 @@
+from fastapi import Request
+from sqlalchemy import event, inspect, or_, select
+from sqlalchemy.orm import Session
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import asyncio
+import json
+import logging
+import time
+import redis
+import redis.asyncio as aioredis
+
+from config import settings
+from database import SessionLocal, AsyncSessionLocal
+from models.risk import Risk, RiskStatus
+from models.evidence import Evidence, EvidenceStatus
+from models.vendor import VendorAssessment, AssessmentStatus
+from services.change_tracking import on_commit
+from services.dashboard_snapshot import read_snapshot
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "grc:dashboard:events"
+CLIENT_QUEUE_SIZE = 100
+HEARTBEAT_SECONDS = 15
+REDIS_RETRY_SECONDS = 5
+
+# Status transitions reported as named events: (model, new status, event name, business id attribute)
+STATUS_EVENTS = [
+    (Risk, RiskStatus.CLOSED, "risk.closed", "risk_id"),
+    (Evidence, EvidenceStatus.VERIFIED, "evidence.verified", "evidence_id"),
+    (VendorAssessment, AssessmentStatus.COMPLETED, "assessment.completed", "assessment_id"),
+]
+
+
+class DashboardBroadcaster:
+    """Fans dashboard events out to this worker's stream clients via Redis pub/sub"""
+
+    def __init__(self):
+        self._clients = set()
+        self._loop = None
+        self._listener = None
+        self._publisher = None
+        self._publisher_down_until = 0.0
+        # One thread sends every event, in commit order, so publishing never blocks a commit
+        self._publish_thread = ThreadPoolExecutor(max_workers=1, thread_name_prefix="dashboard-publish")
+
+    async def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        if self._listener:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+
+    async def _listen(self):
+        """Relay every message on the shared channel to local clients, reconnecting on failure"""
+        while True:
+            client = aioredis.from_url(settings.REDIS_URL)
+            try:
+                async with client.pubsub() as pubsub:
+                    await pubsub.subscribe(CHANNEL)
+                    async for message in pubsub.listen():
+                        if message["type"] == "message":
+                            self._deliver(message["data"].decode())
+            except (redis.RedisError, OSError) as e:
+                logger.warning(f"Dashboard event subscription lost, retrying: {e}")
+                await asyncio.sleep(REDIS_RETRY_SECONDS)
+            finally:
+                await client.aclose()
+
+    def subscribe(self) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=CLIENT_QUEUE_SIZE)
+        self._clients.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self._clients.discard(queue)
+
+    def _deliver(self, payload: str):
+        for queue in list(self._clients):
+            try:
+                queue.put_nowait(payload)
+            except asyncio.QueueFull:
+                # Slow client: drop its backlog and tell it to refetch instead
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(json.dumps({"type": "resync"}))
+
+    def publish(self, event: dict):
+        """Queue an event for every worker; returns at once, even when called on the event loop"""
+        self._publish_thread.submit(self._send, json.dumps(event, default=str))
+
+    def _send(self, payload: str):
+        # Runs on the publish thread; falls back to this worker when Redis is down
+        if time.monotonic() >= self._publisher_down_until:
+            try:
+                if self._publisher is None:
+                    self._publisher = redis.Redis.from_url(
+                        settings.REDIS_URL,
+                        socket_connect_timeout=0.5,
+                        socket_timeout=0.5
+                    )
+                self._publisher.publish(CHANNEL, payload)
+                return
+            except redis.RedisError as e:
+                logger.warning(f"Redis unavailable, delivering dashboard event locally: {e}")
+                self._publisher_down_until = time.monotonic() + REDIS_RETRY_SECONDS
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._deliver, payload)
+
+
+broadcaster = DashboardBroadcaster()
+
+
+async def dashboard_event_stream(request: Request):
+    """Server-sent event stream: current counters first, then a delta per committed write"""
+    queue = broadcaster.subscribe()
+    try:
+        async with AsyncSessionLocal() as db:
+            counters = await db.run_sync(read_snapshot)
+        yield f"data: {json.dumps({'type': 'snapshot', 'counters': counters})}\n\n"
+        
+        while not await request.is_disconnected():
+            try:
+                payload = await asyncio.wait_for(queue.get(), timeout=HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                # Comment line keeps proxies from closing an idle connection
+                yield ": keepalive\n\n"
+                continue
+            yield f"data: {payload}\n\n"
+    finally:
+        broadcaster.unsubscribe(queue)
+
+
+@event.listens_for(SessionLocal, "before_flush")
+def _collect_events(session, flush_context, instances):
+    events = session.info.setdefault("live_events", [])
+    for obj in session.new:
+        if isinstance(obj, Risk):
+            events.append({"event": "risk.created", "id": obj.risk_id})
+    for obj in session.dirty:
+        for model, status, name, id_attr in STATUS_EVENTS:
+            if isinstance(obj, model):
+                history = inspect(obj).attrs.status.history
+                if history.added and history.added[0] == status and status not in history.deleted:
+                    events.append({"event": name, "id": getattr(obj, id_attr)})
+
+
+def record_status_changes(session: Session, model, filters, status):
+    """Queue the named events for rows a bulk UPDATE is about to move into status.
+
+    Bulk writes bypass the flush hook; call this before the UPDATE so rows
+    already in that status are left out. Sent with the commit's delta.
+    """
+    for event_model, event_status, name, id_attr in STATUS_EVENTS:
+        if event_model is model and event_status == status:
+            moved = session.scalars(
+                select(getattr(model, id_attr))
+                .where(*filters, or_(model.status != status, model.status.is_(None)))
+                .order_by(model.id)
+            )
+            session.info.setdefault("live_events", []).extend({"event": name, "id": key} for key in moved)
+
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _discard_events(session):
+    session.info.pop("live_events", None)
+
+
+@on_commit
+def publish_dashboard_delta(session: Session, tags: set):
+    deltas = session.info.pop("snapshot_deltas", {})
+    events = session.info.pop("live_events", [])
+    broadcaster.publish({
+        "type": "delta",
+        "timestamp": datetime.utcnow().isoformat(),
+        "entities": sorted(tags),
+        "counters": {metric: delta for metric, delta in deltas.items() if delta},
+        "events": events
+    })
@@ -0,0 +1,150 @@
+from sqlalchemy import select, delete, insert, func
+from sqlalchemy.orm import Session
+from datetime import date, datetime, timedelta
+import argparse
+import logging
+
+from database import SessionLocal
+from models.risk import Risk
+from models.control import Control
+from models.vendor import Vendor, VendorAssessment
+from models.evidence import Evidence, EvidenceStatus
+from models.dashboard import DailyMetrics
+
+logger = logging.getLogger(__name__)
+
+# Rollup column -> (timestamp column the event is dated by, extra filters)
+ROLLUP_SOURCES = {
+    "new_risks": (Risk.created_at, ()),
+    "closed_risks": (Risk.closed_at, ()),
+    "new_controls": (Control.created_at, ()),
+    "new_vendors": (Vendor.created_at, ()),
+    "assessments_completed": (VendorAssessment.completion_date, ()),
+    "new_evidence": (Evidence.created_at, ()),
+    "verified_evidence": (Evidence.review_date, (Evidence.status == EvidenceStatus.VERIFIED,)),
+}
+
+METRIC_COLUMNS = list(ROLLUP_SOURCES)
+
+
+def _as_date(value) -> date:
+    # func.date() returns a date on PostgreSQL and an ISO string on SQLite
+    return value if isinstance(value, date) else date.fromisoformat(value)
+
+
+def rollup_days(db: Session, start_day: date, end_day: date) -> int:
+    """Recompute daily_metrics rows for [start_day, end_day] from the entity tables"""
+    start = datetime.combine(start_day, datetime.min.time())
+    end = datetime.combine(end_day + timedelta(days=1), datetime.min.time())
+
+    rows = {}
+    for metric, (timestamp, filters) in ROLLUP_SOURCES.items():
+        # Range predicate on an indexed timestamp; only the window is read
+        day = func.date(timestamp)
+        stmt = (
+            select(day, func.count())
+            .where(timestamp >= start, timestamp < end, *filters)
+            .group_by(day)
+        )
+        for value, count in db.execute(stmt):
+            rows.setdefault(_as_date(value), dict.fromkeys(METRIC_COLUMNS, 0))[metric] = count
+
+    # Replace the window atomically; readers keep seeing the old rows until commit
+    db.execute(delete(DailyMetrics).where(DailyMetrics.day >= start_day, DailyMetrics.day <= end_day))
+    now = datetime.utcnow()
+    values = []
+    current = start_day
+    while current <= end_day:
+        values.append({"day": current, "updated_at": now, **rows.get(current, dict.fromkeys(METRIC_COLUMNS, 0))})
+        current += timedelta(days=1)
+    db.execute(insert(DailyMetrics), values)
+    return len(values)
+
+
+def _first_stale_day(db: Session, today: date) -> date:
+    """First day whose rollup may be missing or out of date.
+
+    That is the last day rolled up (it may have been cut short) but never
+    later than yesterday; with no rollup yet, the day of the earliest event.
+    """
+    last = db.scalar(select(func.max(DailyMetrics.day)))
+    if last is not None:
+        return min(_as_date(last), today - timedelta(days=1))
+    earliest = [db.scalar(select(func.min(timestamp))) for timestamp, _ in ROLLUP_SOURCES.values()]
+    earliest = [value.date() for value in earliest if value is not None]
+    return min(earliest, default=today)
+
+
+def rollup_missing_days(db: Session) -> int:
+    """Roll up every day from the first stale one through today, e.g. after the scheduler was down"""
+    today = datetime.utcnow().date()
+    return rollup_days(db, _first_stale_day(db, today), today)
+
+
+def run_scheduled_rollup():
+    """Scheduled job: finish the days since the last run and refresh today's running counts"""
+    db = SessionLocal()
+    try:
+        rollup_missing_days(db)
+        db.commit()
+    except Exception:
+        logger.exception("Daily metrics rollup failed")
+        db.rollback()
+    finally:
+        db.close()
+
+
+def _bucket_start(day: date, bucket: str) -> date:
+    if bucket == "week":
+        return day - timedelta(days=day.weekday())
+    return day
+
+
+def get_trend_series(db: Session, start_day: date, end_day: date, bucket: str = "day") -> list:
+    """Read pre-aggregated daily rows and group them into day or week buckets"""
+    rows = db.execute(
+        select(DailyMetrics)
+        .where(DailyMetrics.day >= start_day, DailyMetrics.day <= end_day)
+        .order_by(DailyMetrics.day)
+    ).scalars()
+
+    series = {}
+    current = _bucket_start(start_day, bucket)
+    step = timedelta(days=7 if bucket == "week" else 1)
+    while current <= end_day:
+        series[current] = dict.fromkeys(METRIC_COLUMNS, 0)
+        current += step
+
+    for row in rows:
+        totals = series[_bucket_start(row.day, bucket)]
+        for metric in METRIC_COLUMNS:
+            totals[metric] += getattr(row, metric) or 0
+
+    return [
+        {"period_start": period.isoformat(), **totals}
+        for period, totals in series.items()
+    ]
+
+
+def main():
+    """Backfill daily metrics (run from backend/: python -m services.metrics_rollup --days 365)"""
+    parser = argparse.ArgumentParser(description="Backfill the daily_metrics rollup table")
+    parser.add_argument("--days", type=int, default=365, help="Number of days to rebuild, ending today")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        today = datetime.utcnow().date()
+        count = rollup_days(db, today - timedelta(days=args.days - 1), today)
+        db.commit()
+        print(f"✓ Rolled up {count} days of metrics")
+    except Exception as e:
+        print(f"✗ Error rolling up metrics: {e}")
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+from fastapi import HTTPException, Query, Response
+from sqlalchemy import DateTime, select, func, tuple_, and_, or_
+from sqlalchemy.orm import Session
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+import base64
+import json
+
+
+def encode_cursor(values: list) -> str:
+    """Encode sort-key values into an opaque, URL-safe cursor"""
+    raw = json.dumps(values, default=str, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> list:
+    """Decode a cursor produced by encode_cursor, rejecting malformed input"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(values, list) or len(values) != size:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
+
+
+class PageParams:
+    """Pagination and sort options shared by the list endpoints"""
+
+    def __init__(self, sort_column, descending: bool, limit: int, skip: int,
+                 cursor: Optional[str], include_total: bool, sort: str):
+        self.sort_column = sort_column
+        self.descending = descending
+        self.limit = limit
+        self.skip = skip
+        self.cursor = cursor
+        self.include_total = include_total
+        self.sort = sort
+
+
+def page_params(sort_columns: dict, default_sort: str = "id"):
+    """Dependency parsing skip/limit, cursor, sort and order for a list endpoint.
+
+    sort_columns maps each allowed sort name to its column; the primary key
+    breaks ties so the order is total and stable.
+    """
+    sort_pattern = "^(" + "|".join(sort_columns) + ")$"
+
+    def dependency(
+        skip: int = Query(0, ge=0),
+        limit: int = Query(100, ge=1, le=1000),
+        cursor: Optional[str] = None,
+        sort: str = Query(default_sort, pattern=sort_pattern),
+        order: str = Query("asc", pattern="^(asc|desc)$"),
+        include_total: bool = False
+    ) -> PageParams:
+        if cursor and skip:
+            raise HTTPException(status_code=400, detail="Use either skip or cursor, not both")
+        return PageParams(sort_columns[sort], order == "desc", limit, skip, cursor, include_total, sort)
+
+    return dependency
+
+
+def _cursor_value(column, value):
+    if value is None:
+        return None
+    if isinstance(column.type, DateTime):
+        return datetime.fromisoformat(value)
+    return column.type.python_type(value)
+
+
+def _after(column, id_column, value, last_id, descending: bool):
+    """Rows strictly after (value, last_id) in the page order.
+
+    Ascending order puts NULLs last and descending order puts them first,
+    matching a plain b-tree scan in either direction.
+    """
+    if column is id_column or not column.expression.nullable:
+        key, last = tuple_(column, id_column), tuple_(value, last_id)
+        return key < last if descending else key > last
+
+    if descending:
+        if value is None:
+            return or_(column.is_not(None), and_(column.is_(None), id_column < last_id))
+        return or_(column < value, and_(column == value, id_column < last_id))
+    if value is None:
+        return and_(column.is_(None), id_column > last_id)
+    return or_(column > value, and_(column == value, id_column > last_id), column.is_(None))
+
+
+def paginate(db: Session, query, id_column, params: PageParams,
+             columns: Optional[Dict[str, Any]] = None) -> Tuple[list, Optional[str], Optional[int]]:
+    """Fetch one page of an ORM select.
+
+    With a cursor the page starts right after the cursor's row (keyset
+    pagination, so fetching any page costs the same); otherwise skip is
+    used as an offset. Returns the rows, the next page's cursor (None on the
+    last page) and the total row count when requested.
+
+    When columns (name -> column) is given only those columns are selected
+    and rows are plain dicts keyed by name instead of ORM objects.
+    """
+    column = params.sort_column
+    extra = {}
+    if columns is not None:
+        # The cursor needs the sort key and id even when they were not asked for
+        extra = {c.key: c for c in (column, id_column) if c.key not in columns}
+        query = query.with_only_columns(*[c.label(name) for name, c in {**columns, **extra}.items()])
+    total = None
+    if params.include_total:
+        total = db.execute(select(func.count()).select_from(query.order_by(None).subquery())).scalar_one()
+
+    if column is id_column:
+        order = [id_column.desc() if params.descending else id_column.asc()]
+    elif params.descending:
+        order = [column.desc().nulls_first(), id_column.desc()]
+    else:
+        order = [column.asc().nulls_last(), id_column.asc()]
+    stmt = query.order_by(*order).limit(params.limit + 1)
+
+    if params.cursor:
+        sort, value, last_id = decode_cursor(params.cursor, 3)
+        if sort != params.sort:
+            raise HTTPException(status_code=400, detail="Cursor was issued for a different sort")
+        try:
+            value, last_id = _cursor_value(column, value), int(last_id)
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        stmt = stmt.where(_after(column, id_column, value, last_id, params.descending))
+    elif params.skip:
+        stmt = stmt.offset(params.skip)
+
+    if columns is None:
+        rows = db.scalars(stmt).all()
+        value_of = getattr
+    else:
+        # Plain column rows need no ORM loading; build the dicts directly
+        keys = [*columns, *extra]
+        rows = [dict(zip(keys, row)) for row in db.connection().execute(stmt).all()]
+        value_of = dict.__getitem__
+    next_cursor = None
+    if len(rows) > params.limit:
+        rows = rows[:params.limit]
+        last = rows[-1]
+        value = value_of(last, column.key)
+        next_cursor = encode_cursor([
+            params.sort,
+            value.isoformat() if isinstance(value, datetime) else value,
+            value_of(last, id_column.key)
+        ])
+    if extra:
+        for row in rows:
+            for key in extra:
+                del row[key]
+    return rows, next_cursor, total
+
+
+def set_page_headers(response: Response, next_cursor: Optional[str], total: Optional[int]):
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    if total is not None:
+        response.headers["X-Total-Count"] = str(total)
@@ -0,0 +1,132 @@
+from sqlalchemy import select
+from openpyxl import Workbook
+from datetime import datetime
+from tempfile import SpooledTemporaryFile
+from typing import Iterator, Optional
+import csv
+import io
+import json
+
+from database import SessionLocal
+from models.risk import Risk
+from schemas.risk import RiskExportFilter
+
+# Rows fetched per round trip from the server-side cursor
+EXPORT_BATCH_SIZE = 1000
+# Workbooks larger than this spill from memory to a temp file
+SPOOL_MAX_BYTES = 16 * 1024 * 1024
+STREAM_CHUNK_BYTES = 64 * 1024
+
+
+def _enum_value(value):
+    return value.value if value else None
+
+
+# Column header -> value for one risk
+EXPORT_COLUMNS = [
+    ("Risk ID", lambda r: r.risk_id),
+    ("Title", lambda r: r.title),
+    ("Description", lambda r: r.description),
+    ("Category", lambda r: _enum_value(r.category)),
+    ("Status", lambda r: _enum_value(r.status)),
+    ("Likelihood", lambda r: _enum_value(r.likelihood)),
+    ("Impact", lambda r: _enum_value(r.impact)),
+    ("Inherent Risk Score", lambda r: r.inherent_risk_score),
+    ("Residual Risk Score", lambda r: r.residual_risk_score),
+    ("Risk Level", lambda r: r.get_risk_level(r.inherent_risk_score) if r.inherent_risk_score else None),
+    ("Owner", lambda r: r.owner),
+    ("Threat Source", lambda r: r.threat_source),
+    ("Vulnerability", lambda r: r.vulnerability),
+    ("Mitigation Strategy", lambda r: r.mitigation_strategy),
+    ("Created At", lambda r: r.created_at),
+    ("Updated At", lambda r: r.updated_at),
+]
+
+HEADERS = [header for header, _ in EXPORT_COLUMNS]
+
+
+def _export_statement(filters: Optional[RiskExportFilter]):
+    stmt = select(Risk).order_by(Risk.id)
+    if filters:
+        if filters.category:
+            stmt = stmt.where(Risk.category == filters.category)
+        if filters.status:
+            stmt = stmt.where(Risk.status == filters.status)
+        if filters.min_score:
+            stmt = stmt.where(Risk.inherent_risk_score >= filters.min_score)
+        if filters.max_score:
+            stmt = stmt.where(Risk.inherent_risk_score <= filters.max_score)
+    return stmt
+
+
+def iter_export_rows(filters: Optional[RiskExportFilter]) -> Iterator[list]:
+    """Yield one list of cell values per risk, fetched in batches from a server-side cursor"""
+    db = SessionLocal()
+    try:
+        result = db.scalars(
+            _export_statement(filters).execution_options(yield_per=EXPORT_BATCH_SIZE)
+        )
+        for risk in result:
+            yield [value(risk) for _, value in EXPORT_COLUMNS]
+            # Batches are not needed once written; keep the identity map small
+            db.expunge(risk)
+    finally:
+        db.close()
+
+
+def _iter_csv(rows: Iterator[list]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(HEADERS)
+    for row in rows:
+        writer.writerow(row)
+        if buffer.tell() >= STREAM_CHUNK_BYTES:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode()
+
+
+def _iter_ndjson(rows: Iterator[list]) -> Iterator[bytes]:
+    # Chunked like the CSV writer; one chunk per row would cost a threadpool hop per row
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write(json.dumps(dict(zip(HEADERS, row)), default=str))
+        buffer.write("\n")
+        if buffer.tell() >= STREAM_CHUNK_BYTES:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def _iter_xlsx(rows: Iterator[list]) -> Iterator[bytes]:
+    # An xlsx file is a zip archive, so it can only be sent once complete;
+    # the write-only workbook and spooled file keep memory bounded meanwhile.
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Risk Register")
+    sheet.append(HEADERS)
+    for row in rows:
+        sheet.append(row)
+
+    with SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES) as output:
+        workbook.save(output)
+        output.seek(0)
+        while chunk := output.read(STREAM_CHUNK_BYTES):
+            yield chunk
+
+
+# File extension -> (media type, writer)
+EXPORT_FORMATS = {
+    "xlsx": ("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", _iter_xlsx),
+    "csv": ("text/csv", _iter_csv),
+    "ndjson": ("application/x-ndjson", _iter_ndjson),
+}
+
+
+def stream_risk_export(filters: Optional[RiskExportFilter], file_format: str):
+    """Return (media type, filename, byte iterator) for a risk register export"""
+    media_type, writer = EXPORT_FORMATS[file_format]
+    filename = f"risk_register_{datetime.now().strftime('%Y%m%d')}.{file_format}"
+    return media_type, filename, writer(iter_export_rows(filters))
@@ -0,0 +1,151 @@
+from sqlalchemy import insert
+from openpyxl import load_workbook
+from typing import BinaryIO, Iterator, Tuple
+import csv
+import io
+
+from database import SessionLocal
+from models.risk import Risk, RiskCategory, RiskStatus, RiskLikelihood, RiskImpact
+from services.change_tracking import mark_changed
+from services.dashboard_snapshot import record_bulk_insert
+from services.change_history import record_changes
+from services.id_allocator import reserve_ids_sync
+from services.risk_scoring import ScoringModel, get_scoring_model
+
+IMPORT_CHUNK_SIZE = 1000
+MAX_REPORTED_ERRORS = 1000
+
+# Sheet column -> Risk attribute for free-text fields
+TEXT_COLUMNS = {
+    "Title": "title",
+    "Description": "description",
+    "Owner": "owner",
+    "Threat Source": "threat_source",
+    "Vulnerability": "vulnerability",
+    "Mitigation Strategy": "mitigation_strategy",
+}
+
+# Sheet column -> (Risk attribute, enum, default member name)
+ENUM_COLUMNS = {
+    "Category": ("category", RiskCategory, "OPERATIONAL"),
+    "Likelihood": ("likelihood", RiskLikelihood, "POSSIBLE"),
+    "Impact": ("impact", RiskImpact, "MODERATE"),
+}
+
+
+def iter_sheet_rows(file: BinaryIO, filename: str) -> Iterator[Tuple[int, dict]]:
+    """Yield (row number, {header: value}) from a CSV or .xlsx file without loading it whole"""
+    if filename.lower().endswith(".csv"):
+        reader = csv.DictReader(io.TextIOWrapper(file, encoding="utf-8-sig", newline=""))
+        # Header is row 1
+        for row_number, row in enumerate(reader, start=2):
+            yield row_number, row
+        return
+
+    if not filename.lower().endswith((".xlsx", ".xlsm")):
+        raise ValueError("Unsupported file type; upload a .xlsx or .csv file")
+
+    workbook = load_workbook(file, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = [str(cell).strip() if cell is not None else "" for cell in next(rows, ())]
+        for row_number, values in enumerate(rows, start=2):
+            if all(value is None for value in values):
+                continue
+            yield row_number, dict(zip(header, values))
+    finally:
+        workbook.close()
+
+
+def _clean(value):
+    if value is None:
+        return None
+    value = str(value).strip()
+    return value or None
+
+
+def _enum_member(enum_cls, column: str, raw, default: str):
+    value = _clean(raw) or default
+    name = value.upper().replace(" ", "_")
+    if name in enum_cls.__members__:
+        return enum_cls[name]
+    # Also accept the display value, e.g. "Technology" or a 1-5 score
+    for member in enum_cls:
+        if str(member.value).lower() == value.lower():
+            return member
+    raise ValueError(f"Invalid {column} '{value}'")
+
+
+def parse_risk_row(row: dict, model: ScoringModel) -> dict:
+    """Validate one sheet row into Risk column values; raises ValueError on bad input"""
+    values = {attr: _clean(row.get(column)) for column, attr in TEXT_COLUMNS.items()}
+    if not values["title"]:
+        raise ValueError("Title is required")
+    for column, (attr, enum_cls, default) in ENUM_COLUMNS.items():
+        values[attr] = _enum_member(enum_cls, column, row.get(column), default)
+
+    # Imported risks have no linked controls yet, so residual starts at inherent
+    score = float(model.matrix[values["likelihood"].value - 1, values["impact"].value - 1])
+    values.update(
+        status=RiskStatus.OPEN,
+        inherent_risk_score=score,
+        residual_risk_score=score
+    )
+    return values
+
+
+def _insert_chunk(db, chunk: list):
+    for values, risk_id in zip(chunk, reserve_ids_sync(Risk, "RISK", 5, len(chunk))):
+        values["risk_id"] = risk_id
+    db.execute(insert(Risk), chunk)
+    record_bulk_insert(db, Risk, chunk)
+    record_changes(db, Risk, [Risk.risk_id.in_([values["risk_id"] for values in chunk])], operation="insert")
+
+
+def import_risks(file: BinaryIO, filename: str) -> dict:
+    """Validate and bulk-insert risks from a CSV or Excel upload, chunk by chunk.
+
+    Memory use is bounded by the chunk size rather than the file size. Valid
+    rows are inserted in one transaction; invalid rows are reported by row
+    number and skipped.
+    """
+    db = SessionLocal()
+    imported_count = 0
+    error_count = 0
+    errors = []
+    chunk = []
+    try:
+        model = get_scoring_model(db)
+        for row_number, row in iter_sheet_rows(file, filename):
+            try:
+                chunk.append(parse_risk_row(row, model))
+            except ValueError as e:
+                error_count += 1
+                if len(errors) < MAX_REPORTED_ERRORS:
+                    errors.append(f"Row {row_number}: {e}")
+                continue
+
+            if len(chunk) >= IMPORT_CHUNK_SIZE:
+                _insert_chunk(db, chunk)
+                imported_count += len(chunk)
+                chunk = []
+
+        if chunk:
+            _insert_chunk(db, chunk)
+            imported_count += len(chunk)
+
+        if imported_count:
+            mark_changed(db, "risks")
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+    return {
+        "success": True,
+        "imported_count": imported_count,
+        "error_count": error_count,
+        "errors": errors
+    }
@@ -0,0 +1,125 @@
+from sqlalchemy import select, func, cast, literal
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Session
+from typing import List, Optional
+
+from models.risk import Risk, RISK_LEVEL_THRESHOLDS
+from services.dashboard_metrics import count_where
+
+RISK_LEVELS = [level for _, level in RISK_LEVEL_THRESHOLDS] + ["Low"]
+
+
+def risk_level(score: float) -> str:
+    """Risk level for a score, as Risk.get_risk_level"""
+    for threshold, level in RISK_LEVEL_THRESHOLDS:
+        if score >= threshold:
+            return level
+    return "Low"
+
+
+def get_risk_score_summary(db: Session, *filters) -> dict:
+    """Get risk count, average scores and risk level distribution in one aggregate query"""
+    score = Risk.inherent_risk_score
+    level = Risk.risk_level_expression(score)
+    
+    stmt = select(
+        func.count().label("total"),
+        func.coalesce(func.sum(Risk.inherent_risk_score), 0).label("sum_inherent"),
+        func.coalesce(func.sum(Risk.residual_risk_score), 0).label("sum_residual"),
+        # Unscored risks (NULL or 0) are left out of the level distribution
+        *[
+            count_where(score.isnot(None), score != 0, level == name).label(name)
+            for name in RISK_LEVELS
+        ]
+    ).select_from(Risk).where(*filters)
+    row = db.execute(stmt).mappings().one()
+    
+    # Unscored risks count as zero in the averages
+    total = row["total"]
+    return {
+        "total": total,
+        "average_inherent_score": row["sum_inherent"] / max(total, 1),
+        "average_residual_score": row["sum_residual"] / max(total, 1),
+        "by_risk_level": {name: row[name] for name in RISK_LEVELS}
+    }
+
+
+def _has_tag(tag: str):
+    # One json_each probe per tag; SQLite has no JSON containment operator
+    elements = func.json_each(Risk.tags).table_valued("value")
+    return select(literal(1)).select_from(elements).where(elements.c.value == tag).exists()
+
+
+def risk_filters(
+    db: Session,
+    category=None,
+    owner: Optional[str] = None,
+    tags: Optional[List[str]] = None
+) -> list:
+    """WHERE clauses for the optional risk register filters; `tags` must all be present"""
+    filters = []
+    if category:
+        filters.append(Risk.category == category)
+    if owner:
+        filters.append(Risk.owner == owner)
+    if tags:
+        if db.get_bind().dialect.name == "postgresql":
+            filters.append(cast(Risk.tags, JSONB).contains(tags))
+        else:
+            filters.extend(_has_tag(tag) for tag in tags)
+    return filters
+
+
+def aggregate_risk_heatmap(
+    db: Session,
+    filters: list,
+    score_column=Risk.inherent_risk_score,
+    ids_limit: Optional[int] = None,
+    ids_offset: int = 0
+) -> list:
+    """Aggregate risks into (likelihood, impact) cells in the database.
+
+    Each cell carries its count, the level of its highest score and up to
+    `ids_limit` risk IDs (highest score first, skipping `ids_offset` per
+    cell). `ids_limit=None` returns every ID, 0 returns none.
+    """
+    cells_stmt = (
+        select(
+            Risk.likelihood,
+            Risk.impact,
+            func.count().label("count"),
+            func.max(score_column).label("max_score"),
+            func.avg(score_column).label("average_score"),
+        )
+        .where(*filters)
+        .group_by(Risk.likelihood, Risk.impact)
+        .order_by(Risk.likelihood, Risk.impact)
+    )
+    cells = {}
+    for row in db.execute(cells_stmt).mappings():
+        cells[(row["likelihood"], row["impact"])] = {
+            "likelihood": row["likelihood"].value,
+            "impact": row["impact"].value,
+            "count": row["count"],
+            "risk_level": risk_level(row["max_score"] or 0),
+            "average_score": row["average_score"],
+            "risks": []
+        }
+
+    if cells and ids_limit != 0:
+        # Rank within each cell so the page is cut per cell in a single query
+        rank = func.row_number().over(
+            partition_by=(Risk.likelihood, Risk.impact),
+            order_by=(score_column.desc().nulls_last(), Risk.risk_id)
+        ).label("rank")
+        ranked = select(Risk.likelihood, Risk.impact, Risk.risk_id, rank).where(*filters).subquery()
+        ids_stmt = select(ranked.c.likelihood, ranked.c.impact, ranked.c.risk_id).where(
+            ranked.c.rank > ids_offset
+        )
+        if ids_limit is not None:
+            ids_stmt = ids_stmt.where(ranked.c.rank <= ids_offset + ids_limit)
+        ids_stmt = ids_stmt.order_by(ranked.c.likelihood, ranked.c.impact, ranked.c.rank)
+        for likelihood, impact, risk_id in db.execute(ids_stmt):
+            cells[(likelihood, impact)]["risks"].append(risk_id)
+
+    return list(cells.values())
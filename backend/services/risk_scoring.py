@@ -0,0 +1,223 @@
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+from typing import Dict, Iterable, Optional, Sequence
+import logging
+import time
+
+import numpy as np
+
+from database import SessionLocal
+from models.risk import Risk, RiskLikelihood, RiskImpact
+from models.control import Control, ControlStatus
+from models.risk_scoring import RiskScoringMethod
+from models.control_link import RiskControlLink
+from services.change_tracking import mark_changed
+from services.change_history import record_updates
+from services.dashboard_snapshot import row_counters, record_bulk_update
+
+logger = logging.getLogger(__name__)
+
+# Rows per executemany UPDATE when writing re-scored risks back
+RESCORE_BATCH_SIZE = 5000
+
+# Built-in methodology, used until one is saved
+DEFAULT_MATRIX = [
+    [likelihood.value * impact.value for impact in RiskImpact]
+    for likelihood in RiskLikelihood
+]
+DEFAULT_CONTROL_STATUS_WEIGHTS = {
+    ControlStatus.IMPLEMENTED.value: 1.0,
+    ControlStatus.PARTIALLY_IMPLEMENTED.value: 0.5,
+}
+DEFAULT_MAX_CONTROL_REDUCTION = 0.8
+
+
+class ScoringModel:
+    """In-memory form of a scoring method, with array lookups for bulk scoring"""
+
+    def __init__(self, name: str, matrix, control_status_weights: dict, max_control_reduction: float):
+        self.name = name
+        self.matrix = np.asarray(matrix, dtype=float)
+        self.control_status_weights = dict(control_status_weights)
+        self.max_control_reduction = float(max_control_reduction)
+
+    @classmethod
+    def from_method(cls, method: Optional[RiskScoringMethod]) -> "ScoringModel":
+        if method is None:
+            return cls("default", DEFAULT_MATRIX, DEFAULT_CONTROL_STATUS_WEIGHTS, DEFAULT_MAX_CONTROL_REDUCTION)
+        return cls(method.name, method.matrix, method.control_status_weights, method.max_control_reduction)
+
+    def as_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "matrix": self.matrix.tolist(),
+            "control_status_weights": self.control_status_weights,
+            "max_control_reduction": self.max_control_reduction,
+        }
+
+    def control_strength(self, status: Optional[ControlStatus], effectiveness_rating: Optional[int]) -> float:
+        """Fraction of a risk one control mitigates, 0-1"""
+        weight = self.control_status_weights.get(status.value if status else None, 0.0)
+        rating = min(max(effectiveness_rating or 0, 0), 5)
+        return weight * rating / 5
+
+    def inherent_scores(self, likelihood: np.ndarray, impact: np.ndarray) -> np.ndarray:
+        return self.matrix[likelihood - 1, impact - 1]
+
+    def residual_scores(self, inherent: np.ndarray, link_risk: np.ndarray, link_strength: np.ndarray) -> np.ndarray:
+        """Residual = inherent * (1 - max_reduction * combined control effectiveness).
+
+        Controls are treated as independent: combined = 1 - prod(1 - strength).
+        The product is taken as a sum of logs per risk with bincount, so no
+        Python loop runs per risk.
+        """
+        with np.errstate(divide="ignore"):
+            log_remaining = np.log1p(-np.clip(link_strength, 0.0, 1.0))
+        total = np.bincount(link_risk, weights=log_remaining, minlength=len(inherent))
+        combined = 1.0 - np.exp(total)
+        return np.round(inherent * (1.0 - self.max_control_reduction * combined), 2)
+
+
+def get_active_method(db: Session) -> Optional[RiskScoringMethod]:
+    return db.scalar(
+        select(RiskScoringMethod)
+        .where(RiskScoringMethod.is_active.is_(True))
+        .order_by(RiskScoringMethod.id.desc())
+        .limit(1)
+    )
+
+
+def get_scoring_model(db: Session) -> ScoringModel:
+    return ScoringModel.from_method(get_active_method(db))
+
+
+def save_scoring_method(db: Session, values: dict) -> RiskScoringMethod:
+    """Store a new methodology and make it the active one; earlier ones are kept for audit"""
+    db.execute(
+        update(RiskScoringMethod)
+        .where(RiskScoringMethod.is_active.is_(True))
+        .values(is_active=False)
+    )
+    method = RiskScoringMethod(is_active=True, **values)
+    db.add(method)
+    db.flush()
+    return method
+
+
+def control_strengths(db: Session, model: ScoringModel, control_ids: Optional[Iterable[str]] = None) -> Dict[str, float]:
+    """Mitigation strength per control ID, for all controls or only the given ones"""
+    stmt = select(Control.control_id, Control.status, Control.effectiveness_rating)
+    if control_ids is not None:
+        stmt = stmt.where(Control.control_id.in_(list(control_ids)))
+    return {
+        control_id: model.control_strength(status, rating)
+        for control_id, status, rating in db.execute(stmt)
+    }
+
+
+def score_risk(db: Session, risk: Risk, model: Optional[ScoringModel] = None):
+    """Set a single risk's inherent and residual scores from the active methodology"""
+    model = model or get_scoring_model(db)
+    inherent = model.inherent_scores(np.array([risk.likelihood.value]), np.array([risk.impact.value]))
+    control_ids = risk.control_ids or []
+    strengths = control_strengths(db, model, control_ids) if control_ids else {}
+    link_strength = np.array([strengths.get(control_id, 0.0) for control_id in control_ids], dtype=float)
+    residual = model.residual_scores(inherent, np.zeros(len(link_strength), dtype=int), link_strength)
+    risk.inherent_risk_score = float(inherent[0])
+    risk.residual_risk_score = float(residual[0])
+
+
+def rescore_risks(db: Session, filters: Sequence = ()) -> dict:
+    """Recompute inherent and residual scores for every matching risk.
+
+    Scores are computed column-wise with NumPy and only rows whose scores
+    changed are written, in executemany UPDATE batches. The caller commits.
+    """
+    model = get_scoring_model(db)
+
+    rows = db.execute(
+        select(
+            Risk.id, Risk.likelihood, Risk.impact,
+            Risk.inherent_risk_score, Risk.residual_risk_score
+        ).where(*filters)
+    ).all()
+    count = len(rows)
+    if not count:
+        return {"method": model.name, "scanned": 0, "updated": 0}
+
+    ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=count)
+    likelihood = np.fromiter((row[1].value for row in rows), dtype=np.int64, count=count)
+    impact = np.fromiter((row[2].value for row in rows), dtype=np.int64, count=count)
+    old_inherent = np.array([row[3] for row in rows], dtype=float)
+    old_residual = np.array([row[4] for row in rows], dtype=float)
+
+    # Risk -> control links as parallel arrays, read from the indexed link table
+    position = {int(pk): index for index, pk in enumerate(ids)}
+    links = db.execute(
+        select(RiskControlLink.risk_id, Control.status, Control.effectiveness_rating)
+        .join(Control, Control.id == RiskControlLink.control_id)
+        .where(RiskControlLink.risk_id.in_(select(Risk.id).where(*filters)))
+    ).all()
+    # A risk created between the two reads is not being re-scored; drop its links
+    links = [link for link in links if link[0] in position]
+    link_risk = [position[risk_pk] for risk_pk, _, _ in links]
+    link_strength = [model.control_strength(status, rating) for _, status, rating in links]
+
+    inherent = model.inherent_scores(likelihood, impact)
+    residual = model.residual_scores(
+        inherent,
+        np.asarray(link_risk, dtype=np.int64),
+        np.asarray(link_strength, dtype=float)
+    )
+
+    changed = np.flatnonzero(~(np.isclose(inherent, old_inherent) & np.isclose(residual, old_residual)))
+    for start in range(0, len(changed), RESCORE_BATCH_SIZE):
+        batch = changed[start:start + RESCORE_BATCH_SIZE]
+        rows = [
+            {"id": int(ids[i]), "inherent_risk_score": float(inherent[i]), "residual_risk_score": float(residual[i])}
+            for i in batch
+        ]
+        # Bulk writes bypass the flush hooks that keep these in step
+        in_batch = [Risk.id.in_([row["id"] for row in rows])]
+        before = row_counters(db, Risk, in_batch)
+        # Bulk UPDATE by primary key: one executemany round trip per batch
+        db.execute(update(Risk), rows)
+        record_updates(db, Risk, rows)
+        record_bulk_update(db, Risk, before, in_batch)
+
+    if len(changed):
+        mark_changed(db, "risks")
+
+    return {"method": model.name, "scanned": count, "updated": int(len(changed))}
+
+
+def run_rescore(filters: Sequence = ()) -> dict:
+    """Re-score in a session of its own; for worker threads and the CLI"""
+    db = SessionLocal()
+    try:
+        started = time.perf_counter()
+        result = rescore_risks(db, filters)
+        db.commit()
+        result["seconds"] = round(time.perf_counter() - started, 3)
+        logger.info("Re-scored risks: %s", result)
+        return result
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def main():
+    """Re-score the whole register (run from backend/: python -m services.risk_scoring)"""
+    try:
+        result = run_rescore()
+        print(f"✓ Re-scored {result['scanned']} risks with '{result['method']}' "
+              f"({result['updated']} changed) in {result['seconds']}s")
+    except Exception as e:
+        print(f"✗ Error re-scoring risks: {e}")
+        raise
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+# Vectorized Monte Carlo loss simulation. Kept free of database and web
+# imports so process pool workers start quickly.
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+# Iterations simulated at once; bounds the size of the per-event arrays
+CHUNK_ITERATIONS = 250_000
+
+# PERT shape parameter (weight of the most likely value)
+PERT_SHAPE = 4.0
+
+# Exceedance probabilities reported on loss exceedance curves
+EXCEEDANCE_PROBABILITIES = [0.9, 0.75, 0.5, 0.25, 0.1, 0.05, 0.02, 0.01, 0.005, 0.001]
+
+PERCENTILES = [50, 90, 95, 99]
+
+# (min, most likely, max) frequency followed by (min, most likely, max) magnitude
+LossParameters = Tuple[float, float, float, float, float, float]
+
+
+def pert_samples(rng: np.random.Generator, low: float, mode: float, high: float, size: int) -> np.ndarray:
+    if high <= low:
+        return np.full(size, float(low))
+    span = high - low
+    alpha = 1 + PERT_SHAPE * (mode - low) / span
+    beta = 1 + PERT_SHAPE * (high - mode) / span
+    return low + rng.beta(alpha, beta, size) * span
+
+
+def simulate_annual_losses(params: LossParameters, iterations: int, seed: int) -> np.ndarray:
+    """Annual loss for each simulated year: Poisson(frequency) events, each with a PERT magnitude"""
+    f_min, f_mode, f_max, m_min, m_mode, m_max = params
+    rng = np.random.default_rng(seed)
+    losses = np.empty(iterations)
+    for start in range(0, iterations, CHUNK_ITERATIONS):
+        size = min(CHUNK_ITERATIONS, iterations - start)
+        events = rng.poisson(pert_samples(rng, f_min, f_mode, f_max, size))
+        magnitudes = pert_samples(rng, m_min, m_mode, m_max, int(events.sum()))
+        # Sum each year's event losses without a Python loop
+        years = np.repeat(np.arange(size), events)
+        losses[start:start + size] = np.bincount(years, weights=magnitudes, minlength=size)
+    return losses
+
+
+def summarize_losses(losses: np.ndarray) -> dict:
+    """Expected loss, percentiles and a loss exceedance curve for a loss sample"""
+    levels = [1 - p for p in EXCEEDANCE_PROBABILITIES] + [p / 100 for p in PERCENTILES]
+    quantiles = np.quantile(losses, levels)
+    curve = quantiles[:len(EXCEEDANCE_PROBABILITIES)]
+    percentiles = quantiles[len(EXCEEDANCE_PROBABILITIES):]
+    return {
+        "iterations": int(losses.size),
+        "expected_annual_loss": float(losses.mean()),
+        "std_dev": float(losses.std()),
+        "max_loss": float(losses.max()),
+        "probability_of_loss": float((losses > 0).mean()),
+        "percentiles": {f"p{p}": float(value) for p, value in zip(PERCENTILES, percentiles)},
+        "loss_exceedance_curve": [
+            {"probability": p, "loss": float(loss)}
+            for p, loss in zip(EXCEEDANCE_PROBABILITIES, curve)
+        ],
+    }
+
+
+def value_at_risk(losses: np.ndarray, confidence_levels: List[float]) -> List[dict]:
+    """VaR and expected shortfall (mean loss beyond VaR) at each confidence level"""
+    results = []
+    for level in confidence_levels:
+        var = float(np.quantile(losses, level))
+        tail = losses[losses >= var]
+        results.append({
+            "confidence": level,
+            "value_at_risk": var,
+            "expected_shortfall": float(tail.mean()) if tail.size else var,
+        })
+    return results
+
+
+def simulate_batch(risks: List[Tuple[str, LossParameters, int]], iterations: int) -> Tuple[Dict[str, dict], np.ndarray]:
+    """Process pool task: simulate several risks and their summed annual losses.
+
+    Returns per-risk summaries and the batch's contribution to the portfolio
+    loss for each simulated year (risks are treated as independent).
+    """
+    summaries = {}
+    portfolio = np.zeros(iterations)
+    for key, params, seed in risks:
+        losses = simulate_annual_losses(params, iterations, seed)
+        summaries[key] = summarize_losses(losses)
+        portfolio += losses
+    return summaries, portfolio
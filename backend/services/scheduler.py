@@ -0,0 +1,47 @@
+from apscheduler.schedulers.background import BackgroundScheduler
+from datetime import datetime
+
+from config import settings
+from services.metrics_rollup import run_scheduled_rollup
+from services.change_history import run_scheduled_checkpoints
+from services.control_testing import run_scheduled_dispatch
+
+scheduler = BackgroundScheduler(timezone="UTC")
+
+
+def start_scheduler():
+    """Register periodic jobs and start the background scheduler"""
+    scheduler.add_job(
+        run_scheduled_rollup,
+        "interval",
+        minutes=settings.METRICS_ROLLUP_INTERVAL_MINUTES,
+        id="daily_metrics_rollup",
+        next_run_time=datetime.utcnow(),
+        coalesce=True,
+        max_instances=1,
+        replace_existing=True
+    )
+    scheduler.add_job(
+        run_scheduled_checkpoints,
+        "interval",
+        hours=settings.CHANGE_CHECKPOINT_INTERVAL_HOURS,
+        id="change_history_checkpoints",
+        coalesce=True,
+        max_instances=1,
+        replace_existing=True
+    )
+    scheduler.add_job(
+        run_scheduled_dispatch,
+        "interval",
+        minutes=settings.CONTROL_TEST_DISPATCH_INTERVAL_MINUTES,
+        id="control_test_dispatch",
+        coalesce=True,
+        max_instances=1,
+        replace_existing=True
+    )
+    scheduler.start()
+
+
+def shutdown_scheduler():
+    if scheduler.running:
+        scheduler.shutdown(wait=False)
@@ -0,0 +1,70 @@
+from sqlalchemy import Column, update, func, inspect
+from sqlalchemy.engine import Connection
+import logging
+
+from database import Base
+from models.risk import Risk, RiskStatus
+
+logger = logging.getLogger(__name__)
+
+
+def _backfill_closed_at(connection: Connection):
+    # The close date of risks closed before the column existed is unknown;
+    # their last write is the closest record of it
+    risks = Risk.__table__
+    connection.execute(
+        update(risks)
+        .where(risks.c.status == RiskStatus.CLOSED, risks.c.closed_at.is_(None))
+        # Keep updated_at as it is rather than letting onupdate stamp it
+        .values(closed_at=func.coalesce(risks.c.updated_at, risks.c.created_at), updated_at=risks.c.updated_at)
+    )
+
+
+# (table, column) -> fills the column for existing rows right after it is added
+BACKFILLS = {
+    ("risks", "closed_at"): _backfill_closed_at,
+}
+
+
+def _add_column(connection: Connection, column: Column):
+    preparer = connection.dialect.identifier_preparer
+    column_type = column.type.compile(dialect=connection.dialect)
+    connection.exec_driver_sql(
+        f"ALTER TABLE {preparer.format_table(column.table)} ADD COLUMN {preparer.format_column(column)} {column_type}"
+    )
+
+
+def _column_index(index) -> bool:
+    # Plain column indexes; expression indexes (search) are ensured by their module
+    return all(isinstance(expression, Column) for expression in index.expressions)
+
+
+def ensure_schema_upgrades(engine):
+    """Add columns and indexes declared on tables that already exist.
+
+    create_all only creates missing tables, so columns and indexes added to a
+    model later are never applied to an existing database. Missing nullable
+    columns are added (and backfilled where BACKFILLS says how); missing
+    column indexes are created. Run after create_all.
+    """
+    with engine.begin() as connection:
+        inspector = inspect(connection)
+        existing_tables = set(inspector.get_table_names())
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                if not column.nullable:
+                    logger.error("Column %s.%s is missing and NOT NULL; add it manually", table.name, column.name)
+                    continue
+                _add_column(connection, column)
+                logger.info("Added column %s.%s", table.name, column.name)
+                backfill = BACKFILLS.get((table.name, column.name))
+                if backfill is not None:
+                    backfill(connection)
+            for index in table.indexes:
+                if _column_index(index):
+                    index.create(connection, checkfirst=True)
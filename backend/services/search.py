@@ -0,0 +1,243 @@
+from sqlalchemy import Index, select, func, literal, literal_column, union_all
+from sqlalchemy.orm import Session
+from collections import Counter, defaultdict
+from functools import reduce
+from typing import List, Optional
+import html
+import math
+import re
+import threading
+
+from models.risk import Risk
+from models.control import Control
+from models.compliance import ComplianceRequirement
+from models.evidence import Evidence
+from services.change_tracking import on_commit
+
+# Text search configuration; inlined as a literal so queries match the index expressions
+SEARCH_CONFIG = literal_column("'english'::regconfig")
+
+# ts_headline returns the stored text unescaped, so matches are delimited with
+# private-use characters and turned into <mark> tags only after HTML-escaping
+HEADLINE_START, HEADLINE_STOP = "\ue000", "\ue001"
+HEADLINE_OPTIONS = (
+    f"StartSel={HEADLINE_START}, StopSel={HEADLINE_STOP}, MaxWords=35, MinWords=15, MaxFragments=2"
+)
+
+# Entity -> (model, business ID column, change tag, [(text column, weight A-D)])
+SEARCHABLE = {
+    "risks": (Risk, Risk.risk_id, "risks", [
+        (Risk.title, "A"),
+        (Risk.description, "B"),
+        (Risk.threat_source, "C"),
+        (Risk.vulnerability, "C"),
+        (Risk.mitigation_strategy, "C"),
+    ]),
+    "controls": (Control, Control.control_id, "controls", [
+        (Control.title, "A"),
+        (Control.description, "B"),
+        (Control.implementation_description, "C"),
+        (Control.test_procedure, "C"),
+    ]),
+    "requirements": (ComplianceRequirement, ComplianceRequirement.requirement_id, "compliance", [
+        (ComplianceRequirement.title, "A"),
+        (ComplianceRequirement.description, "B"),
+        (ComplianceRequirement.implementation_notes, "C"),
+        (ComplianceRequirement.remediation_plan, "C"),
+        (ComplianceRequirement.test_procedure, "C"),
+    ]),
+    "evidence": (Evidence, Evidence.evidence_id, "evidence", [
+        (Evidence.title, "A"),
+        (Evidence.description, "B"),
+        (Evidence.file_name, "C"),
+        (Evidence.review_notes, "C"),
+    ]),
+}
+
+SEARCH_TYPES = list(SEARCHABLE)
+
+
+def search_vector(fields):
+    """Weighted tsvector over the fields; every constant is inlined so the GIN index matches"""
+    vectors = [
+        func.setweight(
+            func.to_tsvector(SEARCH_CONFIG, func.coalesce(column, literal_column("''"))),
+            literal_column(f"'{weight}'")
+        )
+        for column, weight in fields
+    ]
+    return reduce(lambda left, right: left.op("||")(right), vectors)
+
+
+def _document(fields):
+    return func.concat_ws(literal_column("' '"), *[column for column, _ in fields])
+
+
+def _search_index(model, fields) -> Index:
+    index = Index(
+        f"ix_{model.__tablename__}_search",
+        search_vector([(model.__table__.c[column.key], weight) for column, weight in fields]),
+        postgresql_using="gin"
+    ).ddl_if(dialect="postgresql")
+    # Expression indexes are not attached to a table automatically
+    model.__table__.append_constraint(index)
+    return index
+
+
+# Expression GIN indexes, PostgreSQL only
+SEARCH_INDEXES = [_search_index(model, fields) for model, _, _, fields in SEARCHABLE.values()]
+
+
+def ensure_search_indexes(engine):
+    """Create missing search indexes; create_all only adds indexes along with new tables"""
+    if engine.dialect.name != "postgresql":
+        return
+    for index in SEARCH_INDEXES:
+        index.create(engine, checkfirst=True)
+
+
+def _postgres_search(db: Session, query: str, types: List[str], limit: int, offset: int) -> list:
+    ts_query = func.websearch_to_tsquery(SEARCH_CONFIG, query)
+    branches = []
+    for entity in types:
+        model, key, _, fields = SEARCHABLE[entity]
+        vector = search_vector(fields)
+        rank = func.ts_rank_cd(vector, ts_query)
+        # Rank via the index first, then build headlines for the top rows only
+        top = (
+            select(model.id.label("pk"), rank.label("rank"))
+            .where(vector.op("@@")(ts_query))
+            .order_by(rank.desc())
+            .limit(limit + offset)
+            .subquery()
+        )
+        branches.append(
+            select(
+                literal(entity).label("type"),
+                key.label("id"),
+                model.title.label("title"),
+                top.c.rank,
+                func.ts_headline(SEARCH_CONFIG, _document(fields), ts_query, HEADLINE_OPTIONS).label("highlight")
+            ).join(top, model.id == top.c.pk)
+        )
+
+    combined = union_all(*branches).subquery()
+    stmt = select(combined).order_by(combined.c.rank.desc()).limit(limit).offset(offset)
+    return [{**row, "highlight": _mark_headline(row["highlight"])} for row in db.execute(stmt).mappings()]
+
+
+def _mark_headline(headline: Optional[str]) -> str:
+    """HTML-escape a ts_headline result, then mark its matches"""
+    escaped = html.escape(headline or "")
+    return escaped.replace(HEADLINE_START, "<mark>").replace(HEADLINE_STOP, "</mark>")
+
+
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+# BM25 parameters and the field-weight multipliers used by the fallback index
+BM25_K1 = 1.2
+BM25_B = 0.75
+WEIGHT_MULTIPLIERS = {"A": 3, "B": 2, "C": 1, "D": 1}
+SNIPPET_WORDS = 30
+
+
+def _tokenize(text: Optional[str]) -> List[str]:
+    return TOKEN_PATTERN.findall(text.lower()) if text else []
+
+
+class InvertedIndex:
+    """In-process BM25 index used when the database has no full-text search.
+
+    Each entity is built from the database on first search and rebuilt after
+    a commit changes it.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entities = {}
+        self._stale = set(SEARCHABLE)
+
+    def mark_stale(self, tags):
+        with self._lock:
+            self._stale.update(entity for entity, (_, _, tag, _) in SEARCHABLE.items() if tag in tags)
+
+    def _build(self, db: Session, entity: str) -> dict:
+        model, key, _, fields = SEARCHABLE[entity]
+        documents = {}
+        postings = defaultdict(dict)
+        for row in db.execute(select(model.id, key, *[column for column, _ in fields])):
+            pk, business_id, *texts = row
+            terms = Counter()
+            for text, (_, weight) in zip(texts, fields):
+                for token in _tokenize(text):
+                    terms[token] += WEIGHT_MULTIPLIERS[weight]
+            for token, frequency in terms.items():
+                postings[token][pk] = frequency
+            documents[pk] = (business_id, texts[0], " ".join(t for t in texts if t), sum(terms.values()))
+        average_length = sum(d[3] for d in documents.values()) / max(len(documents), 1)
+        return {"documents": documents, "postings": postings, "average_length": average_length}
+
+    def _entity(self, db: Session, entity: str) -> dict:
+        with self._lock:
+            if entity in self._stale or entity not in self._entities:
+                self._stale.discard(entity)
+                self._entities[entity] = self._build(db, entity)
+            return self._entities[entity]
+
+    @staticmethod
+    def _highlight(text: str, tokens: set) -> str:
+        words = text.split()
+        hits = [i for i, word in enumerate(words) if set(_tokenize(word)) & tokens]
+        start = max(hits[0] - SNIPPET_WORDS // 3, 0) if hits else 0
+        snippet = []
+        for word in words[start:start + SNIPPET_WORDS]:
+            escaped = html.escape(word)
+            snippet.append(f"<mark>{escaped}</mark>" if set(_tokenize(word)) & tokens else escaped)
+        return " ".join(snippet)
+
+    def search(self, db: Session, query: str, types: List[str], limit: int, offset: int) -> list:
+        tokens = set(_tokenize(query))
+        if not tokens:
+            return []
+        results = []
+        for entity in types:
+            index = self._entity(db, entity)
+            documents, postings = index["documents"], index["postings"]
+            matching = [postings.get(token, {}) for token in tokens]
+            # Every term must match, like websearch_to_tsquery's implicit AND
+            candidates = set.intersection(*(set(p) for p in matching)) if all(matching) else set()
+            for pk in candidates:
+                business_id, title, text, length = documents[pk]
+                score = 0.0
+                for posting in matching:
+                    frequency = posting[pk]
+                    idf = math.log(1 + (len(documents) - len(posting) + 0.5) / (len(posting) + 0.5))
+                    norm = BM25_K1 * (1 - BM25_B + BM25_B * length / (index["average_length"] or 1))
+                    score += idf * frequency * (BM25_K1 + 1) / (frequency + norm)
+                results.append({
+                    "type": entity,
+                    "id": business_id,
+                    "title": title,
+                    "rank": score,
+                    "highlight": self._highlight(text, tokens),
+                })
+        results.sort(key=lambda result: result["rank"], reverse=True)
+        return results[offset:offset + limit]
+
+
+inverted_index = InvertedIndex()
+
+
+@on_commit
+def _refresh_inverted_index(session: Session, tags: set):
+    inverted_index.mark_stale(tags)
+
+
+def search(db: Session, query: str, types: Optional[List[str]] = None, limit: int = 20, offset: int = 0) -> list:
+    """Ranked, highlighted matches across entity types, best first"""
+    types = [t for t in (types or SEARCH_TYPES) if t in SEARCHABLE]
+    if not query.strip() or not types:
+        return []
+    if db.get_bind().dialect.name == "postgresql":
+        return _postgres_search(db, query, types, limit, offset)
+    return inverted_index.search(db, query, types, limit, offset)
@@ -0,0 +1,57 @@
+from fastapi import HTTPException, Query, Response
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import inspect
+from typing import Any, Dict, Iterable, List, Optional
+
+# Headers the endpoint sets on its injected Response (ETag, paging) that a
+# returned response has to carry over itself
+_SKIPPED_HEADERS = {"content-length", "content-type"}
+
+
+def schema_columns(model, schema) -> Dict[str, Any]:
+    """Columns backing each field of a response schema, in schema order"""
+    columns = {attr.key: getattr(model, attr.key) for attr in inspect(model).column_attrs}
+    return {name: columns[name] for name in schema.model_fields if name in columns}
+
+
+def field_params(model, schema):
+    """Dependency parsing ?fields=a,b,c into the columns to select for a list endpoint.
+
+    Without the parameter every field of the response schema is returned.
+    Unknown names are rejected with 400.
+    """
+    available = schema_columns(model, schema)
+
+    def dependency(
+        fields: Optional[str] = Query(None, description="Comma-separated fields to return: " + ",".join(available))
+    ) -> Dict[str, Any]:
+        if not fields:
+            return available
+        names = {name.strip() for name in fields.split(",") if name.strip()}
+        unknown = names - available.keys()
+        if unknown:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown field(s): {', '.join(sorted(unknown))}. Available: {', '.join(available)}"
+            )
+        if not names:
+            raise HTTPException(status_code=400, detail="fields must name at least one field")
+        return {name: column for name, column in available.items() if name in names}
+
+    return dependency
+
+
+def project(rows: Iterable[dict], fields: Dict[str, Any]) -> List[dict]:
+    """Keep only the selected fields of already-serialized rows (e.g. history states)"""
+    return [{name: row.get(name) for name in fields} for row in rows]
+
+
+def json_response(content: Any, response: Response) -> ORJSONResponse:
+    """Encode trusted rows with orjson, skipping response_model validation.
+
+    Only for rows read straight from the database columns the response schema
+    declares; headers already set on the injected response are kept.
+    """
+    headers = {key: value for key, value in response.headers.items() if key not in _SKIPPED_HEADERS}
+    return ORJSONResponse(content, status_code=response.status_code or 200, headers=headers)
+
@@ -0,0 +1,15 @@
+"""Session event hooks that keep derived tables in step with ORM writes.
+
+Each entry point (main.py, celery_app.py, sample_data.py) imports this
+before any other service, so every process that writes through SessionLocal
+registers all of them, in this order, not only the ones that happen to
+import the service modules. The models package must not import it: models
+are loaded by the services themselves.
+"""
+# Hooks that modify the flushed objects come first, so the rest see final values
+import services.control_testing  # noqa: F401  next_test_date
+import services.change_tracking  # noqa: F401  entity versions, commit hooks
+import services.dashboard_snapshot  # noqa: F401  snapshot counters
+import services.live_updates  # noqa: F401  dashboard deltas
+import services.control_links  # noqa: F401  link tables
+import services.change_history  # noqa: F401  change log
@@ -0,0 +1,180 @@
+from sqlalchemy import select, func, literal, tuple_, union_all
+from sqlalchemy.orm import Session
+from sqlalchemy.types import Enum
+from typing import Dict, List, Sequence, Tuple
+
+from models.risk import Risk
+from models.control import Control
+from models.vendor import Vendor, VendorAssessment
+from models.evidence import Evidence
+
+# Dialects that understand GROUP BY GROUPING SETS; others get the UNION ALL equivalent
+GROUPING_SETS_DIALECTS = {"postgresql", "mssql", "oracle"}
+
+# Entity -> (model, {dimension name: column}) available to the statistics API
+STATISTICS_DIMENSIONS = {
+    "risks": (Risk, {
+        "status": Risk.status,
+        "category": Risk.category,
+        "likelihood": Risk.likelihood,
+        "impact": Risk.impact,
+        "owner": Risk.owner,
+        "risk_level": Risk.risk_level_expression(Risk.inherent_risk_score),
+    }),
+    "controls": (Control, {
+        "status": Control.status,
+        "control_type": Control.control_type,
+        "owner": Control.owner,
+        "responsible_team": Control.responsible_team,
+        "test_status": Control.test_status,
+    }),
+    "vendors": (Vendor, {
+        "status": Vendor.status,
+        "risk_level": Vendor.risk_level,
+        "criticality_level": Vendor.criticality_level,
+        "service_type": Vendor.service_type,
+    }),
+    "vendor_assessments": (VendorAssessment, {
+        "status": VendorAssessment.status,
+        "assessment_type": VendorAssessment.assessment_type,
+        "assessor": VendorAssessment.assessor,
+    }),
+    "evidence": (Evidence, {
+        "status": Evidence.status,
+        "evidence_type": Evidence.evidence_type,
+        "collection_method": Evidence.collection_method,
+        "framework": Evidence.framework,
+        "control_id": Evidence.control_id,
+    }),
+}
+
+
+def _plain(value):
+    return value.value if hasattr(value, "value") else value
+
+
+def grouped_aggregates(
+    db: Session,
+    source,
+    grouping_sets: Sequence[Tuple],
+    aggregates: Sequence,
+    filters: Sequence = ()
+) -> Tuple[tuple, List[List[tuple]]]:
+    """Compute aggregates for several groupings of `source` in one statement.
+
+    `source` is a model or a join; `grouping_sets` is a list of non-empty
+    column tuples, e.g. [(status,), (status, category)]. Returns (aggregates
+    over all rows, rows per set), each row being (*group values, *aggregates).
+    """
+    # Columns are SQL expressions, so they are matched by identity, not ==
+    columns = []
+    sets = []
+    for columns_in_set in grouping_sets:
+        positions = []
+        for column in columns_in_set:
+            position = next((i for i, seen in enumerate(columns) if seen is column), None)
+            if position is None:
+                position = len(columns)
+                columns.append(column)
+            positions.append(position)
+        sets.append(tuple(positions))
+
+    width = len(columns)
+    total_mask = (1 << width) - 1
+
+    def mask(positions) -> int:
+        # Same bit layout as GROUPING(): a set bit means the column is aggregated away
+        return total_mask & ~sum(1 << (width - 1 - i) for i in positions)
+
+    # Sets over the same columns (in any order) share one grouping in SQL
+    indexes_by_mask = {}
+    for index, positions in enumerate(sets):
+        indexes_by_mask.setdefault(mask(positions), []).append(index)
+    distinct_sets = [sets[indexes[0]] for indexes in indexes_by_mask.values()]
+
+    if db.get_bind().dialect.name in GROUPING_SETS_DIALECTS:
+        grouping = func.grouping(*columns) if columns else literal(0)
+        stmt = (
+            select(grouping, *columns, *aggregates)
+            .select_from(source)
+            .where(*filters)
+            .group_by(func.grouping_sets(*[tuple_(*[columns[i] for i in positions]) for positions in distinct_sets], tuple_()))
+        )
+    else:
+        stmt = union_all(*[
+            select(
+                literal(mask(positions)),
+                *[
+                    column if i in positions else literal(None, type_=column.type)
+                    for i, column in enumerate(columns)
+                ],
+                *aggregates
+            )
+            .select_from(source)
+            .where(*filters)
+            .group_by(*[columns[i] for i in positions])
+            for positions in distinct_sets + [()]
+        ])
+
+    totals = (None,) * len(aggregates)
+    results = [[] for _ in sets]
+    for grouping_id, *row in db.execute(stmt):
+        values, measures = row[:width], tuple(row[width:])
+        if grouping_id == total_mask:
+            totals = measures
+            continue
+        for index in indexes_by_mask[grouping_id]:
+            results[index].append((*[values[i] for i in sets[index]], *measures))
+    return totals, results
+
+
+def grouped_counts(
+    db: Session,
+    model,
+    grouping_sets: Sequence[Tuple],
+    filters: Sequence = ()
+) -> Tuple[int, List[List[tuple]]]:
+    """Count rows for several groupings of `model` in one statement.
+
+    `grouping_sets` is a list of non-empty column tuples, e.g.
+    [(status,), (status, category)]. Returns (total, rows per set), each
+    row being (*group values, count).
+    """
+    (total,), results = grouped_aggregates(db, model, grouping_sets, [func.count()], filters)
+    return total, results
+
+
+def breakdowns(db: Session, model, dimensions: Dict[str, object], filters: Sequence = ()) -> dict:
+    """Single-column breakdowns, e.g. {"by_status": {"Open": 3, ...}, ...}, plus the total.
+
+    Every member of an enum dimension is listed, with 0 when absent; rows
+    whose value is NULL only count towards the total.
+    """
+    total, results = grouped_counts(db, model, [(column,) for column in dimensions.values()], filters)
+    summary = {"total": total}
+    for (name, column), rows in zip(dimensions.items(), results):
+        enum_class = getattr(column.type, "enum_class", None) if isinstance(column.type, Enum) else None
+        counts = {member.value: 0 for member in enum_class} if enum_class else {}
+        for value, count in rows:
+            if value is not None:
+                counts[_plain(value)] = count
+        summary[f"by_{name}"] = counts
+    return summary
+
+
+def entity_statistics(db: Session, entity: str, groupings: List[List[str]]) -> dict:
+    """Counts for an entity grouped by any combination of its dimensions"""
+    model, dimensions = STATISTICS_DIMENSIONS[entity]
+    total, results = grouped_counts(
+        db, model, [tuple(dimensions[name] for name in names) for names in groupings]
+    )
+    return {
+        "total": total,
+        "breakdowns": {
+            ",".join(names): [
+                {**{name: _plain(value) for name, value in zip(names, row)}, "count": row[-1]}
+                for row in rows
+            ]
+            for names, rows in zip(groupings, results)
+        }
+    }
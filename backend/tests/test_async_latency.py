@@ -0,0 +1,70 @@
+"""p99 latency as concurrent clients go from 1 to 200.
+
+Each request holds a session for a QUERY_SECONDS server-side sleep, standing
+in for a slow query. With the async session the event loop keeps serving
+other requests meanwhile, so latency grows only once the connection pool is
+exhausted; blocking handlers would serialize the requests instead.
+"""
+import asyncio
+import time
+
+import pytest
+from fastapi import APIRouter, Depends
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database import engine, get_async_db
+
+pytestmark = pytest.mark.benchmark
+
+QUERY_SECONDS = 0.05
+CLIENT_COUNTS = (1, 10, 50, 200)
+REQUESTS_PER_CLIENT = 5
+
+router = APIRouter()
+
+
+@router.get("/slow-query")
+async def slow_query(db: AsyncSession = Depends(get_async_db)):
+    await db.execute(text("SELECT pg_sleep(:seconds)"), {"seconds": QUERY_SECONDS})
+    return {"ok": True}
+
+
+@pytest.fixture(scope="module")
+def benchmark_app(database):
+    if engine.dialect.name != "postgresql":
+        pytest.skip("Needs pg_sleep")
+    from main import app
+
+    app.include_router(router, prefix="/benchmark")
+    return app
+
+
+def p99(latencies: list) -> float:
+    ordered = sorted(latencies)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+
+
+async def run_clients(client, clients: int) -> list:
+    latencies = []
+
+    async def session():
+        for _ in range(REQUESTS_PER_CLIENT):
+            start = time.perf_counter()
+            response = await client.get("/benchmark/slow-query")
+            latencies.append(time.perf_counter() - start)
+            assert response.status_code == 200
+
+    await asyncio.gather(*[session() for _ in range(clients)])
+    return latencies
+
+
+async def test_p99_latency_under_concurrency(benchmark_app, client):
+    await run_clients(client, 10)  # open the pool's connections first
+    results = {clients: p99(await run_clients(client, clients)) for clients in CLIENT_COUNTS}
+
+    # Flat while the pool has a connection per client
+    assert results[10] <= results[1] * 2, results
+    # Far below the clients x query time that serialized requests would take
+    for clients in CLIENT_COUNTS[1:]:
+        assert results[clients] < clients * QUERY_SECONDS / 4, results
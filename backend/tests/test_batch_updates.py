@@ -0,0 +1,36 @@
+import asyncio
+import json
+
+from models.risk import RiskStatus
+from services import dashboard_snapshot
+from services.dashboard_snapshot import compute_counters, read_snapshot
+from services.live_updates import broadcaster
+
+
+async def test_batch_close_applies_deltas_and_publishes_events(client, db, make_risks, monkeypatch):
+    rows = make_risks(40)
+    ids = [row["risk_id"] for row in rows[:20]]
+    closing = [row["risk_id"] for row in rows[:20] if row["status"] != RiskStatus.CLOSED]
+    before = read_snapshot(db)
+
+    def no_rebuild(*args, **kwargs):
+        raise AssertionError("batch update rebuilt the snapshot")
+
+    monkeypatch.setattr(dashboard_snapshot, "rebuild_snapshot", no_rebuild)
+    monkeypatch.setattr(broadcaster, "_publisher_down_until", float("inf"))
+    monkeypatch.setattr(broadcaster, "_loop", asyncio.get_running_loop())
+    queue = broadcaster.subscribe()
+    try:
+        response = await client.patch("/api/risks/batch", json={"ids": ids, "patch": {"status": "Closed"}})
+        message = json.loads(await asyncio.wait_for(queue.get(), timeout=5))
+    finally:
+        broadcaster.unsubscribe(queue)
+
+    assert response.status_code == 200
+    assert message["events"] == [{"event": "risk.closed", "id": risk_id} for risk_id in closing]
+    db.expire_all()
+    snapshot = read_snapshot(db)
+    assert snapshot == compute_counters(db)
+    assert message["counters"] == {
+        metric: value - before[metric] for metric, value in snapshot.items() if value != before[metric]
+    }
@@ -0,0 +1,50 @@
+import threading
+
+import pytest
+
+from config import settings
+from services.cache import LocalCache, response_cache
+
+
+class ThreadRecordingBackend(LocalCache):
+    """In-process stand-in for RedisCache that records which thread calls it"""
+
+    def __init__(self):
+        super().__init__(max_entries=1000)
+        self.loop_thread_calls = []
+        self.calls = set()
+
+    def __getattribute__(self, name):
+        attr = object.__getattribute__(self, name)
+        if name in ("get", "set", "tag_versions", "bump_tags", "acquire_lock", "release_lock", "incr_stat"):
+            object.__getattribute__(self, "calls").add(name)
+            if threading.current_thread() is threading.main_thread():
+                object.__getattribute__(self, "loop_thread_calls").append(name)
+        return attr
+
+    def stats(self) -> dict:
+        return {}
+
+
+@pytest.fixture
+def shared_backend(monkeypatch):
+    backend = ThreadRecordingBackend()
+    monkeypatch.setattr(settings, "CACHE_ENABLED", True)
+    monkeypatch.setattr(response_cache, "_redis", backend)
+    monkeypatch.setattr(response_cache, "_redis_down_until", 0.0)
+    return backend
+
+
+async def test_shared_cache_calls_stay_off_the_event_loop(client, make_risks, shared_backend):
+    make_risks(5)
+    payload = {"title": "Shared service outage", "category": "Operational", "likelihood": 3, "impact": 4}
+
+    first = (await client.get("/api/dashboard/overview")).json()
+    cached = (await client.get("/api/dashboard/overview")).json()
+    assert (await client.post("/api/risks/", json=payload)).status_code == 201
+    after_write = (await client.get("/api/dashboard/overview")).json()
+
+    assert cached == first
+    assert after_write["summary"]["total_risks"] == first["summary"]["total_risks"] + 1
+    assert {"get", "set", "tag_versions", "bump_tags"} <= shared_backend.calls
+    assert shared_backend.loop_thread_calls == []
@@ -0,0 +1,77 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from conftest import count_statements, risk_rows
+from models.risk import Risk, RiskStatus
+from services.change_history import create_checkpoint, history_page, rows_as_of
+from services.pagination import PageParams
+
+
+@pytest.fixture
+def history(db):
+    """30 risks checkpointed, then edited, deleted and added to; returns the live rows by id"""
+    db.add_all([Risk(**row) for row in risk_rows(30)])
+    db.commit()
+    create_checkpoint(db, Risk)
+    db.commit()
+
+    risks = db.query(Risk).order_by(Risk.id).all()
+    for risk in risks[:8]:
+        risk.set_status(RiskStatus.OPEN)
+    for risk in risks[5:12]:
+        risk.residual_risk_score = None
+    db.delete(risks[3])
+    db.add_all([Risk(**row) for row in risk_rows(5, start=30)])
+    db.commit()
+    return {risk.id: risk for risk in db.query(Risk)}
+
+
+@pytest.mark.parametrize("sort", ["id", "title", "residual_risk_score"])
+@pytest.mark.parametrize("descending", [False, True])
+def test_history_page_matches_live_rows(db, history, sort, descending):
+    live = [risk for risk in history.values() if risk.status == RiskStatus.OPEN]
+    live.sort(key=lambda risk: (getattr(risk, sort) is None, getattr(risk, sort) or 0, risk.id), reverse=descending)
+    params = PageParams(getattr(Risk, sort), descending, 7, 3, None, True, sort)
+
+    rows, total = history_page(db, Risk, datetime.utcnow(), {"status": RiskStatus.OPEN, "category": None}, params)
+
+    assert [row["id"] for row in rows] == [risk.id for risk in live[3:10]]
+    assert all(row["status"] == "Open" for row in rows)
+    assert total == len(live)
+
+
+def test_history_page_reads_one_page_of_checkpoint_rows(db, history):
+    params = PageParams(Risk.title, False, 5, 0, None, False, "title")
+
+    with count_statements() as statements:
+        rows, _ = history_page(db, Risk, datetime.utcnow(), {}, params)
+
+    assert len(rows) == 5
+    checkpoint_reads = [statement for statement in statements if "FROM change_checkpoint_rows" in statement]
+    # The page of unchanged rows, and the changed rows' base state by id
+    assert any("LIMIT" in statement for statement in checkpoint_reads)
+    assert all("LIMIT" in statement or " IN (" in statement for statement in checkpoint_reads)
+
+
+def test_rows_as_of_leaves_out_later_rows(db, history):
+    checkpoint_time = datetime.utcnow()
+    db.add(Risk(**risk_rows(1, start=40)[0]))
+    db.commit()
+
+    rows = rows_as_of(db, Risk, checkpoint_time, {})
+
+    assert [row["id"] for row in rows] == sorted(history)
+
+
+async def test_as_of_accepts_utc_offsets(client, history):
+    as_of = datetime.utcnow().isoformat()
+
+    naive = await client.get("/api/risks/", params={"as_of": as_of, "status": "Open"})
+    zulu = await client.get("/api/risks/", params={"as_of": as_of + "Z", "status": "Open"})
+    # The same instant written in UTC+02:00
+    local = (datetime.fromisoformat(as_of) + timedelta(hours=2)).isoformat() + "+02:00"
+    shifted = await client.get("/api/risks/", params={"as_of": local, "status": "Open"})
+
+    assert naive.status_code == zulu.status_code == shifted.status_code == 200
+    assert zulu.json() == shifted.json() == naive.json()
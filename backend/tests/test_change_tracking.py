@@ -0,0 +1,31 @@
+import threading
+
+from database import SessionLocal
+from services.change_tracking import get_entity_versions, mark_changed
+
+WRITERS = 8
+
+
+def test_concurrent_first_writes_bump_the_version_once_each(db):
+    start = threading.Barrier(WRITERS)
+    errors = []
+
+    def write():
+        session = SessionLocal()
+        try:
+            start.wait()
+            mark_changed(session, "vendors", "risks")
+            session.commit()
+        except Exception as e:
+            errors.append(e)
+        finally:
+            session.close()
+
+    threads = [threading.Thread(target=write) for _ in range(WRITERS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert get_entity_versions(db, ["risks", "vendors"]) == {"risks": WRITERS, "vendors": WRITERS}
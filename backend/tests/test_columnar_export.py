@@ -0,0 +1,34 @@
+import io
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from services.columnar_export import stream_columnar_export
+
+
+def read_export(file_format: str) -> pa.Table:
+    _, _, body = stream_columnar_export("risks", file_format)
+    data = b"".join(body)
+    if file_format == "parquet":
+        return pq.read_table(io.BytesIO(data))
+    return pa.ipc.open_stream(data).read_all()
+
+
+def value_type(table: pa.Table, name: str) -> pa.DataType:
+    # Parquet readers decode integer dictionaries to plain integer columns
+    field_type = table.schema.field(name).type
+    return field_type.value_type if pa.types.is_dictionary(field_type) else field_type
+
+
+@pytest.mark.parametrize("file_format", ["parquet", "arrow"])
+def test_enums_keep_their_value_types(db, make_risks, file_format):
+    rows = make_risks(20)
+
+    table = read_export(file_format)
+
+    assert value_type(table, "likelihood") == pa.int16()
+    assert value_type(table, "category") == pa.string()
+    assert table.column("likelihood").to_pylist() == [row["likelihood"].value for row in rows]
+    assert table.column("impact").to_pylist() == [row["impact"].value for row in rows]
+    assert table.column("category").to_pylist() == [row["category"].value for row in rows]
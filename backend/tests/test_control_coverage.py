@@ -0,0 +1,38 @@
+from models.control import Control, ControlFramework, ControlMapping, ControlStatus, ControlType
+from services.control_coverage import control_coverage
+
+
+def test_framework_coverage_uses_mapping_status(db):
+    framework = ControlFramework(name="SOC2")
+    implemented = Control(
+        control_id="AC-001", title="Access reviews", control_type=ControlType.PREVENTIVE,
+        status=ControlStatus.IMPLEMENTED, responsible_team="IT"
+    )
+    partial = Control(
+        control_id="LOG-001", title="Log retention", control_type=ControlType.DETECTIVE,
+        status=ControlStatus.PARTIALLY_IMPLEMENTED, responsible_team="SecOps"
+    )
+    unmapped = Control(control_id="BCP-001", title="Backups", control_type=ControlType.CORRECTIVE)
+    db.add_all([framework, implemented, partial, unmapped])
+    db.flush()
+    db.add_all([
+        # Implemented control whose mapping has no status yet: mapped, not implemented
+        ControlMapping(control_id=implemented.id, framework_id=framework.id, framework_control_id="CC6.1"),
+        ControlMapping(
+            control_id=partial.id, framework_id=framework.id, framework_control_id="CC7.2",
+            compliance_status=ControlStatus.IMPLEMENTED
+        ),
+    ])
+    db.commit()
+
+    coverage = control_coverage(db, "responsible_team")
+
+    assert coverage["total_controls"] == 3
+    assert coverage["by_status"]["Implemented"]["count"] == 1
+    assert coverage["unmapped_controls"] == 1
+    soc2 = coverage["by_framework"][0]
+    assert (soc2["total_controls"], soc2["implemented"], soc2["coverage_percentage"]) == (2, 1, 50)
+    teams = {group["responsible_team"]: group for group in coverage["groups"]}
+    assert teams["IT"]["by_framework"][0]["implemented"] == 0
+    assert teams["SecOps"]["by_framework"][0]["implemented"] == 1
+    assert list(teams) == ["IT", "SecOps", None]
@@ -0,0 +1,52 @@
+from sqlalchemy import select
+
+from conftest import risk_rows
+from models.compliance import ComplianceRequirement
+from models.control import Control, ControlStatus, ControlType
+from models.control_link import RequirementControlLink, RiskControlLink
+from models.risk import Risk
+
+
+def links(db) -> dict:
+    return {
+        "risks": sorted(db.execute(select(RiskControlLink.risk_id, RiskControlLink.control_id)).all()),
+        "requirements": sorted(
+            db.execute(select(RequirementControlLink.requirement_id, RequirementControlLink.control_id)).all()
+        ),
+    }
+
+
+async def test_controls_added_after_their_owners_get_linked(db, client):
+    risks = [Risk(**row) for row in risk_rows(3)]
+    requirement = ComplianceRequirement(requirement_id="CC6.1", title="Logical access", mapped_controls=["AC-001"])
+    db.add_all([*risks, requirement])
+    db.commit()
+    # AC-001 does not exist yet, so nothing is linked
+    assert links(db) == {"risks": [], "requirements": []}
+
+    control = Control(
+        control_id="AC-001", title="Access reviews", control_type=ControlType.PREVENTIVE,
+        status=ControlStatus.IMPLEMENTED
+    )
+    db.add(control)
+    db.commit()
+
+    assert links(db) == {
+        "risks": [(risk.id, control.id) for risk in risks],
+        "requirements": [(requirement.id, control.id)],
+    }
+    assert db.scalar(select(RiskControlLink.created_at).limit(1)) is not None
+    linked = (await client.get("/api/controls/AC-001/risks")).json()
+    assert [risk["risk_id"] for risk in linked] == [risk.risk_id for risk in risks]
+
+    control.control_id = "AC-099"
+    db.commit()
+    assert links(db) == {"risks": [], "requirements": []}
+
+    control.control_id = "AC-001"
+    db.commit()
+    assert len(links(db)["risks"]) == 3
+
+    db.delete(control)
+    db.commit()
+    assert links(db) == {"risks": [], "requirements": []}
@@ -0,0 +1,33 @@
+from conftest import count_statements
+
+# Snapshot counters, alert counters, active frameworks
+OVERVIEW_STATEMENTS = 3
+
+
+async def overview_statements(client) -> list:
+    with count_statements() as statements:
+        response = await client.get("/api/dashboard/overview")
+    assert response.status_code == 200
+    return statements
+
+
+async def test_overview_statement_count_is_constant(client, make_risks):
+    make_risks(10)
+    # The first call builds the snapshot
+    await overview_statements(client)
+    small = await overview_statements(client)
+
+    make_risks(2000)
+    large = await overview_statements(client)
+
+    assert len(small) == len(large) <= OVERVIEW_STATEMENTS
+
+
+async def test_overview_counts_bulk_inserted_risks(client, make_risks):
+    rows = make_risks(500)
+
+    summary = (await client.get("/api/dashboard/overview")).json()["summary"]
+
+    assert summary["total_risks"] == len(rows)
+    assert summary["open_risks"] == sum(row["status"].value == "Open" for row in rows)
+    assert summary["critical_risks"] == sum(row["inherent_risk_score"] >= 15 for row in rows)
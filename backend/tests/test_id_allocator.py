@@ -0,0 +1,43 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from models.risk import Risk
+from models.control import Control
+from services.id_allocator import reserve_ids, reserve_ids_sync
+
+
+async def test_concurrent_reservations_are_unique(db):
+    # The first calls race to create the series; every later one increments it
+    batches = await asyncio.gather(*[reserve_ids(Risk, "RISK", 5, count=1 + i % 3) for i in range(60)])
+    ids = [business_id for batch in batches for business_id in batch]
+
+    assert len(ids) == sum(1 + i % 3 for i in range(60))
+    assert len(set(ids)) == len(ids)
+    assert all(business_id.startswith("RISK-") and len(business_id) == 10 for business_id in ids)
+    for batch in batches:
+        numbers = [int(business_id[5:]) for business_id in batch]
+        assert numbers == list(range(numbers[0], numbers[0] + len(numbers)))
+
+
+def test_concurrent_sync_reservations_are_unique(db):
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        batches = list(pool.map(lambda _: reserve_ids_sync(Control, "CTRL", 4, count=10), range(40)))
+    ids = [business_id for batch in batches for business_id in batch]
+
+    assert len(set(ids)) == len(ids) == 400
+
+
+async def test_series_continues_after_existing_ids(db, make_risks):
+    make_risks(25)
+
+    assert await reserve_ids(Risk, "RISK", 5) == ["RISK-00026"]
+
+
+async def test_parallel_creates_get_distinct_ids(client):
+    payload = {"title": "Shared service outage", "category": "Operational", "likelihood": 3, "impact": 4}
+
+    responses = await asyncio.gather(*[client.post("/api/risks/", json=payload) for _ in range(20)])
+
+    assert all(response.status_code == 201 for response in responses)
+    ids = [response.json()["risk_id"] for response in responses]
+    assert len(set(ids)) == len(ids)
@@ -0,0 +1,32 @@
+import asyncio
+import json
+import time
+
+from services.live_updates import broadcaster
+
+PAYLOAD = {"title": "Shared service outage", "category": "Operational", "likelihood": 3, "impact": 4}
+
+
+async def test_commit_does_not_wait_for_publish(client, monkeypatch):
+    send = broadcaster._send
+
+    def slow_send(payload):
+        time.sleep(0.5)
+        send(payload)
+
+    monkeypatch.setattr(broadcaster, "_send", slow_send)
+    monkeypatch.setattr(broadcaster, "_publisher_down_until", float("inf"))
+    monkeypatch.setattr(broadcaster, "_loop", asyncio.get_running_loop())
+    queue = broadcaster.subscribe()
+    try:
+        start = time.perf_counter()
+        response = await client.post("/api/risks/", json=PAYLOAD)
+        elapsed = time.perf_counter() - start
+        message = json.loads(await asyncio.wait_for(queue.get(), timeout=5))
+    finally:
+        broadcaster.unsubscribe(queue)
+
+    assert response.status_code == 201
+    assert elapsed < 0.5
+    assert message["events"] == [{"event": "risk.created", "id": response.json()["risk_id"]}]
+    assert message["counters"]["total_risks"] == 1
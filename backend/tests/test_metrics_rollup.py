@@ -0,0 +1,36 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, func, select
+
+from models.dashboard import DailyMetrics
+from services.metrics_rollup import get_trend_series, rollup_days, rollup_missing_days
+
+
+def test_first_rollup_covers_all_history(db, make_risks):
+    rows = make_risks(30)
+    today = datetime.utcnow().date()
+    first = min(row["created_at"] for row in rows).date()
+
+    rollup_missing_days(db)
+    db.commit()
+
+    assert db.scalar(select(func.min(DailyMetrics.day))) == first
+    assert db.scalar(select(func.max(DailyMetrics.day))) == today
+    series = get_trend_series(db, first, today)
+    assert sum(day["new_risks"] for day in series) == len(rows)
+
+
+def test_rollup_catches_up_after_missed_days(db, make_risks):
+    today = datetime.utcnow().date()
+    rollup_days(db, today - timedelta(days=10), today)
+    # The scheduler was down for the last five days
+    db.execute(delete(DailyMetrics).where(DailyMetrics.day > today - timedelta(days=5)))
+    db.commit()
+    rows = make_risks(2 * 24 * 60)  # one a minute for the last two days
+
+    rollup_missing_days(db)
+    db.commit()
+
+    series = get_trend_series(db, today - timedelta(days=10), today)
+    assert [day["period_start"] for day in series][-1] == today.isoformat()
+    assert sum(day["new_risks"] for day in series) == len(rows)
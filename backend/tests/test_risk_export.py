@@ -0,0 +1,56 @@
+import csv
+import io
+import json
+
+import pytest
+
+from conftest import BENCHMARK_RISKS, peak_memory
+from services.risk_export import EXPORT_BATCH_SIZE, HEADERS, stream_risk_export
+
+
+def consume(file_format: str) -> int:
+    """Stream an export, discarding chunks as a socket would; returns the bytes sent"""
+    _, _, body = stream_risk_export(None, file_format)
+    return sum(len(chunk) for chunk in body)
+
+
+def test_csv_export_has_every_risk(db, make_risks):
+    rows = make_risks(EXPORT_BATCH_SIZE + 10)
+
+    _, _, body = stream_risk_export(None, "csv")
+    records = list(csv.reader(io.StringIO(b"".join(body).decode())))
+
+    assert records[0] == HEADERS
+    assert [record[0] for record in records[1:]] == [row["risk_id"] for row in rows]
+
+
+def test_ndjson_export_has_every_risk(db, make_risks):
+    rows = make_risks(EXPORT_BATCH_SIZE + 10)
+
+    _, _, body = stream_risk_export(None, "ndjson")
+    chunks = list(body)
+    records = [json.loads(line) for line in b"".join(chunks).splitlines()]
+
+    assert [record[HEADERS[0]] for record in records] == [row["risk_id"] for row in rows]
+    # Rows are sent in buffered chunks, not one chunk per row
+    assert len(chunks) < len(rows) / 10
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("file_format", ["csv", "ndjson", "xlsx"])
+def test_export_memory_is_flat(db, make_risks, file_format):
+    """Peak memory of a full export at a few batches and at BENCHMARK_RISKS"""
+    small = 2 * EXPORT_BATCH_SIZE
+    peaks = {}
+    make_risks(small)
+    consume(file_format)
+    with peak_memory() as peak:
+        consume(file_format)
+    peaks[small] = peak[0]
+
+    make_risks(BENCHMARK_RISKS - small)
+    with peak_memory() as peak:
+        consume(file_format)
+    peaks[BENCHMARK_RISKS] = peak[0]
+
+    assert peaks[BENCHMARK_RISKS] <= peaks[small] * 1.25 + 1024 * 1024, peaks
@@ -0,0 +1,46 @@
+import pytest
+
+from conftest import BENCHMARK_RISKS, peak_memory
+from models.risk import Risk
+
+
+async def test_statistics_match_python_banding(client, make_risks):
+    rows = make_risks(300)
+
+    stats = (await client.get("/api/risks/analytics/statistics")).json()
+
+    levels = {"Critical": 0, "High": 0, "Medium": 0, "Low": 0}
+    for row in rows:
+        levels[Risk().get_risk_level(row["inherent_risk_score"])] += 1
+    assert stats["total_risks"] == len(rows)
+    assert stats["by_risk_level"] == levels
+    assert stats["average_inherent_score"] == sum(row["inherent_risk_score"] for row in rows) / len(rows)
+
+
+@pytest.mark.benchmark
+async def test_statistics_memory_is_flat(client, make_risks):
+    """Peak memory of the statistics endpoint at 1k risks and at BENCHMARK_RISKS"""
+    peaks = {}
+    size = 0
+    for target in (1000, BENCHMARK_RISKS):
+        make_risks(target - size)
+        size = target
+        # Warm up pools and statement caches so only the request itself is measured
+        await client.get("/api/risks/analytics/statistics")
+        with peak_memory() as peak:
+            response = await client.get("/api/risks/analytics/statistics")
+        assert response.json()["total_risks"] == size
+        peaks[size] = peak[0]
+
+    assert peaks[BENCHMARK_RISKS] <= peaks[1000] * 1.2 + 256 * 1024, peaks
+
+
+async def test_heatmap_tag_filter_requires_every_tag(client, make_risks):
+    rows = make_risks(40)
+
+    cells = (await client.get("/api/risks/analytics/heatmap", params={"tags": ["infra", "q3"]})).json()
+    none = (await client.get("/api/risks/analytics/heatmap", params={"tags": ["infra", "app"]})).json()
+
+    expected = sum(set(row["tags"]) >= {"infra", "q3"} and row["status"].value != "Closed" for row in rows)
+    assert sum(cell["count"] for cell in cells) == expected
+    assert none == []
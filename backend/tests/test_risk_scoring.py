@@ -0,0 +1,54 @@
+import pytest
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+
+from conftest import risk_rows
+from database import engine
+from models.control import Control, ControlStatus, ControlType
+from models.control_link import RiskControlLink
+from models.risk import Risk
+from schemas.risk import RiskScoringMethodUpdate
+from services.risk_scoring import rescore_risks
+
+
+def test_rescore_skips_links_of_risks_created_mid_run(db, make_risks, monkeypatch):
+    make_risks(3)
+    control = Control(
+        control_id="AC-001", title="Access reviews", control_type=ControlType.PREVENTIVE,
+        status=ControlStatus.IMPLEMENTED, effectiveness_rating=5
+    )
+    db.add(control)
+    db.commit()
+    execute = db.execute
+    inserted = []
+
+    def execute_with_concurrent_insert(statement, *args, **kwargs):
+        if not inserted and statement.is_select and RiskControlLink.__tablename__ in str(statement):
+            # Another transaction adds a linked risk between the risk and link reads
+            with engine.begin() as connection:
+                risk_pk = connection.scalar(insert(Risk).returning(Risk.id), risk_rows(1, start=3))
+                connection.execute(insert(RiskControlLink).values(risk_id=risk_pk, control_id=control.id))
+            inserted.append(risk_pk)
+        return execute(statement, *args, **kwargs)
+
+    monkeypatch.setattr(db, "execute", execute_with_concurrent_insert)
+    result = rescore_risks(db)
+
+    assert inserted
+    assert result["scanned"] == 3
+    # Left for the next run rather than scored with links it was not read with
+    residual = db.scalar(select(Risk.residual_risk_score).where(Risk.id == inserted[0]))
+    assert residual == risk_rows(1, start=3)[0]["residual_risk_score"]
+
+
+@pytest.mark.parametrize("change", [
+    {"control_status_weights": {"Implemented": -0.5}},
+    {"control_status_weights": {"Implemented": 1.5}},
+    {"max_control_reduction": 1.2},
+])
+def test_scoring_method_rejects_reductions_outside_0_1(change):
+    matrix = [[float(likelihood * impact) for impact in range(1, 6)] for likelihood in range(1, 6)]
+    method = {"name": "Weighted", "matrix": matrix, **change}
+
+    with pytest.raises(ValidationError):
+        RiskScoringMethodUpdate(**method)
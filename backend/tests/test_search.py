@@ -0,0 +1,15 @@
+from services.search import HEADLINE_START, HEADLINE_STOP, _mark_headline, InvertedIndex
+
+
+def test_headline_text_is_escaped_and_matches_marked():
+    headline = f"<img src=x onerror=alert(1)> exposed {HEADLINE_START}service{HEADLINE_STOP} & <b>"
+
+    assert _mark_headline(headline) == (
+        "&lt;img src=x onerror=alert(1)&gt; exposed <mark>service</mark> &amp; &lt;b&gt;"
+    )
+
+
+def test_fallback_highlight_is_escaped():
+    assert InvertedIndex._highlight("<script>service</script> down", {"service"}) == (
+        "<mark>&lt;script&gt;service&lt;/script&gt;</mark> down"
+    )
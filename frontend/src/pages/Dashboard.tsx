@@ -1,4 +1,5 @@
-import { useQuery } from '@tanstack/react-query'
+import { useEffect } from 'react'
+import { useQuery, useQueryClient } from '@tanstack/react-query'
 import {
   Grid,
   Card,
@@ -26,11 +27,24 @@ import {
   Legend,
   ResponsiveContainer,
 } from 'recharts'
-import { getDashboardOverview, getKPIs, getActionItems } from '../services/api'
+import { getDashboardOverview, getKPIs, getActionItems, subscribeDashboardEvents } from '../services/api'
 
 const COLORS = ['#0088FE', '#00C49F', '#FFBB28', '#FF8042', '#8884D8']
 
 export default function Dashboard() {
+  const queryClient = useQueryClient()
+
+  useEffect(() => {
+    // Refetch when the server reports a committed change instead of polling
+    return subscribeDashboardEvents((event) => {
+      if (event.type === 'delta' || event.type === 'resync') {
+        queryClient.invalidateQueries({ queryKey: ['dashboardOverview'] })
+        queryClient.invalidateQueries({ queryKey: ['kpis'] })
+        queryClient.invalidateQueries({ queryKey: ['actionItems'] })
+      }
+    })
+  }, [queryClient])
+
   const { data: overview, isLoading: overviewLoading } = useQuery({
     queryKey: ['dashboardOverview'],
     queryFn: async () => {
@@ -170,7 +170,7 @@ export default function RiskRegister() {
             sx={{ mr: 1 }}
           >
             Import
-            <input type="file" hidden accept=".xlsx,.xls" onChange={handleImport} />
+            <input type="file" hidden accept=".xlsx,.csv" onChange={handleImport} />
           </Button>
           <Button
             variant="outlined"
@@ -12,6 +12,11 @@ export const getDashboardOverview = () => api.get('/dashboard/overview')
 export const getMetricsTrends = (days: number = 30) => api.get(`/dashboard/metrics/trends?days=${days}`)
 export const getKPIs = () => api.get('/dashboard/metrics/kpis')
 export const getActionItems = () => api.get('/dashboard/action-items')
+export const subscribeDashboardEvents = (onEvent: (event: any) => void) => {
+  const source = new EventSource('/api/dashboard/stream')
+  source.onmessage = (message) => onEvent(JSON.parse(message.data))
+  return () => source.close()
+}
 
 // Risks
 export const getRisks = (params?: any) => api.get('/risks/', { params })
@@ -19,7 +24,7 @@ export const getRisk = (riskId: string) => api.get(`/risks/${riskId}`)
 export const createRisk = (data: any) => api.post('/risks/', data)
 export const updateRisk = (riskId: string, data: any) => api.put(`/risks/${riskId}`, data)
 export const deleteRisk = (riskId: string) => api.delete(`/risks/${riskId}`)
-export const getRiskHeatmap = () => api.get('/risks/analytics/heatmap')
+export const getRiskHeatmap = () => api.get('/risks/analytics/heatmap', { params: { risk_ids_limit: 0 } })
 export const getRiskStatistics = () => api.get('/risks/analytics/statistics')
 export const importRisksExcel = (file: File) => {
   const formData = new FormData()